@@ -0,0 +1,68 @@
+# benchmarks/bench_chain_construction.py
+"""Per-request cost of building prompt | structured-LLM chains.
+
+Compares the old path (ChatPromptTemplate.from_messages + fresh system
+prompt + with_structured_output on every request) with the chains each
+agent now compiles once. No LLM calls are made.
+
+    python benchmarks/bench_chain_construction.py [iterations]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-key")
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from agents.coordinator import CoordinatorAgent, QueryClassification
+from agents.registry import AgentRegistry
+
+
+def rebuild(agent):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", agent.get_system_prompt()),
+        ("human", "Student query: {query}")
+    ])
+    return prompt | agent.get_structured_llm(QueryClassification)
+
+
+def precompiled(agent):
+    return agent.get_chain(QueryClassification, "Student query: {query}")
+
+
+def measure(build, agent, iterations):
+    build(agent)
+    start = time.process_time()
+    for _ in range(iterations):
+        build(agent)
+    cpu = time.process_time() - start
+
+    tracemalloc.start()
+    for _ in range(iterations):
+        build(agent)
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count for stat in snapshot.statistics("filename"))
+    return cpu / iterations, peak, allocations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    agent = CoordinatorAgent(registry=AgentRegistry())
+
+    print(f"{'path':<12} {'cpu/request':>14} {'peak bytes':>12} {'live blocks':>12}")
+    results = {}
+    for name, build in (("rebuild", rebuild), ("precompiled", precompiled)):
+        cpu, peak, blocks = measure(build, agent, iterations)
+        results[name] = cpu
+        print(f"{name:<12} {cpu * 1e6:>11.1f} us {peak:>12} {blocks:>12}")
+    print(f"speedup: {results['rebuild'] / max(results['precompiled'], 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
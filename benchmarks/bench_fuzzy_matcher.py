@@ -0,0 +1,79 @@
+# benchmarks/bench_fuzzy_matcher.py
+"""Build and query cost of the lost & found description matcher.
+
+Generates synthetic item descriptions ("lost my dark blue boAt earbuds near
+the mess in block C") and reports bulk build time, memory held by the
+sparse matrix, and per-query latency with and without category/time filters.
+
+    python benchmarks/bench_fuzzy_matcher.py [sizes...]     # default: 10000 100000 1000000
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from tools.fuzzy_matcher import FuzzyMatcher
+
+CATEGORIES = {
+    "electronics": ["phone", "earphones", "earbuds", "charger", "laptop", "power bank", "smartwatch", "calculator"],
+    "accessories": ["wallet", "purse", "watch", "bag", "sunglasses", "bottle", "umbrella"],
+    "clothing": ["hoodie", "jacket", "sneakers", "cap", "scarf", "towel"],
+    "documents": ["id card", "aadhaar card", "admit card", "passport", "certificate"],
+    "keys": ["room keys", "bike key", "locker key", "keychain"],
+    "books": ["notebook", "textbook", "lab record", "novel"],
+}
+BRANDS = ["boat", "samsung", "apple", "noise", "milton", "casio", "nike", "puma", "dell", "hp", "oneplus", "realme"]
+COLOURS = ["black", "dark", "blue", "navy", "red", "white", "grey", "silver", "green", "pink"]
+PLACES = ["mess", "library", "common room", "gym", "reception", "laundry", "main gate", "study room", "canteen"]
+TEMPLATES = [
+    "lost my {colour} {brand} {item} near the {place} in block {block}",
+    "found a {colour} {item} ({brand}) lying in the {place}",
+    "{colour} {brand} {item} missing since yesterday, last seen at the {place}",
+    "someone left a {item}, {colour}, {brand} logo, at the {place} block {block}",
+]
+QUERIES = 200
+
+
+def descriptions(count: int, rng: random.Random):
+    categories = list(CATEGORIES)
+    for _ in range(count):
+        category = rng.choice(categories)
+        yield category, rng.choice(TEMPLATES).format(
+            colour=rng.choice(COLOURS), brand=rng.choice(BRANDS), item=rng.choice(CATEGORIES[category]),
+            place=rng.choice(PLACES), block=rng.choice("ABCDEFGH")
+        )
+
+
+def bench(size: int):
+    rng = random.Random(size)
+    now = time.time()
+    rows = list(descriptions(size, rng))
+    matcher = FuzzyMatcher(min_rebuild=size + 1)
+    started = time.perf_counter()
+    for start in range(0, size, 50_000):
+        chunk = rows[start:start + 50_000]
+        matcher.add_many(range(start, start + len(chunk)), [text for _, text in chunk], [c for c, _ in chunk],
+                         [now - rng.uniform(0, 60 * 86400) for _ in chunk])
+    matcher.rebuild()
+    build = time.perf_counter() - started
+    megabytes = (matcher.doc_ids.nbytes + matcher.weights.nbytes + matcher.indptr.nbytes) / 1e6
+
+    queries = [text for _, text in descriptions(QUERIES, random.Random(1))]
+    timings = {}
+    for label, kwargs in [("unfiltered", {}),
+                          ("category + 7 days", {"categories": ["electronics", "other"], "since": now - 7 * 86400})]:
+        started = time.perf_counter()
+        for query in queries:
+            matcher.search(query, limit=5, **kwargs)
+        timings[label] = 1000 * (time.perf_counter() - started) / QUERIES
+
+    print(f"{size:>9,} items: build {build:6.2f}s, matrix {megabytes:7.1f} MB, "
+          + ", ".join(f"{label} {ms:6.2f} ms/query" for label, ms in timings.items()))
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]:
+        bench(size)
@@ -0,0 +1,67 @@
+# benchmarks/bench_image_index.py
+"""Photo matching latency for the lost & found image index.
+
+Fills the index with clustered 64-bit hashes (a few near-duplicate photos per
+item, as when several students photograph the same object) and compares the
+multi-index hash search with a linear scan, plus the cost of hashing a photo.
+
+    python benchmarks/bench_image_index.py [items]
+"""
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from PIL import Image
+from tools.image_index import MultiIndexHash, hamming, image_hashes
+
+RADIUS = 10
+QUERIES = 500
+
+
+def clustered_hashes(count: int, rng: random.Random):
+    hashes = []
+    while len(hashes) < count:
+        base = rng.getrandbits(64)
+        for _ in range(rng.randint(1, 5)):
+            hashes.append(base ^ sum(1 << rng.randrange(64) for _ in range(rng.randint(0, 6))))
+    return hashes[:count]
+
+
+def main(items: int):
+    rng = random.Random(0)
+    hashes = clustered_hashes(items, rng)
+    index = MultiIndexHash()
+    started = time.perf_counter()
+    for slot, key in enumerate(hashes):
+        index.add(key, slot)
+    print(f"indexed {items} hashes in {1000 * (time.perf_counter() - started):.0f} ms")
+
+    queries = rng.sample(hashes, QUERIES)
+    started = time.perf_counter()
+    checked = sum(index.search(query, RADIUS)[1] for query in queries)
+    indexed_ms = 1000 * (time.perf_counter() - started) / QUERIES
+
+    started = time.perf_counter()
+    for query in queries:
+        [key for key in hashes if hamming(query, key) <= RADIUS]
+    linear_ms = 1000 * (time.perf_counter() - started) / QUERIES
+
+    print(f"radius {RADIUS}: multi-index {indexed_ms:.3f} ms/query ({checked / QUERIES:.0f} candidates checked), "
+          f"linear scan {linear_ms:.3f} ms/query")
+
+    photo = io.BytesIO()
+    pixels = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    Image.fromarray(pixels).resize((3000, 2250)).save(photo, format="JPEG", quality=85)
+    started = time.perf_counter()
+    for _ in range(20):
+        image_hashes(photo.getvalue())
+    print(f"hashing a 3000x2250 JPEG: {1000 * (time.perf_counter() - started) / 20:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,119 @@
+# benchmarks/bench_pipeline.py
+"""Offline load test of the full coordinator pipeline on the fake LLM backend.
+
+Replays a mix of student queries at a fixed concurrency and reports
+end-to-end latency percentiles of the fully answered requests next to the
+fake backend's own latency. Partial, degraded and failed requests are
+counted separately, and time spent queued for an LLM slot is reported on
+its own line, so what is left of the gap is pipeline overhead (routing,
+formatting).
+
+The LLM admission quotas are lifted by default, since the fake backend has
+none; set LLM_RPM, LLM_TPM and LLM_CONCURRENCY to benchmark under the
+production limits instead.
+
+    FAKE_LLM_LATENCY=lognormal:400,0.4 python benchmarks/bench_pipeline.py [requests] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+# Specialists import their form links and hostel data from config/
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+os.environ["LLM_BACKEND"] = "fake"
+os.environ.setdefault("GROQ_API_KEY", "offline")
+os.environ.setdefault("LLM_RPM", "1000000")
+os.environ.setdefault("LLM_TPM", "1000000000")
+os.environ.setdefault("LLM_CONCURRENCY", "1000")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "1000")
+# Fresh ticket and report stores per run, so earlier runs don't turn complaints into incident duplicates
+STORE_DIR = tempfile.mkdtemp(prefix="bench-pipeline-")
+os.environ["COMPLAINT_DB"] = os.path.join(STORE_DIR, "complaints.db")
+os.environ["LOST_FOUND_DB"] = os.path.join(STORE_DIR, "lost_found.db")
+
+from agents.coordinator import DEGRADED_HEADER, PARTIAL_HEADER, CoordinatorAgent
+from tools.complaint_store import complaint_store
+from tools.groq_client import client_manager
+from tools.lost_found_store import lost_found_store
+from tools.token_accounting import token_meter
+from utils.deadline import deadline_scope
+from utils.response_formatter import ResponseFormatter
+
+QUERIES = [
+    "My room fan is not working and it's very hot",
+    "There's water leaking from the bathroom ceiling",
+    "The WiFi in Block A is very slow",
+    "I lost my phone in the mess hall yesterday",
+    "I found someone's wallet near the main gate",
+    "What's today's lunch menu?",
+    "The food quality has been very poor lately",
+    "Can my parents stay overnight in my room?",
+    "What time does the hostel gate close?",
+    "Is there a power cut in Block B?",
+    "When is the next scheduled maintenance?",
+    "there are sparks coming from the socket near my bed",
+    "Hello, what can you help me with?",
+]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run(requests: int, concurrency: int):
+    coordinator = CoordinatorAgent()
+    coordinator.registry.warm_up()
+    await coordinator.intent_index.warm_up()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], Counter()
+
+    async def one(i):
+        query = QUERIES[i % len(QUERIES)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                with deadline_scope(30), token_meter.request_scope():
+                    response = await coordinator.process_query(f"{query} (#{i})", {})
+                ResponseFormatter.format_agent_response(response)
+            except Exception as e:
+                outcomes[type(e).__name__] += 1
+                return
+            if response.content.startswith(PARTIAL_HEADER):
+                outcomes["partial"] += 1
+            elif response.content.startswith(DEGRADED_HEADER):
+                outcomes["degraded"] += 1
+            else:
+                outcomes["ok"] += 1
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await complaint_store.flush()
+    await lost_found_store.flush()
+
+    llm = token_meter.stats()["stages"]
+    admission = coordinator.get_metrics()["llm_admission"]
+    print(f"{requests} requests @ concurrency {concurrency} in {elapsed:.2f}s ({requests / elapsed:.1f} req/s)")
+    print(f"outcomes: {dict(outcomes)}")
+    print(f"llm admission: admitted={admission['admitted']} shed={admission['shed']} "
+          f"avg_queue={admission['avg_queue_ms']:.0f} ms max_queue={admission['max_queue_ms']:.0f} ms")
+    print(f"end-to-end ms (ok only): p50={1000 * percentile(latencies, 0.5):.0f} "
+          f"p95={1000 * percentile(latencies, 0.95):.0f} p99={1000 * percentile(latencies, 0.99):.0f}")
+    for stage, stats in llm.items():
+        print(f"  llm {stage:<36} calls={stats['calls']:>5} avg={stats['avg_latency_ms']:.0f} ms")
+    print(f"fake backend: {client_manager.stats().get('fake')}")
+    print(f"local routing hit rate: {coordinator.get_metrics()['routing']['local_hit_rate']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    ))
@@ -1,4 +1,6 @@
-# config/hostel_data.py (continued)
+# config/hostel_data.py
+from typing import Dict
+
 class MessData:
    @staticmethod
    def get_menu_info(meal_type: str) -> str:
@@ -233,6 +235,20 @@ class FacilityStatus:
        }
        return guides.get(facility_type.lower(), "Contact office with detailed description")
    
+   @staticmethod
+   def get_normal_operations(facility_type: str) -> str:
+       operations = {
+           "power": """• Mains supply round the clock, generator backup within 30 seconds of a cut
+- Corridor and stair lights on timers from 6:00 PM to 6:00 AM""",
+           
+           "water": """• Overhead tanks refilled at 5:00 AM and 3:00 PM
+- Hot water in bathrooms 6:00 - 9:00 AM and 6:00 - 9:00 PM""",
+           
+           "internet": """• WiFi in every block and the common areas
+- Nightly network maintenance window 3:00 - 3:30 AM"""
+       }
+       return operations.get(facility_type.lower(), "Contact office for how this service normally runs")
+   
    @staticmethod
    def get_troubleshooting_tips(facility_type: str) -> str:
        tips = {
@@ -1,11 +1,25 @@
 # src/agents/base_agent.py
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, TypeVar, Type
+from functools import cached_property
+from typing import Dict, Any, Awaitable, Callable, Optional, List, Tuple, TypeVar, Type, Union
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from tools.groq_client import get_groq_llm
+from tools.groq_client import estimate_tokens, get_groq_llm, invoke_llm
+from tools.token_accounting import RequestUsage, add_shared_usage, current_usage
+from tools.vision_analyzer import VISION_ERROR_PREFIX
+from utils.cache import result_cache
+from utils.deadline import Deadline, DeadlineExceeded, current_deadline
+from utils.prompts import SystemPrompts
+from utils.singleflight import SingleFlight
 
 T = TypeVar('T', bound=BaseModel)
+R = TypeVar('R')
+
+# Identical queries arriving together share their classification and analysis calls
+COALESCE_STAGES = os.getenv("COALESCE_QUERIES", "true").lower() in ("1", "true", "yes")
+stage_flight = SingleFlight()
 
 class AgentResponse(BaseModel):
     content: str
@@ -15,13 +29,70 @@ class AgentResponse(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0, default=0.8)
 
 class BaseAgent(ABC):
+    # Structured output produced by analyze(); None for agents without one
+    analysis_model: Optional[Type[BaseModel]] = None
+    
     def __init__(self, name: str):
         self.name = name
         self.llm = get_groq_llm()
+        self._chains: Dict[Tuple[Type[BaseModel], str, str], Any] = {}
+    
+    @cached_property
+    def system_prompt(self) -> str:
+        """The agent's system prompt, built once"""
+        return self.get_system_prompt()
     
     def get_structured_llm(self, response_model: Type[T]):
         """Get LLM with structured output"""
-        return self.llm.with_structured_output(response_model)
+        # include_raw keeps the provider's token usage; invoke_llm unwraps the parsed model
+        return self.llm.with_structured_output(response_model, include_raw=True)
+    
+    def get_chain(self, response_model: Type[T], human_template: str, system_addendum: str = ""):
+        """Compiled prompt | structured-LLM runnable, built once per agent and reused"""
+        key = (response_model, human_template, system_addendum)
+        chain = self._chains.get(key)
+        if chain is None:
+            system = self.system_prompt + ("\n\n" + system_addendum if system_addendum else "")
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system),
+                ("human", human_template)
+            ])
+            chain = prompt | self.get_structured_llm(response_model)
+            self._chains[key] = chain
+        return chain
+    
+    async def invoke_chain(self, chain, inputs: Dict[str, Any], stage: str = "analysis"):
+        """Run a prompt | LLM chain under the shared LLM admission limits"""
+        estimated = estimate_tokens(self.system_prompt, *inputs.values())
+        return await invoke_llm(chain, inputs, estimated, stage, agent=self.name,
+                                system_prompt_chars=len(self.system_prompt))
+    
+    async def run_shared(self, stage: str, key: str, fn: Callable[[], Awaitable[R]]) -> R:
+        """Run a side-effect-free stage once for concurrent callers with the same key.
+
+        The shared work is its own task with its own deadline (the caller's
+        budget, started afresh) and its own token usage, which every caller
+        receives as shared calls. Each caller waits only as long as its own
+        deadline allows for ``stage``.
+        """
+        deadline = current_deadline.get()
+
+        async def detached() -> Tuple[R, RequestUsage]:
+            # Set inside the task, so none of this leaks into the callers' contexts
+            current_deadline.set(Deadline(deadline.budget) if deadline is not None else None)
+            usage = RequestUsage()
+            current_usage.set(usage)
+            return await fn(), usage
+
+        try:
+            result, usage = await asyncio.wait_for(
+                stage_flight.do(f"{stage}:{key}", detached),
+                deadline.stage_timeout(stage) if deadline is not None else None
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage)
+        add_shared_usage(usage)
+        return result
     
     @abstractmethod
     def get_system_prompt(self) -> str:
@@ -31,7 +102,48 @@ class BaseAgent(ABC):
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
         pass
     
-    async def analyze_image(self, image_base64: str, prompt: str) -> str:
-        """Analyze image with vision model"""
-        from src.tools.vision_analyzer import analyze_image
-        return await analyze_image(image_base64, prompt)
\ No newline at end of file
+    async def analyze(self, query: str, context: Dict[str, Any]) -> Optional[BaseModel]:
+        """Run this agent's structured analysis of the query; agents with an ``analysis_model`` override this"""
+        return None
+    
+    async def get_analysis(self, query: str, context: Dict[str, Any]) -> Optional[BaseModel]:
+        """Use an analysis pre-computed by the coordinator, a cached one, or run our own.
+
+        None for agents without an ``analysis_model``: they have nothing to analyze.
+        """
+        if self.analysis_model is None:
+            return None
+        analysis = context.get("analysis")
+        if isinstance(analysis, self.analysis_model):
+            return analysis
+        
+        entry_type = self.analysis_model.__name__
+        key = result_cache.make_key(query, context.get("image_data"))
+        analysis = result_cache.get(entry_type, key)
+        if analysis is None:
+            if COALESCE_STAGES and not context.get("image_data"):
+                analysis = await self.run_shared("analysis", f"{entry_type}:{key}", lambda: self.analyze(query, context))
+            else:
+                # Image analyses await this request's own vision prefetch
+                analysis = await self.analyze(query, context)
+            if not context.get("image_analysis_failed"):
+                result_cache.set(entry_type, key, analysis)
+        return analysis
+    
+    async def analyze_image(self, image: Union[str, bytes], prompt: str) -> str:
+        """Analyze image (decoded bytes or base64) with vision model"""
+        from tools.vision_analyzer import analyze_image
+        return await analyze_image(image, prompt)
+    
+    async def describe_image(self, context: Dict[str, Any]) -> str:
+        """Vision analysis of the request's image, reusing the coordinator's prefetch when present"""
+        prefetched = context.get("image_analysis")
+        if prefetched is not None:
+            # Shielded: a cancelled speculative analysis must not cancel the shared call
+            description = await asyncio.shield(prefetched)
+        else:
+            description = await self.analyze_image(context["image_data"], SystemPrompts.get_vision_analysis_prompt())
+        if description.startswith(VISION_ERROR_PREFIX):
+            # An analysis built on a failed image read must not be served from the result cache later
+            context["image_analysis_failed"] = True
+        return description
\ No newline at end of file
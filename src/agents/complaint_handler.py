@@ -1,10 +1,12 @@
 # src/agents/complaint_handler.py
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from src.agents.base_agent import BaseAgent, AgentResponse
-from src.tools.form_selector import FormSelector
-from src.utils.prompts import SystemPrompts
-from typing import Dict, Any
+from agents.base_agent import BaseAgent, AgentResponse
+from tools.form_selector import FormSelector
+from utils.prompts import SystemPrompts
+from agents.degraded import DegradedAnalyzer
+from tools.complaint_store import ComplaintStore, Ticket, complaint_store
+from tools.incident_tracker import IncidentTracker, incident_tracker
+from typing import Dict, Any, Optional
 
 
 class ComplaintAnalysis(BaseModel):
@@ -27,15 +29,35 @@ class ComplaintAnalysis(BaseModel):
     )
 
 class ComplaintAgent(BaseAgent):
-    def __init__(self):
+    analysis_model = ComplaintAnalysis
+    
+    def __init__(self, store: Optional[ComplaintStore] = complaint_store,
+                 incidents: Optional[IncidentTracker] = incident_tracker):
         super().__init__("Complaint Handler")
+        self.analysis_chain = self.get_chain(ComplaintAnalysis, "Complaint: {query}{image_context}")
+        self.store = store
+        self.incidents = incidents if store is not None else None
+        # Keyword issue type, to look for a matching incident before any LLM call
+        self.keywords = DegradedAnalyzer()
     
     def get_system_prompt(self) -> str:
         return SystemPrompts.get_complaint_handler_prompt()
     
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
+        # Tickets from earlier runs stay trackable and IDs keep counting up (read once, off the event loop)
+        if self.incidents is not None:
+            await self.incidents.warm_up()
+        elif self.store is not None:
+            await self.store.warm_up()
+        
+        # A duplicate of an open incident gets the incident's answer without another analysis call
+        incident = self._match_incident(query, context)
+        if incident is not None:
+            return self._incident_response(query, incident)
+        filed = len(self.store.tickets) if self.store is not None else 0
+        
         # Analyze the complaint
-        analysis = await self._analyze_complaint(query, context)
+        analysis = await self.get_analysis(query, context)
         
         # Get appropriate form using FormSelector
         form_link, form_explanation = FormSelector.get_complaint_form(
@@ -46,12 +68,25 @@ class ComplaintAgent(BaseAgent):
         # Generate response content
         response_content = await self._generate_response(query, analysis, context)
         
-        # Determine urgency
-        urgency = "urgent" if analysis.severity == "critical" else "high" if analysis.severity == "major" else "medium"
+        # Complaints filed while we awaited the analysis (e.g. the same outage reported concurrently)
+        # may have opened the incident; nothing between this check and create() yields to them
+        if self.store is not None and len(self.store.tickets) != filed:
+            incident = self._match_incident(query, {**context, "analysis": analysis})
+            if incident is not None:
+                return self._incident_response(query, incident)
+        
+        # File the ticket (the disk write happens in the background)
+        tracking_step = "Contact the hostel office to follow up on this complaint"
+        if self.store is not None:
+            ticket = self.store.create(query, analysis)
+            if self.incidents is not None:
+                self.incidents.add(ticket)
+            response_content += f"\n\n🎫 Your complaint ticket number is **#{ticket.ticket_id}**."
+            tracking_step = f"Check progress any time by asking for the status of ticket #{ticket.ticket_id}"
         
         next_steps = [
             f"Fill out the complaint form: {form_link}",
-            "You'll receive a complaint ID for tracking",
+            tracking_step,
             f"Expected resolution: {analysis.estimated_resolution}",
             "Contact hostel office if urgent"
         ]
@@ -60,28 +95,63 @@ class ComplaintAgent(BaseAgent):
             content=response_content,
             form_link=form_link,
             next_steps=next_steps,
-            urgency=urgency
+            urgency=self._urgency(analysis.severity)
         )
     
+    @staticmethod
+    def _urgency(severity: str) -> str:
+        return "urgent" if severity == "critical" else "high" if severity == "major" else "medium"
+    
+    def _match_incident(self, query: str, context: Dict[str, Any]) -> Optional[Ticket]:
+        if self.incidents is None:
+            return None
+        # The coordinator's fused analysis knows the issue type better than keywords do
+        analysis = context.get("analysis")
+        if isinstance(analysis, ComplaintAnalysis):
+            issue_type = analysis.issue_type
+        else:
+            issue_type = self.keywords.fields("COMPLAINT", query)["issue_type"]
+        return self.incidents.match(query, issue_type)
+    
+    def _incident_response(self, query: str, incident: Ticket) -> AgentResponse:
+        """File a duplicate under an open incident and answer from the incident's analysis"""
+        ticket = self.store.create(query, incident, incident_id=incident.ticket_id)
+        self.incidents.add(ticket)
+        affected = self.incidents.size(incident.ticket_id)
+        form_link, _ = FormSelector.get_complaint_form(incident.issue_type, incident.severity)
+        
+        progress = "Maintenance staff are already working on it." if incident.status == "in_progress" else "The maintenance team has been notified."
+        content = "\n\n".join([
+            f"This {incident.issue_type} issue has already been reported (incident #{incident.ticket_id}). {progress}",
+            f"👥 {affected} students affected so far. Expected resolution: {incident.estimated_resolution}.",
+            incident.temporary_solution,
+            f"🎫 Your complaint ticket number is **#{ticket.ticket_id}**; it is linked to the incident and will be updated with it."
+        ])
+        
+        next_steps = [
+            f"Check progress any time by asking for the status of ticket #{ticket.ticket_id}",
+            f"Expected resolution: {incident.estimated_resolution}",
+            f"Only fill out the complaint form if your problem is different: {form_link}",
+            "Contact hostel office if urgent"
+        ]
+        
+        return AgentResponse(
+            content=content,
+            next_steps=next_steps,
+            urgency=self._urgency(incident.severity)
+        )
+    
+    async def analyze(self, query: str, context: Dict[str, Any]) -> ComplaintAnalysis:
+        return await self._analyze_complaint(query, context)
+    
     async def _analyze_complaint(self, query: str, context: Dict[str, Any]) -> ComplaintAnalysis:
         # Add image analysis if available
         image_context = ""
         if context.get("image_data"):
-            image_analysis = await self.analyze_image(
-                context["image_data"],
-                SystemPrompts.get_vision_analysis_prompt()
-            )
+            image_analysis = await self.describe_image(context)
             image_context = f"\nImage analysis: {image_analysis}"
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", "Complaint: {query}{image_context}")
-        ])
-        
-        structured_llm = self.get_structured_llm(ComplaintAnalysis)
-        chain = prompt | structured_llm
-        
-        return await chain.ainvoke({"query": query, "image_context": image_context})
+        return await self.invoke_chain(self.analysis_chain, {"query": query, "image_context": image_context})
     
     async def _generate_response(self, query: str, analysis: ComplaintAnalysis, context: Dict[str, Any]) -> str:
         response_prompt = f"""
@@ -1,9 +1,40 @@
 # src/agents/coordinator.py
-from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from agents.base_agent import BaseAgent, AgentResponse
+from pydantic import BaseModel, Field, create_model
+from agents.base_agent import COALESCE_STAGES, AgentResponse, BaseAgent, stage_flight
+from agents.degraded import DegradedAnalyzer
+from agents.fast_router import FastRouter
+from agents.intent_index import StaticIntentIndex
+from agents.registry import AgentRegistry, agent_registry
+from agents.speculation import Speculator
+from tools.circuit_breaker import CircuitOpenError, llm_breaker
+from tools.groq_client import client_manager
+from tools.hedging import llm_hedger
+from tools.complaint_store import complaint_store
+from tools.image_index import image_index
+from tools.incident_tracker import incident_tracker
+from tools.image_preprocessor import image_preprocessor
+from tools.lost_found_store import lost_found_store
+from tools.rate_limiter import llm_limiter
+from utils.batching import MicroBatcher
+from utils.cache import result_cache, vision_cache
+from utils.deadline import DeadlineExceeded
 from utils.prompts import SystemPrompts
-from typing import Dict, Any
+from typing import Annotated, Dict, Any, List, Literal, Optional, Tuple, Type, Union
+import asyncio
+import os
+from collections import Counter
+
+# What we can still tell a student when the time budget runs out mid-request
+PARTIAL_GUIDANCE = {
+    "COMPLAINT": "Please report the issue at the hostel office or through the maintenance complaint form, noting your room/block and what is broken.",
+    "LOST_FOUND": "Check the lost & found box at reception and retrace the places you last had the item. Found items can be handed over at reception.",
+    "MESS": "Mess timings: Breakfast 7:00-9:00 AM, Lunch 12:00-2:00 PM, Dinner 7:00-9:00 PM. The weekly menu is on the mess notice board.",
+    "RULES": "Hostel policies are available from the hostel office and on the notice boards; the warden can clarify specific cases.",
+    "STATUS": "For current power, water or internet status, check the hostel notice board or call the hostel office.",
+    "GENERAL": "I can help with complaints, lost & found, mess queries, rules, and facility status.",
+}
+PARTIAL_HEADER = "⏳ I couldn't finish a full answer in time, but here's what I can tell you right now:\n\n"
+DEGRADED_HEADER = "ℹ️ I'm running in limited mode right now, so this answer is based on standard hostel information:\n\n"
 
 class QueryClassification(BaseModel):
     """Classification of student query for routing"""
@@ -21,34 +52,133 @@ class QueryClassification(BaseModel):
         description="Brief summary of the query for context"
     )
 
+class IndexedClassification(QueryClassification):
+    """Classification of one query in a batch"""
+    
+    index: int = Field(
+        description="Number of the query this classification is for"
+    )
+
+class BatchClassification(BaseModel):
+    """Classifications for a numbered batch of student queries"""
+    
+    classifications: List[IndexedClassification] = Field(
+        description="One classification per numbered query"
+    )
+
+def build_fused_schema(analysis_models: Dict[str, Optional[Type[BaseModel]]]) -> Type[BaseModel]:
+    """Discriminated union of route + route-specific analysis, one variant per agent.
+    
+    Each variant subclasses the specialist's analysis model, so the parsed
+    route can be handed to the specialist as its pre-computed analysis.
+    """
+    routing_fields = {
+        name: (field.annotation, field)
+        for name, field in QueryClassification.model_fields.items()
+        if name != "agent_type"
+    }
+    
+    variants = []
+    for agent_type, analysis_model in {**analysis_models, "GENERAL": None}.items():
+        variant_name = "".join(part.title() for part in agent_type.split("_")) + "Route"
+        variants.append(create_model(
+            variant_name,
+            __base__=analysis_model or BaseModel,
+            agent_type=(Literal[agent_type], Field(description=f"Route this query to {agent_type}")),
+            **routing_fields
+        ))
+    
+    route_type = variants[0] if len(variants) == 1 else Annotated[
+        Union[tuple(variants)], Field(discriminator="agent_type")
+    ]
+    return create_model(
+        "FusedRouting",
+        __doc__="Route for the student query plus the chosen specialist's analysis",
+        route=(route_type, ...)
+    )
+
 class CoordinatorAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, registry: Optional[AgentRegistry] = None, fused: Optional[bool] = None):
         super().__init__("Coordinator")
+        self.registry = registry if registry is not None else agent_registry
+        # Queries the local router is at least this confident about skip the LLM
+        threshold = float(os.getenv("FAST_ROUTER_THRESHOLD", "0.8"))
+        self.fast_router = FastRouter(threshold=threshold)
+        # Fused mode classifies and analyzes in a single structured LLM call
+        if fused is None:
+            fused = os.getenv("FUSED_ROUTING", "false").lower() in ("1", "true", "yes")
+        self.fused = fused
+        self._fused_schema = None
+        self._fused_schema_key = None
+        # Speculative mode analyzes the likeliest routes while classification runs
+        self.speculative = os.getenv("SPECULATIVE_ROUTING", "false").lower() in ("1", "true", "yes")
+        self.speculator = Speculator(
+            self.registry,
+            max_agents=int(os.getenv("SPECULATIVE_MAX_AGENTS", "1")),
+            min_score=float(os.getenv("SPECULATIVE_MIN_SCORE", "0.2"))
+        )
+        # Template-only intents (timings, menus, policies, schedules) skip the LLM entirely
+        self.intent_index = StaticIntentIndex(self.registry)
+        # While the LLM circuit breaker is open, keyword analyses feed the template handlers
+        self.degraded = DegradedAnalyzer()
+        self.degraded_responses = 0
+        self.vision_prefetch = Counter()
+        self.classification_chain = self.get_chain(QueryClassification, "Student query: {query}")
+        # Optionally classify concurrent queries together in one LLM call
+        self.batch_classification = os.getenv("CLASSIFY_BATCHING", "false").lower() in ("1", "true", "yes")
+        self.classification_batcher = MicroBatcher(
+            self._classify_batch,
+            window=float(os.getenv("CLASSIFY_BATCH_WINDOW_MS", "20")) / 1000,
+            max_batch=int(os.getenv("CLASSIFY_BATCH_MAX", "16")),
+            stage="classification"
+        )
+        self.batch_fallbacks = 0
+        self.batch_classification_chain = self.get_chain(
+            BatchClassification,
+            "Student queries:\n{queries}",
+            SystemPrompts.get_batch_classification_addendum()
+        )
     
     def get_system_prompt(self) -> str:
         return SystemPrompts.get_coordinator_prompt()
     
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
-        # Classify the query
-        classification = await self._classify_query(query)
+        # Static answers need no classification or analysis
+        if not context.get("image_data"):
+            static_response = await self.intent_index.resolve(query)
+            if static_response is not None:
+                return static_response
+            return await self._route_and_answer(query, context)
         
-        # Route to appropriate agent
-        if classification.agent_type == "COMPLAINT":
-            from src.agents.complaint_handler import ComplaintAgent
-            agent = ComplaintAgent()
-        elif classification.agent_type == "LOST_FOUND":
-            from src.agents.lost_found import LostFoundAgent
-            agent = LostFoundAgent()
-        elif classification.agent_type == "MESS":
-            from src.agents.mess_management import MessAgent
-            agent = MessAgent()
-        elif classification.agent_type == "RULES":
-            from src.agents.rules_policy import RulesAgent
-            agent = RulesAgent()
-        elif classification.agent_type == "STATUS":
-            from src.agents.status_updates import StatusAgent
-            agent = StatusAgent()
-        else:
+        # Start vision now so it overlaps classification; the chosen specialist awaits the same task
+        vision = asyncio.ensure_future(self.analyze_image(context["image_data"], SystemPrompts.get_vision_analysis_prompt()))
+        self.vision_prefetch["started"] += 1
+        try:
+            return await self._route_and_answer(query, {**context, "image_analysis": vision})
+        finally:
+            if vision.done():
+                self.vision_prefetch["completed"] += 1
+                if not vision.cancelled():
+                    # Retrieved so a failure of an analysis nobody awaited is not logged as unhandled
+                    vision.exception()
+            else:
+                # Unused (e.g. routed to rules or status); an already-sent call still lands in the vision cache
+                self.vision_prefetch["discarded"] += 1
+                vision.cancel()
+    
+    async def _route_and_answer(self, query: str, context: Dict[str, Any]) -> AgentResponse:
+        # Classify the query (fused mode also returns the specialist's analysis)
+        try:
+            classification, analysis = await self._route_query(query, context)
+        except DeadlineExceeded:
+            return self._partial_response(query)
+        except CircuitOpenError:
+            return await self._degraded_response(query, context)
+        await self._notify_classified(context, classification)
+        
+        # Route to the long-lived specialist for this classification
+        agent = self.registry.get(classification.agent_type)
+        if agent is None:
             return AgentResponse(
                 content="Hello! I'm HostelBuddy, your AI assistant for hostel matters. I can help with complaints, lost & found, mess queries, rules, and facility status. What do you need assistance with?",
                 urgency="low"
@@ -61,16 +191,204 @@ class CoordinatorAgent(BaseAgent):
             "safety_concern": classification.has_safety_concern == "Yes",
             "summary": classification.brief_summary
         }
+        if analysis is not None:
+            enhanced_context["analysis"] = analysis
         
-        return await agent.process_query(query, enhanced_context)
+        try:
+            return await agent.process_query(query, enhanced_context)
+        except DeadlineExceeded:
+            return self._partial_response(query, classification)
+        except CircuitOpenError:
+            return await self._degraded_response(query, context, classification)
+    
+    async def _degraded_response(self, query: str, context: Dict[str, Any],
+                                 classification: Optional[QueryClassification] = None) -> AgentResponse:
+        """Answer without the LLM: fast-router route, keyword analysis, template handlers"""
+        self.degraded_responses += 1
+        if classification is None:
+            classification, _ = self.fast_router.classify(query)
+            await self._notify_classified(context, classification)
+        
+        agent = self.registry.get(classification.agent_type)
+        analysis = None
+        if agent is not None:
+            analysis = self.degraded.analyze(
+                classification.agent_type,
+                agent.analysis_model,
+                query,
+                urgency=classification.urgency,
+                safety_concern=classification.has_safety_concern == "Yes"
+            )
+        if analysis is None:
+            return self._partial_response(query, classification, header=DEGRADED_HEADER)
+        
+        degraded_context = {
+            **context,
+            "urgency": classification.urgency,
+            "safety_concern": classification.has_safety_concern == "Yes",
+            "summary": classification.brief_summary,
+            "analysis": analysis
+        }
+        try:
+            response = await agent.process_query(query, degraded_context)
+        except (CircuitOpenError, DeadlineExceeded):
+            return self._partial_response(query, classification, header=DEGRADED_HEADER)
+        
+        response.content = DEGRADED_HEADER + response.content
+        response.confidence = min(response.confidence, 0.6)
+        return response
+    
+    @staticmethod
+    async def _notify_classified(context: Dict[str, Any], classification: QueryClassification) -> None:
+        """Let a streaming caller send urgency and safety advice before the specialist runs"""
+        on_classified = context.get("on_classified")
+        if on_classified is not None:
+            await on_classified(classification)
+    
+    def _partial_response(self, query: str, classification: Optional[QueryClassification] = None,
+                          header: str = PARTIAL_HEADER) -> AgentResponse:
+        """Best-effort answer when the request's time budget is exhausted (or the LLM is unavailable)"""
+        if classification is None:
+            classification, _ = self.fast_router.classify(query)
+        content = header
+        content += PARTIAL_GUIDANCE.get(classification.agent_type, PARTIAL_GUIDANCE["GENERAL"])
+        if classification.has_safety_concern == "Yes":
+            content += "\n\n⚠️ This may be a safety issue - stay away from the hazard and contact the hostel office or security right away."
+        
+        return AgentResponse(
+            content=content,
+            next_steps=["Ask again in a minute for a complete answer", "Contact the hostel office if it's urgent"],
+            urgency=classification.urgency,
+            confidence=0.4
+        )
+    
+    async def _route_query(self, query: str, context: Optional[Dict[str, Any]] = None) -> Tuple[QueryClassification, Optional[BaseModel]]:
+        """Route locally when confident, otherwise fall back to the LLM classifier"""
+        classification, confidence = self.fast_router.classify(query)
+        if confidence >= self.fast_router.threshold:
+            self.fast_router.record("local", classification, confidence)
+            return classification, None
+        
+        local_guess = classification.agent_type
+        context = context or {}
+        if COALESCE_STAGES and not context.get("image_data"):
+            # Only routing is shared: every caller still runs its own specialist (tickets, reports)
+            classification, analysis = await self.run_shared(
+                "classification", result_cache.make_key(query), lambda: self._llm_route(query, context)
+            )
+        else:
+            classification, analysis = await self._llm_route(query, context)
+        self.fast_router.record("llm", classification, confidence, local_guess)
+        return classification, analysis
+    
+    async def _llm_route(self, query: str, context: Dict[str, Any]) -> Tuple[QueryClassification, Optional[BaseModel]]:
+        if self.fused:
+            return await self._classify_and_analyze(query, context)
+        if self.speculative:
+            return await self._classify_speculatively(query, context)
+        return await self._classify_query(query), None
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Runtime counters exposed through the hostel_metrics admin tool"""
+        return {
+            "routing": self.fast_router.stats(),
+            "static_intents": self.intent_index.stats(),
+            "speculation": self.speculator.stats(),
+            "cache": result_cache.stats(),
+            "coalescing": stage_flight.stats(),
+            "llm_clients": client_manager.stats(),
+            "llm_admission": llm_limiter.stats(),
+            "hedging": llm_hedger.stats(),
+            "circuit_breaker": {**llm_breaker.stats(), "degraded_responses": self.degraded_responses},
+            "classification_batching": {
+                "enabled": self.batch_classification,
+                **self.classification_batcher.stats(),
+                "fallbacks": self.batch_fallbacks
+            },
+            "image_preprocessing": image_preprocessor.stats(),
+            "vision_cache": vision_cache.stats(),
+            "vision_prefetch": dict(self.vision_prefetch),
+            "image_index": image_index.stats(),
+            "lost_found_store": lost_found_store.stats(),
+            "complaint_store": complaint_store.stats(),
+            "incidents": incident_tracker.stats()
+        }
+    
+    async def _classify_speculatively(self, query: str, context: Dict[str, Any]) -> Tuple[QueryClassification, Optional[BaseModel]]:
+        """Classify with the LLM while the fast router's top guesses start their analysis"""
+        tasks = self.speculator.start(query, context, self.fast_router.rank(query))
+        try:
+            classification = await self._classify_query(query)
+        except BaseException:
+            self.speculator.cancel(tasks)
+            raise
+        analysis = await self.speculator.resolve(tasks, classification.agent_type)
+        return classification, analysis
     
     async def _classify_query(self, query: str) -> QueryClassification:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", "Student query: {query}")
-        ])
+        key = result_cache.make_key(query)
+        classification = result_cache.get("QueryClassification", key)
+        if classification is None:
+            classification = await self._classify_with_llm(query)
+            result_cache.set("QueryClassification", key, classification)
+        return classification
+    
+    async def _classify_with_llm(self, query: str) -> QueryClassification:
+        if self.batch_classification:
+            return await self.classification_batcher.submit(query)
+        return await self.invoke_chain(self.classification_chain, {"query": query}, stage="classification")
+    
+    async def _classify_batch(self, queries: List[str]) -> List[Union[QueryClassification, Exception]]:
+        """Classify a micro-batch in one call; queries the LLM skipped are classified on their own"""
+        if len(queries) == 1:
+            return [await self.invoke_chain(self.classification_chain, {"query": queries[0]}, stage="classification")]
+        
+        numbered = "\n".join(f"{i}. {' '.join(query.split())}" for i, query in enumerate(queries, 1))
+        batch = await self.invoke_chain(self.batch_classification_chain, {"queries": numbered}, stage="classification")
+        by_index = {
+            item.index: QueryClassification(**item.model_dump(exclude={"index"}))
+            for item in batch.classifications
+        }
         
-        structured_llm = self.get_structured_llm(QueryClassification)
-        chain = prompt | structured_llm
+        missing = [i for i in range(1, len(queries) + 1) if i not in by_index]
+        if missing:
+            self.batch_fallbacks += len(missing)
+            singles = await asyncio.gather(*(
+                self.invoke_chain(self.classification_chain, {"query": queries[i - 1]}, stage="classification")
+                for i in missing
+            ), return_exceptions=True)
+            by_index.update(zip(missing, singles))
+        return [by_index[i] for i in range(1, len(queries) + 1)]
+    
+    def get_fused_schema(self) -> Type[BaseModel]:
+        """Fused routing schema for the currently registered agents"""
+        key = tuple(self.registry.agent_types)
+        if self._fused_schema is None or self._fused_schema_key != key:
+            self._fused_schema = build_fused_schema({
+                agent_type: self.registry.get(agent_type).analysis_model
+                for agent_type in key
+            })
+            self._fused_schema_key = key
+        return self._fused_schema
+    
+    async def _classify_and_analyze(self, query: str, context: Dict[str, Any]) -> Tuple[QueryClassification, Optional[BaseModel]]:
+        """Route and analyze in one round trip instead of classify-then-analyze"""
+        image_context = ""
+        if context.get("image_data"):
+            image_analysis = await self.describe_image(context)
+            image_context = f"\nImage analysis: {image_analysis}"
         
-        return await chain.ainvoke({"query": query})
\ No newline at end of file
+        chain = self.get_chain(
+            self.get_fused_schema(),
+            "Student query: {query}{image_context}",
+            SystemPrompts.get_fused_routing_addendum()
+        )
+        route = (await self.invoke_chain(chain, {"query": query, "image_context": image_context}, stage="classification")).route
+        classification = QueryClassification(
+            agent_type=route.agent_type,
+            urgency=route.urgency,
+            has_safety_concern=route.has_safety_concern,
+            brief_summary=route.brief_summary
+        )
+        analysis = route if route.agent_type != "GENERAL" else None
+        return classification, analysis
\ No newline at end of file
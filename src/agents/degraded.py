@@ -0,0 +1,215 @@
+# src/agents/degraded.py
+import re
+from typing import Callable, Dict, List, Optional
+from pydantic import BaseModel
+from agents.intent_index import FACILITY_TYPES, MEAL_TYPES, MENU_WORDS, POLICY_CATEGORIES, TIMING_WORDS, _slot
+from utils.validators import QueryValidator
+
+# Keyword fallbacks for the fields the LLM would normally fill in
+ISSUE_TYPES = {
+    "electrical": ["fan", "light", "tube", "bulb", "switch", "socket", "plug", "wire", "wiring", "power", "ac", "geyser", "heater", "spark", "shock"],
+    "plumbing": ["tap", "leak", "leaking", "water", "toilet", "flush", "shower", "drain", "pipe", "basin", "sink", "clog", "blocked"],
+    "furniture": ["bed", "chair", "table", "desk", "cupboard", "wardrobe", "almirah", "shelf", "mattress", "door", "lock", "window"],
+    "internet": ["wifi", "wi fi", "internet", "lan", "network", "router"],
+    "room": ["dirty", "clean", "cleaning", "pest", "cockroach", "rat", "bedbug", "mosquito", "smell", "ventilation", "damp", "paint"],
+}
+TEMPORARY_SOLUTIONS = {
+    "electrical": "Switch off the appliance at the mains and don't touch exposed wiring until it's checked.",
+    "plumbing": "Close the nearest water valve if possible and keep the floor dry to avoid slipping.",
+    "furniture": "Avoid using the damaged item and keep valuables locked elsewhere if a lock or door is affected.",
+    "internet": "Try reconnecting or restarting your device; use the common room connection meanwhile.",
+    "room": "Keep the room ventilated and food sealed until housekeeping attends to it.",
+    "general": "Keep the area safe and note down details for the maintenance team.",
+}
+SEVERITY_BY_URGENCY = {"urgent": "critical", "high": "major", "medium": "moderate", "low": "minor"}
+RESOLUTION_BY_SEVERITY = {"critical": "hours", "major": "1-2 days", "moderate": "3-5 days", "minor": "3-5 days"}
+
+ITEM_CATEGORIES = {
+    "electronics": ["phone", "mobile", "laptop", "charger", "earphone", "earphones", "headphone", "headphones", "earbuds", "calculator", "watch", "tablet", "power bank"],
+    "documents": ["id card", "id", "aadhar", "passport", "certificate", "document", "documents", "marksheet", "license"],
+    "keys": ["key", "keys", "keychain"],
+    "books": ["book", "books", "notebook", "notes", "textbook"],
+    "clothing": ["shirt", "jacket", "hoodie", "sweater", "shoe", "shoes", "slipper", "towel", "cap", "jeans"],
+    "accessories": ["wallet", "purse", "bag", "bottle", "umbrella", "glasses", "spectacles", "ring", "chain", "bracelet"],
+}
+SEARCH_AREAS = {
+    "electronics": "study room, common room, library, your classroom",
+    "documents": "reception, hostel office, photocopy shop, your desk drawers",
+    "keys": "room door, reception key rack, bathroom, common room",
+    "books": "library, study room, classroom, mess",
+    "clothing": "laundry area, drying lines, bathroom, gym",
+    "accessories": "mess, common room, library, reception",
+    "other": "reception lost & found box, common room, mess",
+}
+TIME_REFERENCES = {
+    "today": ["today", "this morning", "this afternoon", "this evening", "tonight", "just now", "an hour ago"],
+    "yesterday": ["yesterday", "last night"],
+    "this week": ["this week", "few days", "couple of days", "two days", "2 days", "monday", "tuesday",
+                  "wednesday", "thursday", "friday", "saturday", "sunday"],
+    "earlier": ["last week", "last month", "weeks ago", "a week ago", "month ago"],
+}
+FOUND_WORDS = ["found", "picked up", "someone left", "lying"]
+LOST_WORDS = ["lost", "missing", "misplaced", "stolen", "cant find", "can t find", "cannot find", "left behind"]
+
+MESS_COMPLAINT_WORDS = ["bad", "stale", "cold", "hair", "insect", "worst", "rude", "dirty", "raw", "undercooked", "complain", "complaint"]
+MESS_HEALTH_WORDS = ["sick", "poison", "vomit", "vomiting", "stomach", "diarrhea", "allergic reaction", "food poisoning"]
+MESS_DIET_WORDS = ["diet", "jain", "vegan", "halal", "allergy", "allergic", "gluten", "diabetic"]
+MESS_FEEDBACK_WORDS = ["feedback", "suggest", "suggestion", "improve", "request"]
+
+RULES_PROCEDURE_WORDS = ["how do i", "how to", "how can i", "procedure", "steps", "apply", "process"]
+RULES_VIOLATION_WORDS = ["violate", "violated", "violation", "caught", "fined", "penalty", "accused", "warning", "punish"]
+RULES_CLARIFY_WORDS = ["can i", "am i allowed", "is it allowed", "what if", "exception"]
+
+STATUS_OUTAGE_WORDS = ["not working", "down", "gone", "cut", "outage", "no water", "no power", "no internet", "since"]
+STATUS_SCHEDULE_WORDS = ["maintenance", "shutdown", "scheduled", "planned", "servicing"]
+STATUS_CURRENT_WORDS = ["is there", "status", "right now", "now", "working", "back", "available"]
+BLOCK_PATTERN = re.compile(r"\b(block|wing|building|floor) ([a-z0-9]+)\b")
+
+
+def _pattern(words: List[str]) -> re.Pattern:
+    # Whole words only: short keywords like "ac" or "id" must not match inside other words
+    return re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")\b")
+
+
+class DegradedAnalyzer:
+    """Keyword-only stand-ins for the specialists' LLM analyses.
+
+    Used while the LLM circuit breaker is open: the fast router picks the
+    agent and these heuristics fill in its analysis model, so the agent's
+    template handlers (forms, timings, policies, search tips) still produce
+    a useful answer without any LLM call.
+    """
+
+    def __init__(self):
+        self._issues = {value: _pattern(words) for value, words in ISSUE_TYPES.items()}
+        self._items = {value: _pattern(words) for value, words in ITEM_CATEGORIES.items()}
+        self._meals = {value: _pattern(words) for value, words in MEAL_TYPES.items()}
+        self._policies = {value: _pattern(words) for value, words in POLICY_CATEGORIES.items()}
+        self._facilities = {value: _pattern(words) for value, words in FACILITY_TYPES.items()}
+        self._found = _pattern(FOUND_WORDS)
+        self._times = {value: _pattern(words) for value, words in TIME_REFERENCES.items()}
+        self._lost = _pattern(LOST_WORDS)
+        self._mess_complaint = _pattern(MESS_COMPLAINT_WORDS)
+        self._mess_health = _pattern(MESS_HEALTH_WORDS)
+        self._mess_diet = _pattern(MESS_DIET_WORDS)
+        self._mess_feedback = _pattern(MESS_FEEDBACK_WORDS)
+        self._menu = _pattern(MENU_WORDS)
+        self._timing = _pattern(TIMING_WORDS)
+        self._rules_procedure = _pattern(RULES_PROCEDURE_WORDS)
+        self._rules_violation = _pattern(RULES_VIOLATION_WORDS)
+        self._rules_clarify = _pattern(RULES_CLARIFY_WORDS)
+        self._status_outage = _pattern(STATUS_OUTAGE_WORDS)
+        self._status_schedule = _pattern(STATUS_SCHEDULE_WORDS)
+        self._status_current = _pattern(STATUS_CURRENT_WORDS)
+
+        self._builders: Dict[str, Callable[[str, str, bool], dict]] = {
+            "COMPLAINT": self._complaint,
+            "LOST_FOUND": self._lost_found,
+            "MESS": self._mess,
+            "RULES": self._rules,
+            "STATUS": self._status,
+        }
+
+    def analyze(self, agent_type: str, analysis_model: type, query: str, urgency: str = "medium",
+                safety_concern: bool = False) -> Optional[BaseModel]:
+        """Build ``analysis_model`` for ``agent_type`` from keywords, or None if unsupported"""
+        fields = self.fields(agent_type, query, urgency, safety_concern)
+        if fields is None or analysis_model is None:
+            return None
+        return analysis_model(**fields)
+
+    def fields(self, agent_type: str, query: str, urgency: str = "medium",
+               safety_concern: bool = False) -> Optional[Dict[str, str]]:
+        """Keyword analysis fields for ``agent_type``, or None if unsupported"""
+        builder = self._builders.get(agent_type)
+        if builder is None:
+            return None
+        return builder(QueryValidator.normalize_query(query), urgency, safety_concern)
+
+    @staticmethod
+    def _first(text: str, patterns: dict, default: str) -> str:
+        for value, pattern in patterns.items():
+            if pattern.search(text):
+                return value
+        return default
+
+    def _complaint(self, text: str, urgency: str, safety_concern: bool) -> dict:
+        issue_type = self._first(text, self._issues, "general")
+        severity = "critical" if safety_concern else SEVERITY_BY_URGENCY.get(urgency, "moderate")
+        return {
+            "issue_type": issue_type,
+            "severity": severity,
+            "immediate_action_needed": "Yes" if severity == "critical" else "No",
+            "temporary_solution": TEMPORARY_SOLUTIONS[issue_type],
+            "estimated_resolution": RESOLUTION_BY_SEVERITY[severity],
+        }
+
+    def _lost_found(self, text: str, urgency: str, safety_concern: bool) -> dict:
+        category = self._first(text, self._items, "other")
+        found = bool(self._found.search(text)) and not self._lost.search(text)
+        return {
+            "item_category": category,
+            "is_lost_item": "No" if found else "Yes",
+            "is_found_item": "Yes" if found else "No",
+            "urgency_level": "high" if category in ("electronics", "documents", "keys") else "medium",
+            "suggested_search_areas": SEARCH_AREAS[category],
+            "time_reference": self._first(text, self._times, "unknown"),
+        }
+
+    def _mess(self, text: str, urgency: str, safety_concern: bool) -> dict:
+        meal, _ = _slot(text, self._meals)
+        if self._mess_health.search(text):
+            query_type, concern = "complaint", "health_concern"
+        elif self._mess_complaint.search(text):
+            query_type, concern = "complaint", "major_complaint" if urgency in ("high", "urgent") else "minor_issue"
+        elif self._mess_diet.search(text):
+            query_type, concern = "dietary_request", "info_request"
+        elif self._mess_feedback.search(text):
+            query_type, concern = "feedback", "minor_issue"
+        elif self._menu.search(text):
+            query_type, concern = "menu_inquiry", "info_request"
+        elif self._timing.search(text):
+            query_type, concern = "timing_question", "info_request"
+        else:
+            query_type, concern = "general", "info_request"
+        return {
+            "query_type": query_type,
+            "meal_type": meal or "all",
+            "concern_level": concern,
+            "requires_immediate_attention": "Yes" if concern == "health_concern" or safety_concern else "No",
+        }
+
+    def _rules(self, text: str, urgency: str, safety_concern: bool) -> dict:
+        category = self._first(text, self._policies, "general")
+        if self._rules_violation.search(text):
+            intent = "violation_concern"
+        elif self._rules_procedure.search(text):
+            intent = "procedure_help"
+        elif self._rules_clarify.search(text):
+            intent = "clarification_needed"
+        else:
+            intent = "information_request"
+        return {
+            "policy_category": category,
+            "query_intent": intent,
+            "urgency_level": "high" if intent == "violation_concern" or category == "emergency" else "low",
+            "specific_situation": text[:200],
+        }
+
+    def _status(self, text: str, urgency: str, safety_concern: bool) -> dict:
+        facility = self._first(text, self._facilities, "general")
+        if self._status_schedule.search(text):
+            scope = "scheduled_maintenance"
+        elif self._status_outage.search(text):
+            scope = "outage_report"
+        elif self._status_current.search(text):
+            scope = "current_status"
+        else:
+            scope = "general_info"
+        block = BLOCK_PATTERN.search(text)
+        return {
+            "facility_type": facility,
+            "query_scope": scope,
+            "location_specific": f"{block.group(1).title()} {block.group(2).upper()}" if block else "general",
+            "urgency_indicator": "emergency_situation" if safety_concern else "service_needed" if scope == "outage_report" else "routine_check",
+        }
@@ -0,0 +1,192 @@
+# src/agents/fast_router.py
+import re
+import zlib
+from collections import Counter, deque
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from utils.validators import QueryValidator
+
+# Seed phrases per route, expanded from the categories in
+# SystemPrompts.get_coordinator_prompt and common student traffic.
+TRAINING_PHRASES: Dict[str, List[str]] = {
+    "COMPLAINT": [
+        "fan not working", "light not working", "tube light broken", "switch board sparking",
+        "socket not working", "ac not cooling", "geyser not working", "tap leaking",
+        "shower broken", "toilet blocked", "flush not working", "water leaking from ceiling",
+        "drain clogged", "bed broken", "chair broken", "table damaged", "door lock broken",
+        "window glass cracked", "cupboard hinge broken", "room is dirty", "cockroaches in room",
+        "pests in my room", "bathroom not cleaned", "repair needed in my room", "maintenance request",
+        "wifi very slow in my room", "lan port not working", "internet keeps disconnecting in my room",
+        "exposed wire in room", "broken furniture", "need electrician", "need plumber",
+        "mattress torn", "ceiling fan making noise", "damp walls in room",
+    ],
+    "LOST_FOUND": [
+        "i lost my phone", "lost my wallet", "lost my id card", "lost my keys", "missing laptop",
+        "cannot find my charger", "lost earphones", "lost my watch", "lost bag in mess",
+        "left my bottle in library", "i found a wallet", "found someone's phone", "found keys near gate",
+        "found an id card", "someone left their bag", "misplaced my notebook", "stolen cycle",
+        "lost and found", "has anyone seen my jacket", "found earphones in common room",
+    ],
+    "MESS": [
+        "what's for lunch", "what is for dinner today", "breakfast menu", "today's menu",
+        "mess timings", "when does mess open", "dinner time", "lunch timing", "food quality is poor",
+        "food was cold", "hair in food", "food poisoning after dinner", "mess food is bad",
+        "special diet", "jain food", "vegan meal", "allergy to peanuts", "mess feedback",
+        "mess staff rude", "snacks in evening", "weekly menu", "sunday special meal",
+        "late dinner after mess hours",
+    ],
+    "RULES": [
+        "visiting hours", "can my parents stay overnight", "visitor policy", "guest rules",
+        "curfew time", "what time does the gate close", "late entry permission", "hostel rules",
+        "fee payment due date", "late fee penalty", "refund policy", "room transfer procedure",
+        "change my room", "disciplinary action", "warning for violation", "appeal process",
+        "fire drill procedure", "emergency evacuation", "is cooking allowed in room",
+        "can i keep a pet", "policy on guests", "out pass", "leave application",
+    ],
+    "STATUS": [
+        "is there a power cut", "power outage in block", "electricity gone in hostel",
+        "when will power come back", "water supply status", "no water in block",
+        "water cut today", "wifi down", "internet down in hostel", "is wifi working",
+        "network outage", "scheduled maintenance", "when is the next maintenance",
+        "maintenance schedule", "generator status", "current status of water",
+        "is internet back", "outage update", "power shutdown tomorrow",
+    ],
+    "GENERAL": [
+        "hi", "hey there", "good morning", "what can you do", "what can you help me with",
+        "who are you", "help", "thanks", "thank you", "how does this work", "ok",
+    ],
+}
+
+SAFETY_KEYWORDS = [
+    "spark", "sparking", "smoke", "fire", "burning", "gas leak", "shock", "exposed wire",
+    "short circuit", "flood", "collapse", "crack in wall", "intruder", "unsafe", "contaminated",
+    "food poisoning",
+]
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "my", "i", "me", "in", "on", "at", "of", "to", "for",
+    "it", "its", "and", "or", "this", "that", "there", "be", "was", "with", "from", "please",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def _features(text: str) -> List[str]:
+    # Apostrophes are dropped to match QueryValidator's sanitized_query
+    text = text.lower().replace("'", "")
+    words = [_stem(w) for w in _TOKEN_RE.findall(text) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class FastRouter:
+    """Zero-LLM keyword/n-gram router for plainly worded queries.
+
+    Unigram and bigram features are hashed into a fixed-width vector and
+    compared against per-route centroids built from TRAINING_PHRASES. The
+    softmax of the cosine scores is used as the routing confidence.
+    """
+
+    def __init__(self, threshold: float = 0.8, dims: int = 4096, temperature: float = 0.06,
+                 training_phrases: Dict[str, List[str]] = TRAINING_PHRASES):
+        self.threshold = threshold
+        self.dims = dims
+        self.temperature = temperature
+        self.labels = list(training_phrases)
+
+        counts = np.zeros((len(self.labels), dims), dtype=np.float32)
+        for row, label in enumerate(self.labels):
+            for phrase in training_phrases[label]:
+                for index in self._hash(_features(phrase)):
+                    counts[row, index] += 1.0
+
+        # Down-weight features shared across routes, then L2-normalise rows
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = np.log1p(len(self.labels) / np.maximum(document_frequency, 1)).astype(np.float32)
+        centroids = np.log1p(counts) * self.idf
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.maximum(norms, 1e-9)
+
+        self.decisions = Counter()
+        self.routes = Counter()
+        self.agreement = Counter()
+        self.recent = deque(maxlen=100)
+
+    def _hash(self, features: List[str]) -> List[int]:
+        return [zlib.crc32(feature.encode()) % self.dims for feature in features]
+
+    def scores(self, query: str) -> np.ndarray:
+        """Route probabilities for a query, in the order of self.labels"""
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for index in self._hash(_features(query)):
+            vector[index] += 1.0
+        vector = np.log1p(vector) * self.idf
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return np.full(len(self.labels), 1.0 / len(self.labels))
+
+        similarities = self.centroids @ (vector / norm)
+        logits = similarities / self.temperature
+        weights = np.exp(logits - logits.max())
+        return weights / weights.sum()
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """All routes ordered by likelihood"""
+        probabilities = self.scores(query)
+        order = np.argsort(probabilities)[::-1]
+        return [(self.labels[i], float(probabilities[i])) for i in order]
+
+    def classify(self, query: str):
+        """Return (QueryClassification, confidence) without calling the LLM"""
+        from agents.coordinator import QueryClassification
+
+        agent_type, confidence = self.rank(query)[0]
+        query_lower = query.lower()
+        has_safety = any(keyword in query_lower for keyword in SAFETY_KEYWORDS)
+        urgency = "urgent" if has_safety else QueryValidator.extract_urgency_keywords(query)
+        if agent_type in ("GENERAL", "RULES") and urgency == "medium":
+            urgency = "low"
+
+        classification = QueryClassification(
+            agent_type=agent_type,
+            urgency=urgency,
+            has_safety_concern="Yes" if has_safety else "No",
+            brief_summary=query[:120],
+        )
+        return classification, confidence
+
+    def record(self, source: str, classification, confidence: float, local_guess: str = None) -> None:
+        """Track a routing decision made locally ("local") or by the LLM ("llm")"""
+        self.decisions[source] += 1
+        self.routes[classification.agent_type] += 1
+        if source == "llm" and local_guess is not None:
+            bucket = f"{min(int(confidence * 10), 9) / 10:.1f}"
+            self.agreement[(bucket, local_guess == classification.agent_type)] += 1
+        self.recent.append({
+            "source": source,
+            "agent_type": classification.agent_type,
+            "confidence": round(confidence, 3),
+            "local_guess": local_guess or classification.agent_type,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.decisions.values())
+        buckets: Dict[str, Dict[str, int]] = {}
+        for (bucket, agreed), count in sorted(self.agreement.items()):
+            entry = buckets.setdefault(bucket, {"llm_calls": 0, "local_agreed": 0})
+            entry["llm_calls"] += count
+            if agreed:
+                entry["local_agreed"] += count
+        return {
+            "threshold": self.threshold,
+            "total": total,
+            "local": self.decisions["local"],
+            "llm": self.decisions["llm"],
+            "local_hit_rate": round(self.decisions["local"] / total, 3) if total else 0.0,
+            "routes": dict(self.routes),
+            "llm_agreement_by_confidence": buckets,
+            "recent": list(self.recent)[-20:],
+        }
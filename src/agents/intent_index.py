@@ -0,0 +1,227 @@
+# src/agents/intent_index.py
+import re
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from agents.base_agent import AgentResponse, BaseAgent
+from agents.fast_router import SAFETY_KEYWORDS
+from agents.registry import AgentRegistry
+from utils.validators import QueryValidator
+
+# Slot vocabularies: slot value -> words that name it unambiguously
+MEAL_TYPES = {
+    "breakfast": ["breakfast", "nashta"],
+    "lunch": ["lunch"],
+    "dinner": ["dinner", "supper"],
+}
+POLICY_CATEGORIES = {
+    "visitor": ["visitor", "visitors", "visiting", "guest", "guests"],
+    "curfew": ["curfew", "gate close", "gate closes", "gate closing", "late entry", "in time", "entry time"],
+    "fees": ["fee", "fees", "rent", "refund", "payment", "due date"],
+    "room": ["room transfer", "room change", "change room", "room allocation", "roommate"],
+    "discipline": ["discipline", "disciplinary", "penalty", "penalties"],
+    # Bare "emergency" or "fire alarm" reads as a report of one; only evacuation planning is static
+    "emergency": ["evacuation", "evacuation plan", "assembly point"],
+}
+FACILITY_TYPES = {
+    "power": ["power", "electricity", "electrical", "generator"],
+    "water": ["water", "pump", "tank"],
+    "internet": ["internet", "wifi", "wi fi", "network", "lan"],
+}
+
+# Words that mean the student needs more than the static answer
+# Possible hazards or threats: classification sets urgency and adds safety advice
+SAFETY_EXCLUSIONS = SAFETY_KEYWORDS + [
+    "fire", "fires", "smoke", "smoking", "shock", "shocks", "threat", "threats", "threaten", "threatened",
+    "threatening", "harass", "harassed", "harassing", "harassment", "leak", "leaks", "leaking", "leakage",
+    "flooded", "flooding", "right now", "help me",
+]
+MESS_EXCLUSIONS = [
+    "bad", "poor", "cold", "stale", "hair", "insect", "sick", "poison", "complain", "complaint",
+    "worst", "rude", "dirty", "diet", "jain", "vegan", "halal", "allergy", "allergic",
+    "feedback", "suggest", "not",
+]
+RULES_EXCLUSIONS = [
+    "how do i", "how to", "how can i", "procedure", "steps", "apply", "process", "violate", "violated",
+    "violating", "violation", "violations", "caught",
+    "fined", "report", "accused", "what if", "exception", "can i", "am i allowed", "is it allowed",
+]
+STATUS_EXCLUSIONS = ["not working", "down", "gone", "cut", "outage", "no water", "no power", "now", "right now"]
+
+MENU_WORDS = ["menu", "whats for", "what is for", "serving", "served", "special today"]
+TIMING_WORDS = ["timing", "timings", "time", "when", "open", "opens", "close", "closes", "hours"]
+MESS_WORDS = ["mess", "meal", "meals", "food", "canteen", "menu"]
+RULES_WORDS = ["rule", "rules", "policy", "policies", "what", "when", "timing", "time", "allowed", "hours", "due"]
+SCHEDULE_WORDS = ["maintenance", "shutdown", "scheduled", "planned", "servicing"]
+MESS_GENERAL = re.compile(r"^((tell me|info|information|help) (about|with|on) )?(the )?mess( info| information| help| services| queries)?$")
+
+
+def _pattern(words: List[str]) -> re.Pattern:
+    return re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")\b")
+
+
+def _slot(text: str, patterns: Dict[str, re.Pattern]) -> Tuple[Optional[str], int]:
+    """Return (value, number of distinct values mentioned)"""
+    found = [value for value, pattern in patterns.items() if pattern.search(text)]
+    return (found[0] if len(found) == 1 else None), len(found)
+
+
+class StaticIntentIndex:
+    """Resolve template-only intents locally and serve pre-rendered answers.
+
+    Covers mess timings/menus/overview, general policy information and maintenance
+    schedules, whose answers come straight from config/hostel_data. A query
+    is only answered here when every slot the template needs (meal type,
+    policy category, facility type) is named unambiguously and nothing in
+    the query asks for more than the static answer; otherwise ``resolve``
+    returns None and the normal LLM pipeline runs.
+    """
+
+    def __init__(self, registry: AgentRegistry):
+        self.registry = registry
+        self._meals = {value: _pattern(words) for value, words in MEAL_TYPES.items()}
+        self._policies = {value: _pattern(words) for value, words in POLICY_CATEGORIES.items()}
+        self._facilities = {value: _pattern(words) for value, words in FACILITY_TYPES.items()}
+        self._mess_exclusions = _pattern(MESS_EXCLUSIONS)
+        self._rules_exclusions = _pattern(RULES_EXCLUSIONS)
+        self._status_exclusions = _pattern(STATUS_EXCLUSIONS)
+        self._safety_exclusions = _pattern(SAFETY_EXCLUSIONS)
+        self._menu = _pattern(MENU_WORDS)
+        self._timing = _pattern(TIMING_WORDS)
+        self._mess = _pattern(MESS_WORDS)
+        self._rules = _pattern(RULES_WORDS)
+        self._schedule = _pattern(SCHEDULE_WORDS)
+
+        self._rendered: Dict[Tuple[str, str], AgentResponse] = {}
+        self.hits = Counter()
+        self.misses = 0
+        self.safety_skips = 0
+
+    def match(self, query: str) -> Optional[Tuple[str, str]]:
+        """Return (intent, slot value) when the query is unambiguously static"""
+        text = QueryValidator.normalize_query(query)
+        # A possible emergency is never answered from a template: it needs urgency and safety advice
+        if self._safety_exclusions.search(text) or QueryValidator.extract_urgency_keywords(text) in ("urgent", "high"):
+            self.safety_skips += 1
+            return None
+        meal, meal_count = _slot(text, self._meals)
+
+        if not self._mess_exclusions.search(text) and (meal_count or self._mess.search(text)):
+            if self._menu.search(text) and meal_count <= 1:
+                return "mess_menu", meal or "all"
+            if self._timing.search(text):
+                return "mess_timing", "all"
+            if MESS_GENERAL.match(text):
+                return "mess_general", "all"
+
+        category, _ = _slot(text, self._policies)
+        if category and self._rules.search(text) and not self._rules_exclusions.search(text) and not meal_count:
+            return "rules_information", category
+
+        facility, _ = _slot(text, self._facilities)
+        if facility and self._schedule.search(text) and not self._status_exclusions.search(text):
+            return "maintenance_schedule", facility
+
+        return None
+
+    async def resolve(self, query: str) -> Optional[AgentResponse]:
+        """Pre-rendered answer for a static intent, or None"""
+        matched = self.match(query)
+        if matched is None:
+            self.misses += 1
+            return None
+
+        response = self._rendered.get(matched)
+        if response is None:
+            response = await self._render(*matched)
+            if response is None:
+                self.misses += 1
+                return None
+            self._rendered[matched] = response
+
+        self.hits[matched[0]] += 1
+        return response.model_copy(deep=True)
+
+    async def warm_up(self) -> int:
+        """Render every intent/slot combination ahead of traffic"""
+        combinations = [("mess_timing", "all"), ("mess_general", "all"), ("mess_menu", "all")]
+        combinations += [("mess_menu", meal) for meal in MEAL_TYPES]
+        combinations += [("rules_information", category) for category in POLICY_CATEGORIES]
+        combinations += [("maintenance_schedule", facility) for facility in FACILITY_TYPES]
+        for combination in combinations:
+            if combination not in self._rendered:
+                response = await self._render(*combination)
+                if response is not None:
+                    self._rendered[combination] = response
+        return len(self._rendered)
+
+    async def _render(self, intent: str, slot: str) -> Optional[AgentResponse]:
+        route, renderer = RENDERERS[intent]
+        agent = self.registry.get(route) if route in self.registry else None
+        if agent is None or agent.analysis_model is None:
+            return None
+        return await renderer(agent, slot)
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.hits.values()) + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "safety_skips": self.safety_skips,
+            "hit_rate": round(sum(self.hits.values()) / total, 3) if total else 0.0,
+            "rendered": len(self._rendered),
+        }
+
+
+async def _render_mess_timing(agent: BaseAgent, meal_type: str) -> AgentResponse:
+    analysis = agent.analysis_model(
+        query_type="timing_question",
+        meal_type=meal_type,
+        concern_level="info_request",
+        requires_immediate_attention="No"
+    )
+    return await agent._handle_timing_question(analysis)
+
+
+async def _render_mess_general(agent: BaseAgent, meal_type: str) -> AgentResponse:
+    return await agent._handle_general_inquiry()
+
+
+async def _render_mess_menu(agent: BaseAgent, meal_type: str) -> AgentResponse:
+    analysis = agent.analysis_model(
+        query_type="menu_inquiry",
+        meal_type=meal_type,
+        concern_level="info_request",
+        requires_immediate_attention="No"
+    )
+    return await agent._handle_menu_inquiry(analysis)
+
+
+async def _render_rules_information(agent: BaseAgent, category: str) -> AgentResponse:
+    from config.hostel_data import HostelRules
+
+    analysis = agent.analysis_model(
+        policy_category=category,
+        query_intent="information_request",
+        urgency_level="low",
+        specific_situation=f"General {category} policy information"
+    )
+    return await agent._provide_information(analysis, HostelRules.get_policy_info(category))
+
+
+async def _render_maintenance_schedule(agent: BaseAgent, facility_type: str) -> AgentResponse:
+    analysis = agent.analysis_model(
+        facility_type=facility_type,
+        query_scope="scheduled_maintenance",
+        location_specific="general",
+        urgency_indicator="routine_check"
+    )
+    return await agent._provide_maintenance_schedule(analysis)
+
+
+RENDERERS: Dict[str, Tuple[str, Callable[[BaseAgent, str], Awaitable[AgentResponse]]]] = {
+    "mess_timing": ("MESS", _render_mess_timing),
+    "mess_general": ("MESS", _render_mess_general),
+    "mess_menu": ("MESS", _render_mess_menu),
+    "rules_information": ("RULES", _render_rules_information),
+    "maintenance_schedule": ("STATUS", _render_maintenance_schedule),
+}
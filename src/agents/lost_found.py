@@ -1,10 +1,14 @@
 # src/agents/lost_found.py
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from src.agents.base_agent import BaseAgent, AgentResponse
-from src.tools.form_selector import FormSelector
-from src.utils.prompts import SystemPrompts
-from typing import Dict, Any
+from agents.base_agent import BaseAgent, AgentResponse
+from tools.form_selector import FormSelector
+from utils.prompts import SystemPrompts
+from tools.image_index import OPPOSITE_KIND, ImageIndex, image_index
+from tools.image_preprocessor import ImageProcessingError, image_preprocessor
+from tools.lost_found_store import LostFoundReport, LostFoundStore, extract_locations, lost_found_store
+from typing import Dict, Any, List, Optional, Tuple
+import time
+import uuid
 
 class LostFoundAnalysis(BaseModel):
     """Analysis of lost or found item query"""
@@ -24,17 +28,45 @@ class LostFoundAnalysis(BaseModel):
     suggested_search_areas: str = Field(
         description="Comma-separated list of areas to search based on item type and context"
     )
+    time_reference: str = Field(
+        default="unknown",
+        description="When it was lost or found: today, yesterday, this week, earlier, or unknown"
+    )
+
+# How far back (days) found-item reports are searched for an item lost at this time
+LOST_WINDOW_DAYS = {"today": 2, "yesterday": 3, "this week": 8, "earlier": 31}
 
 class LostFoundAgent(BaseAgent):
-    def __init__(self):
+    analysis_model = LostFoundAnalysis
+    
+    def __init__(self, image_index: Optional[ImageIndex] = image_index,
+                 store: Optional[LostFoundStore] = lost_found_store):
         super().__init__("Lost & Found Specialist")
+        self.analysis_chain = self.get_chain(LostFoundAnalysis, "Query: {query}{image_context}")
+        self.image_index = image_index
+        self.store = store
+        self._photos_indexed = False
+    
+    async def warm_up(self) -> None:
+        """Load stored reports off the event loop; reports from earlier runs become matchable again, photos included"""
+        if self.store is None or self._photos_indexed:
+            return
+        await self.store.warm_up()
+        if self._photos_indexed:
+            return
+        self._photos_indexed = True
+        if self.image_index is not None:
+            for report in list(self.store.reports.values()):
+                if report.status == "open" and report.hashes:
+                    self.image_index.add(report.kind, report.report_id, report.hashes,
+                                         {"item_category": report.item_category})
     
     def get_system_prompt(self) -> str:
         return SystemPrompts.get_lost_found_prompt()
     
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
         # Analyze the lost/found query
-        analysis = await self._analyze_lost_found(query, context)
+        analysis = await self.get_analysis(query, context)
         
         # Determine if it's lost or found
         if analysis.is_lost_item == "Yes":
@@ -44,25 +76,17 @@ class LostFoundAgent(BaseAgent):
         else:
             return await self._handle_general_inquiry(query, analysis)
     
+    async def analyze(self, query: str, context: Dict[str, Any]) -> LostFoundAnalysis:
+        return await self._analyze_lost_found(query, context)
+    
     async def _analyze_lost_found(self, query: str, context: Dict[str, Any]) -> LostFoundAnalysis:
         # Add image analysis if available
         image_context = ""
         if context.get("image_data"):
-            image_analysis = await self.analyze_image(
-                context["image_data"],
-                SystemPrompts.get_vision_analysis_prompt()
-            )
+            image_analysis = await self.describe_image(context)
             image_context = f"\nImage shows: {image_analysis}"
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", "Query: {query}{image_context}")
-        ])
-        
-        structured_llm = self.get_structured_llm(LostFoundAnalysis)
-        chain = prompt | structured_llm
-        
-        return await chain.ainvoke({"query": query, "image_context": image_context})
+        return await self.invoke_chain(self.analysis_chain, {"query": query, "image_context": image_context})
     
     async def _handle_lost_item(self, query: str, analysis: LostFoundAnalysis, context: Dict[str, Any]) -> AgentResponse:
         search_areas = analysis.suggested_search_areas.split(", ")
@@ -82,6 +106,13 @@ class LostFoundAgent(BaseAgent):
 - Check lost & found box at reception
 
 {form_explanation}"""
+        
+        report_id, matches = await self._record_report("lost", query, analysis, context)
+        if report_id:
+            content += f"\n\n📋 Your report is on file as {report_id} and will be compared with items handed in."
+        if matches:
+            content += "\n\n**Found items on file that may be yours:**\n" + "\n".join(matches)
+            content += "\nMention these report numbers at the reception desk to check them."
 
         next_steps = [
             "Search the suggested areas thoroughly",
@@ -114,6 +145,11 @@ class LostFoundAgent(BaseAgent):
                         - Keep with you until owner is found
 
                         {form_explanation}"""
+        
+        report_id, matches = await self._record_report("found", query, analysis, context)
+        if matches:
+            content += "\n\n**This may match items students have reported lost:**\n" + "\n".join(matches)
+            content += f"\nPlease mention these report numbers (and yours, {report_id}) when you hand the item in."
 
         next_steps = [
             "Secure the item safely",
@@ -129,6 +165,55 @@ class LostFoundAgent(BaseAgent):
             urgency="medium"
         )
     
+    async def _record_report(self, kind: str, query: str, analysis: LostFoundAnalysis,
+                             context: Dict[str, Any]) -> Tuple[Optional[str], List[str]]:
+        """File this report and list likely matches among the opposite reports (photo matches first)"""
+        if self.store is None:
+            return None, []
+        await self.warm_up()
+        # Reports past their window stop matching, photos included
+        for expired in self.store.expire_due():
+            if self.image_index is not None:
+                self.image_index.remove(expired.report_id)
+        report = LostFoundReport(
+            report_id=f"{kind[0].upper()}-{uuid.uuid4().hex[:6].upper()}",
+            kind=kind,
+            item_category=analysis.item_category.lower(),
+            description=query[:500],
+            locations=extract_locations(query)
+        )
+        
+        matches = {}
+        if self.image_index is not None and context.get("image_data"):
+            try:
+                image = await image_preprocessor.decode(context["image_data"])
+                report.phash, report.dhash = await self.image_index.hash(image)
+            except ImageProcessingError:
+                # An unreadable or oversized photo still gets the text match
+                pass
+            else:
+                for match in self.image_index.search(OPPOSITE_KIND[kind], report.hashes):
+                    matches[match.report_id] = (match.metadata.get("item_category", "item"), f"{match.similarity:.0%} photo match")
+                self.image_index.add(kind, report.report_id, report.hashes, {"item_category": report.item_category})
+        
+        # An item can only be handed in after it was lost; found items match any recent lost report
+        since = None
+        if kind == "lost" and analysis.time_reference in LOST_WINDOW_DAYS:
+            since = time.time() - LOST_WINDOW_DAYS[analysis.time_reference] * 86400
+        for _, candidate in self.store.candidates(report, since):
+            places = ", ".join(place for place in candidate.locations if place in report.locations)
+            matches.setdefault(candidate.report_id, (
+                candidate.item_category, f"similar description{f', also at {places}' if places else ''}"
+            ))
+        
+        # Recorded after matching so a report never matches itself; the disk write is batched in the background
+        self.store.record(report)
+        # Only the category: report descriptions can contain personal details
+        return report.report_id, [
+            f"• Report {report_id} - {category} ({reason})"
+            for report_id, (category, reason) in matches.items()
+        ]
+    
     async def _handle_general_inquiry(self, query: str, analysis: LostFoundAnalysis) -> AgentResponse:
         content = """I can help you with lost and found items!
 
@@ -1,10 +1,9 @@
 # src/agents/mess_management.py
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from src.agents.base_agent import BaseAgent, AgentResponse
-from src.tools.form_selector import FormSelector
+from agents.base_agent import BaseAgent, AgentResponse
+from tools.form_selector import FormSelector
 from config.hostel_data import MessData
-from src.utils.prompts import SystemPrompts
+from utils.prompts import SystemPrompts
 from typing import Dict, Any
 
 class MessQueryAnalysis(BaseModel):
@@ -24,15 +23,18 @@ class MessQueryAnalysis(BaseModel):
     )
 
 class MessAgent(BaseAgent):
+    analysis_model = MessQueryAnalysis
+    
     def __init__(self):
         super().__init__("Mess Manager")
+        self.analysis_chain = self.get_chain(MessQueryAnalysis, "Mess query: {query}{image_context}")
     
     def get_system_prompt(self) -> str:
         return SystemPrompts.get_mess_management_prompt()
     
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
         # Analyze the mess query
-        analysis = await self._analyze_mess_query(query, context)
+        analysis = await self.get_analysis(query, context)
         
         # Route based on query type
         if analysis.query_type == "menu_inquiry":
@@ -48,25 +50,17 @@ class MessAgent(BaseAgent):
         else:
             return await self._handle_general_inquiry()
     
+    async def analyze(self, query: str, context: Dict[str, Any]) -> MessQueryAnalysis:
+        return await self._analyze_mess_query(query, context)
+    
     async def _analyze_mess_query(self, query: str, context: Dict[str, Any]) -> MessQueryAnalysis:
         # Add image analysis for food quality issues
         image_context = ""
         if context.get("image_data"):
-            image_analysis = await self.analyze_image(
-                context["image_data"],
-                SystemPrompts.get_vision_analysis_prompt()
-            )
+            image_analysis = await self.describe_image(context)
             image_context = f"\nImage shows: {image_analysis}"
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", "Mess query: {query}{image_context}")
-        ])
-        
-        structured_llm = self.get_structured_llm(MessQueryAnalysis)
-        chain = prompt | structured_llm
-        
-        return await chain.ainvoke({"query": query, "image_context": image_context})
+        return await self.invoke_chain(self.analysis_chain, {"query": query, "image_context": image_context})
     
     async def _handle_menu_inquiry(self, analysis: MessQueryAnalysis) -> AgentResponse:
         menu_info = MessData.get_menu_info(analysis.meal_type)
@@ -0,0 +1,96 @@
+# src/agents/registry.py
+import importlib
+import logging
+from typing import Callable, Dict, Optional, Union
+from agents.base_agent import BaseAgent
+
+AgentFactory = Callable[[], BaseAgent]
+
+logger = logging.getLogger(__name__)
+
+# Specialists shipped with HostelBuddy, keyed by QueryClassification.agent_type
+DEFAULT_AGENTS = {
+    "COMPLAINT": "agents.complaint_handler.ComplaintAgent",
+    "LOST_FOUND": "agents.lost_found.LostFoundAgent",
+    "MESS": "agents.mess_management.MessAgent",
+    "RULES": "agents.rules_policy.RulesAgent",
+    "STATUS": "agents.status_updates.StatusAgent",
+}
+
+def _import_factory(dotted_path: str) -> AgentFactory:
+    """Resolve 'package.module.ClassName' to the agent class"""
+    module_path, _, class_name = dotted_path.rpartition(".")
+    return getattr(importlib.import_module(module_path), class_name)
+
+class AgentRegistry:
+    """Process-wide set of long-lived specialist agents.
+
+    Each agent is built once (on warm-up or first use) and shared by every
+    request. Agents hold no per-request state, so concurrent queries can use
+    the same instance safely.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Union[str, AgentFactory]] = {}
+        self._agents: Dict[str, BaseAgent] = {}
+        # Routes whose agent failed to build at warm-up, with the reason
+        self.failed: Dict[str, str] = {}
+
+    def register(self, agent_type: str, factory: Union[str, AgentFactory]) -> None:
+        """Register an agent class, factory callable or dotted import path"""
+        agent_type = agent_type.upper()
+        self._factories[agent_type] = factory
+        self._agents.pop(agent_type, None)
+
+    def unregister(self, agent_type: str) -> None:
+        self._factories.pop(agent_type.upper(), None)
+        self._agents.pop(agent_type.upper(), None)
+
+    def __contains__(self, agent_type: str) -> bool:
+        return agent_type.upper() in self._factories
+
+    @property
+    def agent_types(self):
+        return list(self._factories)
+
+    def get(self, agent_type: str) -> Optional[BaseAgent]:
+        """Return the shared agent for a route, building it on first use"""
+        agent_type = agent_type.upper()
+        agent = self._agents.get(agent_type)
+        if agent is not None:
+            return agent
+
+        factory = self._factories.get(agent_type)
+        if factory is None:
+            return None
+        if isinstance(factory, str):
+            factory = _import_factory(factory)
+            self._factories[agent_type] = factory
+
+        agent = factory()
+        self._agents[agent_type] = agent
+        self.failed.pop(agent_type, None)
+        return agent
+
+    def warm_up(self) -> Dict[str, BaseAgent]:
+        """Build every registered agent up front (called at server start).
+
+        An agent that fails to build is logged and skipped, so one broken
+        specialist doesn't stop the server; its route retries the build on
+        first use and fails only those requests.
+        """
+        for agent_type in self.agent_types:
+            try:
+                self.get(agent_type)
+            except Exception as e:
+                logger.exception("Could not build the %s agent", agent_type)
+                self.failed[agent_type] = f"{type(e).__name__}: {e}"
+        return dict(self._agents)
+
+def build_default_registry() -> AgentRegistry:
+    registry = AgentRegistry()
+    for agent_type, dotted_path in DEFAULT_AGENTS.items():
+        registry.register(agent_type, dotted_path)
+    return registry
+
+agent_registry = build_default_registry()
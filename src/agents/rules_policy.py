@@ -1,9 +1,8 @@
 # src/agents/rules_policy.py (continued)
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from src.agents.base_agent import BaseAgent, AgentResponse
+from agents.base_agent import BaseAgent, AgentResponse
 from config.hostel_data import HostelRules
-from src.utils.prompts import SystemPrompts
+from utils.prompts import SystemPrompts
 from typing import Dict, Any
 
 class RulesQueryAnalysis(BaseModel):
@@ -23,15 +22,18 @@ class RulesQueryAnalysis(BaseModel):
    )
 
 class RulesAgent(BaseAgent):
+   analysis_model = RulesQueryAnalysis
+   
    def __init__(self):
        super().__init__("Policy Advisor")
+       self.analysis_chain = self.get_chain(RulesQueryAnalysis, "Policy query: {query}")
    
    def get_system_prompt(self) -> str:
        return SystemPrompts.get_rules_policy_prompt()
    
    async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
        # Analyze the policy query
-       analysis = await self._analyze_rules_query(query, context)
+       analysis = await self.get_analysis(query, context)
        
        # Get relevant policy information
        policy_info = HostelRules.get_policy_info(analysis.policy_category)
@@ -46,16 +48,11 @@ class RulesAgent(BaseAgent):
        else:
            return await self._provide_information(analysis, policy_info)
    
+   async def analyze(self, query: str, context: Dict[str, Any]) -> RulesQueryAnalysis:
+       return await self._analyze_rules_query(query, context)
+   
    async def _analyze_rules_query(self, query: str, context: Dict[str, Any]) -> RulesQueryAnalysis:
-       prompt = ChatPromptTemplate.from_messages([
-           ("system", self.get_system_prompt()),
-           ("human", "Policy query: {query}")
-       ])
-       
-       structured_llm = self.get_structured_llm(RulesQueryAnalysis)
-       chain = prompt | structured_llm
-       
-       return await chain.ainvoke({"query": query})
+       return await self.invoke_chain(self.analysis_chain, {"query": query})
    
    async def _provide_information(self, analysis: RulesQueryAnalysis, policy_info: str) -> AgentResponse:
        content = f"""**{analysis.policy_category.title()} Policy Information:**
@@ -0,0 +1,70 @@
+# src/agents/speculation.py
+import asyncio
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from agents.registry import AgentRegistry
+
+class Speculator:
+    """Run likely specialists' analysis while the LLM classifier is still working.
+
+    The fast router's ranking picks at most ``max_agents`` candidate routes
+    (the per-request budget). Their analyses (cache first) start immediately; once
+    the route is confirmed the matching result is kept and the rest cancelled.
+    """
+
+    def __init__(self, registry: AgentRegistry, max_agents: int = 1, min_score: float = 0.2):
+        self.registry = registry
+        self.max_agents = max_agents
+        self.min_score = min_score
+        self.counters = Counter()
+
+    def start(self, query: str, context: Dict[str, Any], ranked: List[Tuple[str, float]]) -> Dict[str, asyncio.Task]:
+        """Launch speculative analyses for the top-ranked routes"""
+        tasks = {}
+        for agent_type, score in ranked:
+            if len(tasks) >= self.max_agents or score < self.min_score:
+                break
+            agent = self.registry.get(agent_type) if agent_type in self.registry else None
+            if agent is None or agent.analysis_model is None:
+                continue
+            tasks[agent_type] = asyncio.create_task(agent.get_analysis(query, context))
+
+        self.counters["requests"] += 1
+        self.counters["launched"] += len(tasks)
+        return tasks
+
+    async def resolve(self, tasks: Dict[str, asyncio.Task], agent_type: Optional[str]) -> Optional[BaseModel]:
+        """Keep the analysis for the confirmed route, cancel the others"""
+        if not tasks:
+            return None
+        winner = tasks.pop(agent_type.upper(), None) if agent_type else None
+        self.cancel(tasks)
+        if winner is None:
+            self.counters["misses"] += 1
+            return None
+        try:
+            analysis = await winner
+        except Exception:
+            self.counters["errors"] += 1
+            return None
+        self.counters["wins"] += 1
+        return analysis
+
+    def cancel(self, tasks: Dict[str, asyncio.Task]) -> None:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+                self.counters["cancelled"] += 1
+            # Retrieve the outcome so failed speculations are never reported as unhandled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        tasks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        launched = self.counters["launched"]
+        return {
+            "max_agents": self.max_agents,
+            "min_score": self.min_score,
+            **dict(self.counters),
+            "win_rate": round(self.counters["wins"] / launched, 3) if launched else 0.0,
+        }
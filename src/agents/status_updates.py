@@ -1,9 +1,8 @@
 # src/agents/status_updates.py
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from src.agents.base_agent import BaseAgent, AgentResponse
+from agents.base_agent import BaseAgent, AgentResponse
 from config.hostel_data import FacilityStatus
-from src.utils.prompts import SystemPrompts
+from utils.prompts import SystemPrompts
 from typing import Dict, Any
 
 class StatusQueryAnalysis(BaseModel):
@@ -23,15 +22,18 @@ class StatusQueryAnalysis(BaseModel):
     )
 
 class StatusAgent(BaseAgent):
+    analysis_model = StatusQueryAnalysis
+    
     def __init__(self):
         super().__init__("Status Monitor")
+        self.analysis_chain = self.get_chain(StatusQueryAnalysis, "Status query: {query}")
     
     def get_system_prompt(self) -> str:
         return SystemPrompts.get_status_updates_prompt()
     
     async def process_query(self, query: str, context: Dict[str, Any]) -> AgentResponse:
         # Analyze the status query
-        analysis = await self._analyze_status_query(query, context)
+        analysis = await self.get_analysis(query, context)
         
         # Get current facility status
         current_status = FacilityStatus.get_current_status(
@@ -49,16 +51,11 @@ class StatusAgent(BaseAgent):
         else:
             return await self._provide_general_info(analysis)
     
+    async def analyze(self, query: str, context: Dict[str, Any]) -> StatusQueryAnalysis:
+        return await self._analyze_status_query(query, context)
+    
     async def _analyze_status_query(self, query: str, context: Dict[str, Any]) -> StatusQueryAnalysis:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", "Status query: {query}")
-        ])
-        
-        structured_llm = self.get_structured_llm(StatusQueryAnalysis)
-        chain = prompt | structured_llm
-        
-        return await chain.ainvoke({"query": query})
+        return await self.invoke_chain(self.analysis_chain, {"query": query})
     
     async def _provide_current_status(self, analysis: StatusQueryAnalysis, current_status: Dict) -> AgentResponse:
         status_info = current_status.get("status", "operational")
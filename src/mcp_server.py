@@ -1,38 +1,76 @@
 # src/mcp_server.py
 import asyncio
-from typing import Annotated, Optional
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Annotated, Any, Dict, Optional, Tuple
 import os
 from dotenv import load_dotenv
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from fastmcp.server.auth.providers.bearer import BearerAuthProvider, RSAKeyPair
+from fastmcp.server.dependencies import get_access_token
 from mcp.server.auth.provider import AccessToken
 from mcp import ErrorData, McpError
-from mcp.types import INTERNAL_ERROR
+from mcp.types import INTERNAL_ERROR, INVALID_REQUEST
 from pydantic import Field
+
+# config/ (form links, hostel data) sits next to src/, which is the only path entry when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from agents.coordinator import CoordinatorAgent
+from tools.complaint_store import STATUSES, complaint_store
+from tools.groq_client import client_manager
+from tools.image_index import image_index
+from tools.incident_tracker import incident_tracker
+from tools.lost_found_store import REPORT_STATUSES, lost_found_store
+from tools.rate_limiter import LLMOverloadedError
+from tools.token_accounting import token_meter
 from utils.response_formatter import ResponseFormatter
+from utils.deadline import deadline_scope
 from utils.validators import QueryValidator
 
 load_dotenv()
 
 TOKEN = os.environ.get("AUTH_TOKEN")
 MY_NUMBER = os.environ.get("MY_NUMBER")
+# Separate bearer token for the admin tools; while unset, every admin tool refuses
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or None
+ADMIN_SCOPE = "hostel:admin"
 
 assert TOKEN is not None, "Please set AUTH_TOKEN in your .env file"
 assert MY_NUMBER is not None, "Please set MY_NUMBER in your .env file"
+assert ADMIN_TOKEN != TOKEN, "ADMIN_TOKEN must differ from AUTH_TOKEN"
+
+# Total time budget per hostel_assistant call, split across classification, vision and analysis
+REQUEST_BUDGET_SECONDS = float(os.environ.get("REQUEST_BUDGET_SECONDS", "30"))
+# Progress steps reported by hostel_assistant_stream: received, classified, answered
+STREAM_STAGES = 2
 
 class SimpleBearerAuthProvider(BearerAuthProvider):
-    def __init__(self, token: str):
+    def __init__(self, token: str, admin_token: Optional[str] = None):
         k = RSAKeyPair.generate()
         super().__init__(public_key=k.public_key, jwks_uri=None, issuer=None, audience=None)
         self.token = token
+        self.admin_token = admin_token
 
     async def load_access_token(self, token: str) -> AccessToken | None:
         if token == self.token:
             return AccessToken(token=token, client_id="puch-client", scopes=["*"], expires_at=None)
+        if self.admin_token is not None and token == self.admin_token:
+            return AccessToken(token=token, client_id="hostel-admin", scopes=["*", ADMIN_SCOPE], expires_at=None)
         return None
 
-mcp = FastMCP("HostelBuddy Multi-Agent System", auth=SimpleBearerAuthProvider(TOKEN))
+def require_admin() -> None:
+    """Refuse an admin tool unless the caller authenticated with ADMIN_TOKEN"""
+    access_token = get_access_token()
+    if access_token is None or ADMIN_SCOPE not in access_token.scopes:
+        raise McpError(ErrorData(
+            code=INVALID_REQUEST,
+            message="This is an admin tool: call it with the hostel admin token"
+        ))
+
+mcp = FastMCP("HostelBuddy Multi-Agent System", auth=SimpleBearerAuthProvider(TOKEN, ADMIN_TOKEN))
 coordinator = CoordinatorAgent()
 
 @mcp.tool
@@ -40,6 +78,31 @@ async def validate() -> str:
     """Validate tool required by Puch AI"""
     return MY_NUMBER
 
+async def prepare_request(query: str, image_data: Optional[str]) -> Tuple[Optional[str], Dict[str, Any], Optional[str]]:
+    """Validate a hostel_assistant request: (sanitized query, context, error response)"""
+    # Validate query
+    query_validation = QueryValidator.validate_query(query)
+    if not query_validation["is_valid"]:
+        return None, {}, ResponseFormatter.format_error_response(
+            f"Query validation failed: {', '.join(query_validation['warnings'])}"
+        )
+    
+    # Validate image if provided
+    if image_data:
+        image_validation = await QueryValidator.validate_image_data_async(image_data)
+        if not image_validation["is_valid"]:
+            return None, {}, ResponseFormatter.format_error_response(
+                f"Image validation failed: {', '.join(image_validation['warnings'])}"
+            )
+    
+    # Agents receive the decoded bytes, so nothing downstream decodes the base64 again
+    context = {"image_data": image_validation["image_bytes"]} if image_data else {}
+    return query_validation["sanitized_query"], context, None
+
+TICKET_ID_PATTERN = re.compile(r"(\d+)")
+REPORT_ID_PATTERN = re.compile(r"\b([LF]-[0-9A-F]{6})\b", re.IGNORECASE)
+OVERLOADED_MESSAGE = "HostelBuddy is handling a lot of requests right now. Please try again in a minute."
+
 @mcp.tool
 async def hostel_assistant(
     query: Annotated[str, Field(description="Student's hostel-related question or issue")],
@@ -50,44 +113,169 @@ async def hostel_assistant(
     mess queries, rules, and status updates. Supports image analysis for better assistance.
     """
     try:
-        # Validate query
-        query_validation = QueryValidator.validate_query(query)
-        if not query_validation["is_valid"]:
-            return ResponseFormatter.format_error_response(
-                f"Query validation failed: {', '.join(query_validation['warnings'])}"
-            )
-        
-        # Validate image if provided
-        if image_data:
-            image_validation = QueryValidator.validate_image_data(image_data)
-            if not image_validation["is_valid"]:
-                return ResponseFormatter.format_error_response(
-                    f"Image validation failed: {', '.join(image_validation['warnings'])}"
-                )
+        sanitized_query, context, error = await prepare_request(query, image_data)
+        if error:
+            return error
         
         # Process query through coordinator agent
-        context = {"image_data": image_data} if image_data else {}
-        response = await coordinator.process_query(query_validation["sanitized_query"], context)
+        with deadline_scope(REQUEST_BUDGET_SECONDS), token_meter.request_scope():
+            response = await coordinator.process_query(sanitized_query, context)
         
         # Format response using ResponseFormatter
         return ResponseFormatter.format_agent_response(response)
         
+    except LLMOverloadedError:
+        return ResponseFormatter.format_error_response(OVERLOADED_MESSAGE)
     except Exception as e:
         raise McpError(ErrorData(
             code=INTERNAL_ERROR, 
             message=f"Error processing hostel query: {str(e)}"
         ))
 
+@mcp.tool
+async def hostel_assistant_stream(
+    query: Annotated[str, Field(description="Student's hostel-related question or issue")],
+    ctx: Context,
+    image_data: Annotated[Optional[str], Field(description="Base64 image (optional)")] = None
+) -> str:
+    """
+    Streaming hostel assistant. Sends the urgency banner and any safety advice as soon as
+    the query is classified, then the answer section by section as progress/log messages.
+    The full formatted answer is also returned as the tool result.
+    """
+    try:
+        sanitized_query, context, error = await prepare_request(query, image_data)
+        if error:
+            return error
+        
+        sent = {"banner": None}
+        
+        async def on_classified(classification) -> None:
+            notice = ResponseFormatter.format_early_notice(
+                classification.urgency, classification.has_safety_concern == "Yes"
+            )
+            sent["banner"] = classification.urgency
+            await ctx.report_progress(1, STREAM_STAGES, notice)
+            await ctx.info(notice)
+        
+        await ctx.report_progress(0, STREAM_STAGES, "🔎 Understanding your question...")
+        with deadline_scope(REQUEST_BUDGET_SECONDS), token_meter.request_scope():
+            response = await coordinator.process_query(sanitized_query, {**context, "on_classified": on_classified})
+        
+        # The banner already went out unless the specialist changed the urgency
+        for chunk in ResponseFormatter.iter_agent_response(response, include_banner=sent["banner"] != response.urgency):
+            await ctx.info(chunk)
+        await ctx.report_progress(STREAM_STAGES, STREAM_STAGES, "✅ Done")
+        
+        return ResponseFormatter.format_agent_response(response)
+        
+    except LLMOverloadedError:
+        return ResponseFormatter.format_error_response(OVERLOADED_MESSAGE)
+    except Exception as e:
+        raise McpError(ErrorData(
+            code=INTERNAL_ERROR, 
+            message=f"Error processing hostel query: {str(e)}"
+        ))
+
+def parse_ticket_id(ticket: str) -> Optional[int]:
+    """The first number in ``ticket`` ("1042", "#1042", "status of ticket 1042")"""
+    match = TICKET_ID_PATTERN.search(ticket)
+    return int(match.group(1)) if match else None
+
+@mcp.tool
+async def complaint_status(
+    ticket: Annotated[str, Field(description="Complaint ticket number, e.g. 1042 or #1042")]
+) -> str:
+    """Look up the status of a complaint ticket by its number (instant, no AI analysis)"""
+    await incident_tracker.warm_up()
+    ticket_id = parse_ticket_id(ticket)
+    found = complaint_store.get(ticket_id) if ticket_id is not None else None
+    affected = incident_tracker.size(found.incident_id) if found is not None and found.incident_id else 1
+    return ResponseFormatter.format_ticket_status(found, ticket_id, affected)
+
+@mcp.tool
+async def complaint_update_status(
+    ticket: Annotated[str, Field(description="Complaint ticket number, e.g. 1042")],
+    status: Annotated[str, Field(description=f"New status: {', '.join(STATUSES)}")]
+) -> str:
+    """Admin: move a complaint ticket to a new status"""
+    require_admin()
+    await incident_tracker.warm_up()
+    ticket_id = parse_ticket_id(ticket)
+    try:
+        updated = complaint_store.update_status(ticket_id, status) if ticket_id is not None else None
+    except ValueError as e:
+        return ResponseFormatter.format_error_response(str(e))
+    affected = incident_tracker.size(updated.incident_id) if updated is not None and updated.incident_id else 1
+    return ResponseFormatter.format_ticket_status(updated, ticket_id, affected)
+
+@mcp.tool
+async def complaint_incidents(
+    min_students: Annotated[int, Field(description="Only incidents reported by at least this many students")] = 2
+) -> str:
+    """Admin view of open incidents (duplicate complaints grouped together), largest first (JSON)"""
+    require_admin()
+    await incident_tracker.warm_up()
+    return json.dumps(incident_tracker.open_incidents(min_size=min_students), indent=2, default=str)
+
+@mcp.tool
+async def lost_found_close(
+    reports: Annotated[str, Field(description="Lost/found report numbers, e.g. L-1A2B3C F-4D5E6F")],
+    status: Annotated[str, Field(description=f"Why they close: {', '.join(REPORT_STATUSES[1:])}")] = "claimed"
+) -> str:
+    """Admin: close lost & found reports once the item is back with its owner, so they stop matching"""
+    require_admin()
+    if status not in REPORT_STATUSES[1:]:
+        return ResponseFormatter.format_error_response(
+            f"Unknown closing status: {status} (expected one of {', '.join(REPORT_STATUSES[1:])})"
+        )
+    await lost_found_store.warm_up()
+    report_ids = list(dict.fromkeys(report_id.upper() for report_id in REPORT_ID_PATTERN.findall(reports)))
+    if not report_ids:
+        return "📋 Please give the report numbers to close (for example: L-1A2B3C F-4D5E6F)."
+    lines = []
+    for report_id in report_ids:
+        closed = lost_found_store.close(report_id, status)
+        if closed is None:
+            lines.append(f"- {report_id}: no open report with this number")
+            continue
+        image_index.remove(report_id)
+        lines.append(f"- {report_id}: {closed.kind} {closed.item_category} report closed ({status})")
+    return "📋 **Lost & found reports**\n\n" + "\n".join(lines)
+
 @mcp.tool
 async def hostel_help() -> str:
     """Get help and information about HostelBuddy capabilities"""
     return ResponseFormatter.format_greeting_response()
 
+@mcp.tool
+async def hostel_metrics() -> str:
+    """Admin view of routing decisions and runtime counters (JSON)"""
+    require_admin()
+    return json.dumps(coordinator.get_metrics(), indent=2, default=str)
+
+@mcp.tool
+async def hostel_token_usage() -> str:
+    """Admin view of LLM token usage per agent and stage, with histograms and recent requests (JSON)"""
+    require_admin()
+    return json.dumps(token_meter.stats(), indent=2, default=str)
+
 async def main():
     print("🏠 Starting HostelBuddy MCP server on http://0.0.0.0:8086")
-    print("📋 Available tools: hostel_assistant, hostel_help, validate")
+    coordinator.registry.warm_up()
+    for agent_type, error in coordinator.registry.failed.items():
+        print(f"⚠️ {agent_type} agent unavailable: {error}")
+    await coordinator.intent_index.warm_up()
+    await client_manager.warm_up()
+    # Stored tickets, open incidents and lost & found reports, read off the event loop before traffic arrives
+    await incident_tracker.warm_up()
+    await lost_found_store.warm_up()
+    print("📋 Available tools: hostel_assistant, hostel_assistant_stream, complaint_status, complaint_update_status, complaint_incidents, lost_found_close, hostel_help, hostel_metrics, hostel_token_usage, validate")
     print("🤖 Agents loaded: Coordinator, Complaint Handler, Lost & Found, Mess Manager, Rules Advisor, Status Monitor")
-    await mcp.run_async("streamable-http", host="0.0.0.0", port=8086)
+    try:
+        await mcp.run_async("streamable-http", host="0.0.0.0", port=8086)
+    finally:
+        await client_manager.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,127 @@
+# src/tools/circuit_breaker.py
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the breaker is open"""
+
+class CircuitBreaker:
+    """Error-rate and slow-call circuit breaker around the LLM backend.
+
+    Outcomes are kept for a rolling ``window`` of seconds. Once at least
+    ``min_calls`` calls are recorded, the breaker opens when the failure rate
+    reaches ``error_rate`` or the slow-call rate reaches ``slow_rate``. After
+    ``open_seconds`` it lets up to ``half_open_probes`` calls through: all of
+    them succeeding closes it again, any failure re-opens it. A probe that
+    is cancelled before its outcome is known hands its slot back.
+    """
+
+    def __init__(self, error_rate: float = 0.5, slow_call_seconds: float = 10.0, slow_rate: float = 0.8,
+                 min_calls: int = 10, window: float = 30.0, open_seconds: float = 30.0,
+                 half_open_probes: int = 2):
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self.transitions = Counter()
+        self.recent_transitions: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self.rejected = 0
+        self.probes_released = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            error_rate=float(os.getenv("BREAKER_ERROR_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10")),
+            slow_rate=float(os.getenv("BREAKER_SLOW_RATE", "0.8")),
+            min_calls=int(os.getenv("BREAKER_MIN_CALLS", "10")),
+            window=float(os.getenv("BREAKER_WINDOW", "30")),
+            open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+            half_open_probes=int(os.getenv("BREAKER_HALF_OPEN_PROBES", "2"))
+        )
+
+    def _transition(self, state: str) -> None:
+        self.transitions[f"{self.state}->{state}"] += 1
+        self.recent_transitions.append({"from": self.state, "to": state, "at": time.time()})
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call may go to the LLM now; True if the call is a half-open probe"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probes_started >= self.half_open_probes):
+            self.rejected += 1
+            raise CircuitOpenError("LLM backend unavailable")
+        if self.state == HALF_OPEN:
+            self._probes_started += 1
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Give back the slot of a probe that ended without an outcome (cancelled, or shed before reaching the LLM)"""
+        if self.state == HALF_OPEN:
+            self._probes_started = max(self._probes_succeeded, self._probes_started - 1)
+            self.probes_released += 1
+
+    def record(self, latency: float, error: BaseException = None) -> None:
+        failed = error is not None
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._transition(OPEN)
+            else:
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    self._transition(CLOSED)
+            return
+        if self.state == OPEN:
+            return
+
+        now = time.monotonic()
+        self._outcomes.append((now, failed, slow))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+        calls = len(self._outcomes)
+        if calls >= self.min_calls:
+            failures = sum(1 for _, failed, _ in self._outcomes if failed)
+            slow_calls = sum(1 for _, _, slow in self._outcomes if slow)
+            if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+                self._transition(OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "calls_in_window": calls,
+            "error_rate": round(sum(1 for _, f, _ in self._outcomes if f) / calls, 3) if calls else 0.0,
+            "slow_rate": round(sum(1 for _, _, s in self._outcomes if s) / calls, 3) if calls else 0.0,
+            "rejected": self.rejected,
+            "probes_released": self.probes_released,
+            "transitions": dict(self.transitions),
+            "recent_transitions": list(self.recent_transitions),
+        }
+
+llm_breaker = CircuitBreaker.from_env()
@@ -0,0 +1,275 @@
+# src/tools/complaint_store.py
+import asyncio
+import os
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from pydantic import BaseModel
+from tools.lost_found_store import extract_locations
+
+# Ticket lifecycle, in order
+STATUSES = ("open", "in_progress", "resolved")
+FIRST_TICKET_ID = 1001
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id INTEGER PRIMARY KEY,
+    query TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    immediate_action_needed TEXT NOT NULL,
+    temporary_solution TEXT NOT NULL,
+    estimated_resolution TEXT NOT NULL,
+    locations TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    incident_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS tickets_by_issue ON tickets (issue_type, severity);
+"""
+
+class Ticket(BaseModel):
+    """One maintenance complaint and the analysis it was filed with"""
+    ticket_id: int
+    query: str
+    issue_type: str
+    severity: str
+    immediate_action_needed: str = "No"
+    temporary_solution: str = ""
+    estimated_resolution: str = ""
+    locations: List[str] = []
+    status: str = "open"
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    # First ticket of the incident this complaint belongs to (its own ID when it opened the incident)
+    incident_id: Optional[int] = None
+
+class ComplaintStore:
+    """Durable complaint tickets with O(1) lookup by ID.
+
+    Ticket IDs are allocated in memory from a counter seeded with the
+    highest stored ID, so they are monotonic across restarts without a
+    database round trip; the stored tickets are read once by ``warm_up``
+    (or ``load``) before the store serves requests. Tickets are kept in a dict by ID and in inverted
+    indexes by issue type, severity and location; rows reach SQLite (WAL
+    mode) through the same batched background writer as lost & found
+    reports, so filing a ticket never waits on disk.
+    """
+
+    def __init__(self, path: str = "complaints.db", flush_interval: float = 0.5, batch_size: int = 100):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="complaint-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self._next_id = FIRST_TICKET_ID
+        self._pending: List[Ticket] = []
+        self._writer: Optional[asyncio.Task] = None
+
+        self.tickets: Dict[int, Ticket] = {}
+        self.by_issue_type: Dict[str, Set[int]] = defaultdict(set)
+        self.by_severity: Dict[str, Set[int]] = defaultdict(set)
+        self.by_location: Dict[str, Set[int]] = defaultdict(set)
+        self.by_incident: Dict[int, Set[int]] = defaultdict(set)
+        self.counters = Counter()
+        self.batch_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ComplaintStore":
+        return cls(
+            path=os.getenv("COMPLAINT_DB", "complaints.db"),
+            flush_interval=float(os.getenv("COMPLAINT_FLUSH_SECONDS", "0.5")),
+            batch_size=int(os.getenv("COMPLAINT_BATCH_SIZE", "100"))
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tickets)")}
+            if "incident_id" not in columns:
+                # Databases created before incident clustering
+                self._conn.execute("ALTER TABLE tickets ADD COLUMN incident_id INTEGER")
+        return self._conn
+
+    def load(self) -> int:
+        """Read stored tickets into memory once, blocking (scripts and tests); returns the number loaded"""
+        if self._loaded:
+            return 0
+        return self._load_rows(self._read_rows())
+
+    async def warm_up(self) -> int:
+        """Read stored tickets on the store's thread, off the event loop (at server start).
+
+        Request handlers await it too, so a request that beats the warm-up
+        waits for the same read instead of filing tickets with reused IDs.
+        """
+        if self._loaded:
+            return 0
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().run_in_executor(self.executor, self._read_rows)
+        try:
+            rows = await asyncio.shield(self._loading)
+        except sqlite3.Error:
+            self._loading = None
+            raise
+        return self._load_rows(rows)
+
+    def _read_rows(self) -> List[tuple]:
+        return self._connect().execute(
+            "SELECT ticket_id, query, issue_type, severity, immediate_action_needed, temporary_solution, "
+            "estimated_resolution, locations, status, created_at, updated_at, incident_id FROM tickets"
+        ).fetchall()
+
+    def _load_rows(self, rows: List[tuple]) -> int:
+        if self._loaded:
+            return 0
+        self._loaded = True
+        for (ticket_id, query, issue_type, severity, immediate, temporary, resolution, locations, status,
+             created_at, updated_at, incident_id) in rows:
+            self._index(Ticket(
+                ticket_id=ticket_id, query=query, issue_type=issue_type, severity=severity,
+                immediate_action_needed=immediate, temporary_solution=temporary, estimated_resolution=resolution,
+                locations=[loc for loc in locations.split(",") if loc], status=status,
+                created_at=created_at, updated_at=updated_at, incident_id=incident_id
+            ))
+        if self.tickets:
+            self._next_id = max(self._next_id, max(self.tickets) + 1)
+        self.counters["loaded"] += len(rows)
+        return len(rows)
+
+    def _index(self, ticket: Ticket) -> None:
+        self.tickets[ticket.ticket_id] = ticket
+        self.by_issue_type[ticket.issue_type].add(ticket.ticket_id)
+        self.by_severity[ticket.severity].add(ticket.ticket_id)
+        for location in ticket.locations:
+            self.by_location[location].add(ticket.ticket_id)
+        if ticket.incident_id is not None:
+            self.by_incident[ticket.incident_id].add(ticket.ticket_id)
+
+    def create(self, query: str, analysis: BaseModel, incident_id: Optional[int] = None) -> Ticket:
+        """File a ticket for an analyzed complaint: indexed now, written with the next batch.
+
+        Without ``incident_id`` the ticket opens a new incident of its own;
+        a duplicate passes the incident's first ticket as ``analysis``.
+        """
+        now = time.time()
+        ticket_id = self._next_id
+        ticket = Ticket(
+            ticket_id=ticket_id,
+            query=query[:1000],
+            issue_type=analysis.issue_type.lower(),
+            severity=analysis.severity.lower(),
+            immediate_action_needed=analysis.immediate_action_needed,
+            temporary_solution=analysis.temporary_solution,
+            estimated_resolution=analysis.estimated_resolution,
+            locations=extract_locations(query),
+            created_at=now,
+            updated_at=now,
+            incident_id=incident_id or ticket_id
+        )
+        self._next_id += 1
+        self._index(ticket)
+        self._queue(ticket)
+        self.counters["created"] += 1
+        return ticket
+
+    def get(self, ticket_id: int) -> Optional[Ticket]:
+        self.counters["lookups"] += 1
+        return self.tickets.get(ticket_id)
+
+    def find(self, issue_type: Optional[str] = None, severity: Optional[str] = None,
+             location: Optional[str] = None) -> List[Ticket]:
+        """Tickets matching every given filter, newest first"""
+        filters = [
+            index.get(value.lower(), set())
+            for index, value in ((self.by_issue_type, issue_type), (self.by_severity, severity),
+                                 (self.by_location, location))
+            if value is not None
+        ]
+        ids = set.intersection(*sorted(filters, key=len)) if filters else self.tickets.keys()
+        return sorted((self.tickets[ticket_id] for ticket_id in ids), key=lambda t: -t.ticket_id)
+
+    def incident(self, incident_id: int) -> List[Ticket]:
+        """Every ticket filed for an incident, first ticket first"""
+        return [self.tickets[ticket_id] for ticket_id in sorted(self.by_incident.get(incident_id, ()))]
+
+    def update_status(self, ticket_id: int, status: str) -> Optional[Ticket]:
+        """Move a ticket along its lifecycle (staff action); None if there is no such ticket.
+
+        Updating an incident's first ticket updates every duplicate filed for it.
+        """
+        if status not in STATUSES:
+            raise ValueError(f"Unknown ticket status: {status} (expected one of {', '.join(STATUSES)})")
+        ticket = self.get(ticket_id)
+        if ticket is None:
+            return None
+        now = time.time()
+        updated = self.incident(ticket_id) if ticket.incident_id == ticket_id else [ticket]
+        for member in updated:
+            member.status = status
+            member.updated_at = now
+            self._queue(member)
+        self.counters["status_updates"] += 1
+        return ticket
+
+    def _queue(self, ticket: Ticket) -> None:
+        self._pending.append(ticket)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                await loop.run_in_executor(self.executor, self._write_batch, batch)
+            except sqlite3.Error:
+                self.counters["write_errors"] += 1
+                # Keep the tickets for the next attempt
+                self._pending = batch + self._pending
+
+    def _write_batch(self, batch: List[Ticket]) -> None:
+        started = time.perf_counter()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    ticket.ticket_id, ticket.query, ticket.issue_type, ticket.severity,
+                    ticket.immediate_action_needed, ticket.temporary_solution, ticket.estimated_resolution,
+                    ",".join(ticket.locations), ticket.status, ticket.created_at, ticket.updated_at,
+                    ticket.incident_id
+                ) for ticket in batch]
+            )
+        self.counters["batches_written"] += 1
+        self.counters["tickets_written"] += len(batch)
+        self.batch_seconds += time.perf_counter() - started
+
+    async def flush(self) -> None:
+        """Wait until every filed ticket and status change is on disk"""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches_written"]
+        return {
+            **dict(self.counters),
+            "path": self.path,
+            "tickets": len(self.tickets),
+            "next_ticket_id": self._next_id,
+            "by_status": dict(Counter(ticket.status for ticket in self.tickets.values())),
+            "by_severity": {severity: len(ids) for severity, ids in self.by_severity.items()},
+            "pending_writes": len(self._pending),
+            "avg_batch_ms": round(1000 * self.batch_seconds / batches, 2) if batches else 0.0,
+        }
+
+complaint_store = ComplaintStore.from_env()
@@ -0,0 +1,289 @@
+# src/tools/fake_llm.py
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import typing
+import zlib
+from typing import Any, Dict, List, Optional, Type
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+# Analysis models the fake knows how to fill for each route (matched by class name, so
+# fused-routing variants that subclass them are covered too)
+ANALYSIS_ROUTES = {
+    "ComplaintAnalysis": "COMPLAINT",
+    "LostFoundAnalysis": "LOST_FOUND",
+    "MessQueryAnalysis": "MESS",
+    "RulesQueryAnalysis": "RULES",
+    "StatusQueryAnalysis": "STATUS",
+}
+VISION_DESCRIPTION = "The image shows a hostel room object; details are approximate (offline fake backend)."
+
+class FakeLLMError(Exception):
+    """Injected backend failure; ``status_code`` 429 mimics a provider rate limit"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LatencyDistribution:
+    """Latency sampler parsed from a spec string.
+
+    ``fixed:MS``, ``uniform:MIN_MS,MAX_MS``, ``normal:MEAN_MS,STD_MS`` or
+    ``lognormal:MEDIAN_MS,SIGMA`` (heavy tail, closest to real LLM latency).
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()] or [0.0]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds to wait for one call"""
+        p = self.params
+        if self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-3)), p[1] if len(p) > 1 else 0.5)
+        else:
+            ms = p[0]
+        return max(0.0, ms) / 1000
+
+class FakeLLMSettings:
+    """Latency and error injection shared by every fake client"""
+
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency = LatencyDistribution(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMSettings":
+        return cls(
+            latency=os.getenv("FAKE_LLM_LATENCY", "lognormal:400,0.4"),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0"))
+        )
+
+    def _outcome(self) -> float:
+        """Latency for the next call; raises FakeLLMError for injected failures"""
+        self.calls += 1
+        roll = self.rng.random()
+        latency = self.latency.sample(self.rng)
+        if roll < self.rate_limit_rate:
+            self.errors += 1
+            raise FakeLLMError("Injected rate limit", status_code=429)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            raise FakeLLMError("Injected backend error")
+        return latency
+
+    async def delay(self) -> None:
+        latency = self._outcome()
+        await asyncio.sleep(latency)
+
+    def delay_sync(self) -> None:
+        latency = self._outcome()
+        time.sleep(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.spec,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+            "calls": self.calls,
+            "injected_errors": self.errors,
+        }
+
+def _messages(prompt: Any) -> List[BaseMessage]:
+    if isinstance(prompt, PromptValue):
+        return prompt.to_messages()
+    if isinstance(prompt, str):
+        return [HumanMessage(content=prompt)]
+    return list(prompt)
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+def _usage(messages: List[BaseMessage], output: str) -> Dict[str, int]:
+    input_tokens = sum(len(_text(m.content)) for m in messages) // 4
+    output_tokens = max(1, len(output) // 4)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+class StructuredOutputSynthesizer:
+    """Deterministic, schema-valid structured output for a student query.
+
+    Routing fields come from the local FastRouter and analysis fields from the
+    DegradedAnalyzer keyword heuristics, so the same query always yields the
+    same, plausible object. Fields neither knows about are filled from the
+    field's type and description (first listed option, "No" for Yes/No).
+    """
+
+    def __init__(self):
+        self._router = None
+        self._analyzer = None
+
+    def _heuristics(self):
+        if self._router is None:
+            from agents.degraded import DegradedAnalyzer
+            from agents.fast_router import FastRouter
+            self._router = FastRouter()
+            self._analyzer = DegradedAnalyzer()
+        return self._router, self._analyzer
+
+    def build(self, schema: Type[BaseModel], query: str) -> BaseModel:
+        router, _ = self._heuristics()
+        classification, _ = router.classify(query)
+        return self._build(schema, query, classification.model_dump())
+
+    def _build(self, model: Type[BaseModel], query: str, routing: Dict[str, str],
+               extra: Optional[Dict[str, Any]] = None) -> BaseModel:
+        route = _literal(model, "agent_type") or next(
+            (ANALYSIS_ROUTES[base.__name__] for base in model.__mro__ if base.__name__ in ANALYSIS_ROUTES),
+            routing["agent_type"]
+        )
+        _, analyzer = self._heuristics()
+        hints = dict(routing)
+        hints.update(analyzer.fields(route, query, routing["urgency"], routing["has_safety_concern"] == "Yes") or {})
+        hints["agent_type"] = route
+        hints.update(extra or {})
+
+        values = {}
+        for name, field in model.model_fields.items():
+            values[name] = self._value(field.annotation, field.description or "", hints.get(name), query, routing)
+        return model(**values)
+
+    def _value(self, annotation: Any, description: str, hint: Any, query: str, routing: Dict[str, str]) -> Any:
+        options = _flatten(annotation)
+        models = [option for option in options if isinstance(option, type) and issubclass(option, BaseModel)]
+        if models:
+            chosen = next((m for m in models if _literal(m, "agent_type") == routing["agent_type"]), models[0])
+            return self._build(chosen, query, routing)
+        literals = [arg for option in options if typing.get_origin(option) is typing.Literal for arg in typing.get_args(option)]
+        if literals:
+            return hint if hint in literals else literals[0]
+        if hint is not None:
+            return hint
+        if int in options:
+            return 0
+        if float in options:
+            return 0.0
+        if bool in options:
+            return False
+        lists = [option for option in options if typing.get_origin(option) is list or option is list]
+        if lists:
+            item_types = typing.get_args(lists[0])
+            if item_types and isinstance(item_types[0], type) and issubclass(item_types[0], BaseModel):
+                return self._build_numbered(item_types[0], query)
+            return []
+        if "Yes or No" in description:
+            return "No"
+        listed = re.search(r":\s*([^()]+)", description)
+        if listed:
+            return re.split(r",\s*|\s+or\s+", listed.group(1).strip())[0].strip()
+        return query[:120]
+
+    def _build_numbered(self, model: Type[BaseModel], query: str) -> List[BaseModel]:
+        """One item per "N. text" line of a batched prompt, with ``index`` set to N"""
+        router, _ = self._heuristics()
+        items = []
+        for number, text in re.findall(r"^(\d+)\.\s*(.+)$", query, re.MULTILINE):
+            classification, _ = router.classify(text)
+            items.append(self._build(model, text, classification.model_dump(), {"index": int(number)}))
+        return items
+
+def _flatten(annotation: Any) -> List[Any]:
+    """Leaf types of an annotation, looking through Optional/Union/Annotated"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Annotated:
+        return _flatten(typing.get_args(annotation)[0])
+    if origin is typing.Union or type(annotation).__name__ == "UnionType":
+        return [leaf for arg in typing.get_args(annotation) for leaf in _flatten(arg)]
+    return [annotation]
+
+def _literal(model: Type[BaseModel], field_name: str) -> Optional[str]:
+    field = model.model_fields.get(field_name)
+    if field is not None and typing.get_origin(field.annotation) is typing.Literal:
+        return typing.get_args(field.annotation)[0]
+    return None
+
+def _query_of(messages: List[BaseMessage]) -> str:
+    """The student's text: the last non-system message, minus its 'Label:' prefix"""
+    text = _text(messages[-1].content) if messages else ""
+    return re.sub(r"^[A-Za-z ]{1,20}:\s*", "", text)
+
+synthesizer = StructuredOutputSynthesizer()
+
+class FakeStructuredLLM(Runnable):
+    """``with_structured_output`` counterpart of FakeChatModel"""
+
+    def __init__(self, settings: FakeLLMSettings, schema: Type[BaseModel], include_raw: bool = False):
+        self.settings = settings
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _result(self, prompt: Any) -> Any:
+        messages = _messages(prompt)
+        parsed = synthesizer.build(self.schema, _query_of(messages))
+        if not self.include_raw:
+            return parsed
+        output = parsed.model_dump_json()
+        raw = AIMessage(content=output, usage_metadata=_usage(messages, output))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        self.settings.delay_sync()
+        return self._result(input)
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        await self.settings.delay()
+        return self._result(input)
+
+class FakeChatModel(Runnable):
+    """Offline stand-in for ChatGroq (LLM_BACKEND=fake).
+
+    Plain calls (the vision path) return a fixed description; structured
+    calls return schema-valid objects from StructuredOutputSynthesizer.
+    Every call waits a latency sampled from the shared settings and may
+    raise an injected FakeLLMError.
+    """
+
+    def __init__(self, model_name: str, temperature: float, settings: FakeLLMSettings):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.settings = settings
+
+    def with_structured_output(self, schema: Type[BaseModel], include_raw: bool = False, **kwargs: Any) -> FakeStructuredLLM:
+        return FakeStructuredLLM(self.settings, schema, include_raw)
+
+    def _result(self, prompt: Any) -> AIMessage:
+        messages = _messages(prompt)
+        digest = zlib.crc32(json.dumps([_text(m.content) for m in messages]).encode())
+        output = f"{VISION_DESCRIPTION} [ref {digest:08x}]"
+        return AIMessage(content=output, usage_metadata=_usage(messages, output))
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> AIMessage:
+        self.settings.delay_sync()
+        return self._result(input)
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs: Any) -> AIMessage:
+        await self.settings.delay()
+        return self._result(input)
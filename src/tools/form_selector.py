@@ -0,0 +1,35 @@
+# src/tools/form_selector.py
+from typing import Optional, Tuple
+from config.form_links import FormLinks
+
+# Categories worth flagging on the lost item form (the office checks these first)
+VALUABLE_ITEMS = ("electronics", "documents", "keys")
+
+class FormSelector:
+    """Pick the form a student should fill in, with a one-line explanation"""
+
+    @staticmethod
+    def get_complaint_form(issue_type: str, severity: str) -> Tuple[str, str]:
+        link = FormLinks.get_complaint_form(issue_type)
+        explanation = f"The {issue_type.lower()} complaint form goes straight to the team that fixes it."
+        if severity.lower() in ("major", "critical"):
+            explanation += " Mention that this is a high-priority issue when you fill it in."
+        return link, explanation
+
+    @staticmethod
+    def get_lost_found_form(is_lost: bool, item_category: str) -> Tuple[str, str]:
+        if not is_lost:
+            return FormLinks.FOUND_ITEM, "Registering the item lets the office match it with lost item reports."
+        explanation = "A lost item report is compared with every item handed in at reception."
+        if item_category.lower() in VALUABLE_ITEMS:
+            explanation += f" Reports for {item_category.lower()} are checked first."
+        return FormLinks.LOST_ITEM, explanation
+
+    @staticmethod
+    def get_mess_form(form_type: str, concern_level: Optional[str] = None) -> Tuple[str, str]:
+        if form_type.lower() != "complaint":
+            return FormLinks.MESS_FEEDBACK, "The mess committee reviews feedback and requests every week."
+        explanation = "The mess complaint form is reviewed by the mess manager within 24 hours."
+        if concern_level == "health_concern":
+            explanation = "Health complaints are escalated to the mess manager and the hostel doctor the same day."
+        return FormLinks.MESS_COMPLAINT, explanation
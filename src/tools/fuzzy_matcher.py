@@ -0,0 +1,296 @@
+# src/tools/fuzzy_matcher.py
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Words students use for the same thing, folded together before n-gramming so
+# "dark earbuds" and "black earphones" share most of their features
+SYNONYMS = {
+    "earbuds": "earphones", "earbud": "earphones", "headphones": "earphones", "headphone": "earphones",
+    "airpods": "earphones", "tws": "earphones", "earphone": "earphones", "headset": "earphones",
+    "mobile": "phone", "cellphone": "phone", "smartphone": "phone", "iphone": "phone", "cell": "phone",
+    "notebook": "laptop", "macbook": "laptop", "adapter": "charger", "cable": "charger",
+    "specs": "glasses", "spectacles": "glasses", "sunglasses": "glasses", "shades": "glasses",
+    "purse": "wallet", "billfold": "wallet", "pouch": "case", "cover": "case", "box": "case",
+    "flask": "bottle", "sipper": "bottle",
+    "hoodie": "jacket", "sweatshirt": "jacket", "sweater": "jacket", "jumper": "jacket",
+    "sneakers": "shoes", "slippers": "shoes", "chappals": "shoes", "sandals": "shoes",
+    "id": "idcard", "icard": "idcard", "keychain": "keys", "key": "keys",
+    "dark": "black", "navy": "blue", "grey": "gray", "silver": "gray",
+}
+# Report boilerplate that says nothing about the item itself
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "is", "it", "i", "my", "me", "near", "with",
+    "for", "from", "that", "this", "have", "has", "had", "was", "were", "are", "be", "lost", "found",
+    "missing", "someone", "somebody", "anyone", "please", "help", "item", "left", "lying", "since", "seen",
+    "last", "yesterday", "today", "morning", "evening", "night", "our", "its", "you", "your", "can", "cant",
+    "not", "there", "think", "when", "where", "which", "what", "been", "just", "also", "some", "one",
+    "picked", "up", "logo", "block",
+}
+NGRAM = 3
+# Hash buckets for n-grams: far more than the ~50k distinct character trigrams, and
+# per matcher the document-frequency and posting-offset arrays cost 16 bytes each
+DEFAULT_FEATURES = 1 << 18
+# Below this many documents every query n-gram is scored (document frequencies are too noisy to prune by)
+MIN_DOCS_FOR_MAX_DF = 1000
+
+def normalize(text: str) -> str:
+    """Lower-cased content words with synonyms folded, space-padded for n-gramming"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return " " + " ".join(SYNONYMS.get(word, word) for word in words if word not in STOPWORDS) + " "
+
+def featurize(texts: Sequence[str], features: int = DEFAULT_FEATURES) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hashed character n-gram counts for many texts at once, as COO (doc, feature, count) arrays"""
+    joined = "\0".join(normalize(text) for text in texts).encode()
+    buffer = np.frombuffer(joined, dtype=np.uint8).astype(np.uint64)
+    if len(buffer) < NGRAM:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+
+    windows = [buffer[i:len(buffer) - NGRAM + 1 + i] for i in range(NGRAM)]
+    codes = np.zeros_like(windows[0])
+    valid = np.ones(len(codes), dtype=bool)
+    for window in windows:
+        codes = (codes << np.uint64(8)) | window
+        valid &= window != 0
+    # Each separator starts the next document
+    docs = np.cumsum(buffer == 0)[:len(codes)]
+    hashed = (codes * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(40)
+    feature_ids = (hashed % np.uint64(features)).astype(np.int64)
+
+    pairs, counts = np.unique(docs[valid].astype(np.int64) * features + feature_ids[valid], return_counts=True)
+    return pairs // features, pairs % features, counts.astype(np.float32)
+
+class _Growable:
+    """Append-only numpy column with amortized doubling"""
+
+    def __init__(self, dtype):
+        self.data = np.empty(1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop the values where ``mask`` is False, keeping the order"""
+        kept = self.values[mask]
+        self.data[:len(kept)] = kept
+        self.size = len(kept)
+
+class FuzzyMatcher:
+    """TF-IDF cosine matching of short item descriptions over hashed character n-grams.
+
+    Documents live in a feature-major sparse matrix (CSC layout: one slice of
+    document ids and weights per n-gram), so scoring a description against
+    every document is a single gather plus ``np.bincount`` over the postings
+    of its ~40 n-grams. New documents go to a small delta that is scored by
+    scan and folded into the matrix once it exceeds ``rebuild_ratio`` of the
+    indexed documents. Category and time filters are applied to the scores
+    with vectorized masks. The per-feature arrays are allocated on first
+    use, so an empty matcher costs next to nothing. Removed documents are
+    masked out of results at once and dropped from the matrix by the next
+    rebuild.
+    """
+
+    def __init__(self, features: int = DEFAULT_FEATURES, rebuild_ratio: float = 0.1, min_rebuild: int = 2048,
+                 max_df: float = 0.1):
+        self.features = features
+        # Query n-grams found in more than this share of documents are skipped (they barely change the ranking)
+        self.max_df = max_df
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+        self.keys: List[Any] = []
+        self.category_ids: Dict[str, int] = {}
+        self.categories = _Growable(np.int32)
+        self.created = _Growable(np.float64)
+        self.alive = _Growable(np.bool_)
+        self.docs_by_key: Dict[Any, List[int]] = defaultdict(list)
+        self.removed = 0
+        # Raw n-gram counts of every document, kept for rebuilds
+        self.coo_docs = _Growable(np.int64)
+        self.coo_features = _Growable(np.int64)
+        self.coo_counts = _Growable(np.float32)
+        # Documents per feature; allocated with the first document
+        self.df: Optional[np.ndarray] = None
+
+        self.indexed_docs = 0
+        self.indexed_nnz = 0
+        # Posting offsets per feature; allocated by the first rebuild
+        self.indptr: Optional[np.ndarray] = None
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.float32)
+        self.rebuilds = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "FuzzyMatcher":
+        return cls(features=int(os.getenv("FUZZY_MATCH_FEATURES", str(DEFAULT_FEATURES))), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.removed
+
+    def add(self, key: Any, text: str, category: str = "other", created_at: Optional[float] = None) -> None:
+        self.add_many([key], [text], [category], [created_at or time.time()])
+
+    def add_many(self, keys: Sequence[Any], texts: Sequence[str], categories: Sequence[str],
+                 created_at: Sequence[float]) -> None:
+        """Add documents in one vectorized featurization pass"""
+        offset = len(self.keys)
+        docs, feature_ids, counts = featurize(texts, self.features)
+        self.keys.extend(keys)
+        for doc, key in enumerate(keys, offset):
+            self.docs_by_key[key].append(doc)
+        self.alive.extend(np.ones(len(keys), dtype=np.bool_))
+        self.categories.extend(np.array([self._category_id(c) for c in categories], dtype=np.int32))
+        self.created.extend(np.asarray(created_at, dtype=np.float64))
+        self.coo_docs.extend(docs + offset)
+        self.coo_features.extend(feature_ids)
+        self.coo_counts.extend(counts)
+        if self.df is None:
+            self.df = np.zeros(self.features, dtype=np.int64)
+        # featurize() yields each (document, feature) pair once, so counts are document frequencies
+        touched, doc_counts = np.unique(feature_ids, return_counts=True)
+        self.df[touched] += doc_counts
+        if len(self.keys) - self.indexed_docs > max(self.min_rebuild, self.rebuild_ratio * self.indexed_docs):
+            self.rebuild()
+
+    def remove(self, key: Any) -> int:
+        """Stop matching every document added under ``key``; returns how many were removed"""
+        docs = self.docs_by_key.pop(key, [])
+        coo_docs = self.coo_docs.values
+        for doc in docs:
+            self.alive.data[doc] = False
+            # Each document's n-grams are one contiguous run of the doc-sorted COO arrays
+            start, end = np.searchsorted(coo_docs, [doc, doc + 1])
+            self.df[self.coo_features.values[start:end]] -= 1
+        self.removed += len(docs)
+        if self.removed > max(self.min_rebuild, self.rebuild_ratio * len(self)):
+            self.rebuild()
+        return len(docs)
+
+    def _compact(self) -> None:
+        """Drop removed documents from every column, renumbering the rest in order"""
+        alive = self.alive.values.copy()
+        new_ids = np.cumsum(alive) - 1
+        kept = alive[self.coo_docs.values]
+        self.coo_features.keep(kept)
+        self.coo_counts.keep(kept)
+        self.coo_docs.keep(kept)
+        self.coo_docs.data[:self.coo_docs.size] = new_ids[self.coo_docs.values]
+        self.keys = [key for key, live in zip(self.keys, alive) if live]
+        self.categories.keep(alive)
+        self.created.keep(alive)
+        self.alive.keep(alive)
+        self.docs_by_key = defaultdict(list)
+        for doc, key in enumerate(self.keys):
+            self.docs_by_key[key].append(doc)
+        self.removed = 0
+
+    def _category_id(self, category: str) -> int:
+        return self.category_ids.setdefault(category.lower(), len(self.category_ids))
+
+    def _idf(self, feature_ids: np.ndarray) -> np.ndarray:
+        return (np.log((1 + len(self)) / (1 + self.df[feature_ids])) + 1).astype(np.float32)
+
+    def _doc_weights(self, docs: np.ndarray, feature_ids: np.ndarray, counts: np.ndarray,
+                     doc_count: int, doc_offset: int = 0) -> np.ndarray:
+        """Sublinear tf * idf, L2-normalized per document"""
+        weights = (1 + np.log(counts)) * self._idf(feature_ids)
+        norms = np.sqrt(np.bincount(docs - doc_offset, weights * weights, minlength=doc_count))
+        return (weights / np.maximum(norms[docs - doc_offset], 1e-12)).astype(np.float32)
+
+    def rebuild(self) -> None:
+        """Fold every document into the feature-major matrix with fresh IDF weights"""
+        if self.removed:
+            self._compact()
+        docs, feature_ids, counts = self.coo_docs.values, self.coo_features.values, self.coo_counts.values
+        weights = self._doc_weights(docs, feature_ids, counts, len(self.keys))
+        order = np.argsort(feature_ids, kind="stable")
+        self.doc_ids = docs[order].astype(np.int32)
+        self.weights = weights[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(feature_ids, minlength=self.features))))
+        self.indexed_docs = len(self.keys)
+        self.indexed_nnz = len(docs)
+        self.rebuilds += 1
+
+    def search(self, text: str, categories: Optional[Iterable[str]] = None, since: Optional[float] = None,
+               limit: int = 5, min_score: float = 0.0) -> List[Tuple[Any, float]]:
+        """Best (key, cosine) matches for ``text``, optionally only in ``categories`` and created after ``since``"""
+        started = time.perf_counter()
+        _, q_features, q_counts = featurize([text], self.features)
+        if not len(q_features) or not len(self):
+            return []
+        q_weights = (1 + np.log(q_counts)) * self._idf(q_features)
+        q_weights /= np.linalg.norm(q_weights)
+        # Normalized over every n-gram, then the very common ones are left out of the gather
+        if len(self) >= MIN_DOCS_FOR_MAX_DF:
+            rare = self.df[q_features] <= self.max_df * len(self)
+            q_features, q_weights = q_features[rare], q_weights[rare]
+            if not len(q_features):
+                return []
+
+        scores = np.zeros(len(self.keys), dtype=np.float32)
+        if self.indexed_docs:
+            starts, ends = self.indptr[q_features], self.indptr[q_features + 1]
+            lengths = ends - starts
+            positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+            contributions = self.weights[positions] * np.repeat(q_weights, lengths).astype(np.float32)
+            scores[:self.indexed_docs] = np.bincount(self.doc_ids[positions], contributions, minlength=self.indexed_docs)
+        if len(self.keys) > self.indexed_docs:
+            scores[self.indexed_docs:] = self._score_delta(q_features, q_weights)
+
+        candidates = np.flatnonzero(scores > min_score)
+        if self.removed:
+            candidates = candidates[self.alive.values[candidates]]
+        if categories is not None:
+            allowed = [self.category_ids[c.lower()] for c in categories if c.lower() in self.category_ids]
+            candidates = candidates[np.isin(self.categories.values[candidates], allowed)]
+        if since is not None:
+            candidates = candidates[self.created.values[candidates] >= since]
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        self.searches += 1
+        self.search_seconds += time.perf_counter() - started
+        return [(self.keys[doc], round(float(scores[doc]), 3)) for doc in ranked]
+
+    def _score_delta(self, q_features: np.ndarray, q_weights: np.ndarray) -> np.ndarray:
+        """Scores of documents added since the last rebuild, weighted with the current IDF"""
+        start = self.indexed_nnz
+        docs = self.coo_docs.values[start:]
+        feature_ids = self.coo_features.values[start:]
+        counts = self.coo_counts.values[start:]
+        delta_count = len(self.keys) - self.indexed_docs
+        weights = self._doc_weights(docs, feature_ids, counts, delta_count, self.indexed_docs)
+        # q_features is sorted (np.unique), so membership is a binary search
+        slots = np.minimum(np.searchsorted(q_features, feature_ids), len(q_features) - 1)
+        shared = q_features[slots] == feature_ids
+        contributions = np.where(shared, weights * q_weights[slots], 0)
+        return np.bincount(docs - self.indexed_docs, contributions, minlength=delta_count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self),
+            "removed_pending_rebuild": self.removed,
+            "indexed_documents": self.indexed_docs,
+            "pending_documents": len(self.keys) - self.indexed_docs,
+            "nonzeros": self.coo_docs.size,
+            "features": self.features,
+            "rebuilds": self.rebuilds,
+            "searches": self.searches,
+            "avg_search_ms": round(1000 * self.search_seconds / self.searches, 3) if self.searches else 0.0,
+        }
@@ -1,19 +1,213 @@
 # src/tools/groq_client.py
+import asyncio
 import os
+import time
+import warnings
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+import httpx
 from langchain_groq import ChatGroq
+from tools.circuit_breaker import llm_breaker
+from tools.fake_llm import FakeChatModel, FakeLLMSettings
+from tools.hedging import llm_hedger
+from tools.rate_limiter import llm_limiter
+from tools.token_accounting import extract_usage, token_meter
+from utils.deadline import DeadlineExceeded, current_deadline
 
-def get_groq_llm(model: str = "openai/gpt-oss-20b", temperature: float = 0.3):
+DEFAULT_MODEL = "openai/gpt-oss-20b"
+VISION_MODEL = "openai/gpt-oss-20b"
+GROQ_API_BASE = "https://api.groq.com/openai/v1"
+# Rough completion size reserved against the TPM budget for each call
+OUTPUT_TOKEN_ALLOWANCE = 300
+
+class LLMClientManager:
+    """Shared ChatGroq clients over one pooled, keep-alive HTTP connection pool.
+
+    Clients are cached per (model, temperature), so agents built at startup
+    and the vision path all reuse the same connections instead of opening a
+    new pool (and TLS handshake) per request. With ``backend="fake"`` the
+    clients are offline FakeChatModels (see tools/fake_llm.py) for load and
+    latency testing without an API key.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 60.0, http2: bool = False,
+                 backend: str = "groq", fake_settings: Optional[FakeLLMSettings] = None):
+        if backend not in ("groq", "fake"):
+            raise ValueError(f"Unknown LLM backend: {backend}")
+        self.backend = backend
+        self.fake_settings = fake_settings or (FakeLLMSettings.from_env() if backend == "fake" else None)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        self.http2 = http2 and self._http2_available()
+        self._clients: Dict[Tuple[str, float], Union[ChatGroq, FakeChatModel]] = {}
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._sync_http: Optional[httpx.Client] = None
+
+    @classmethod
+    def from_env(cls) -> "LLMClientManager":
+        return cls(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+            http2=os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes"),
+            backend=os.getenv("LLM_BACKEND", "groq").lower()
+        )
+
+    @staticmethod
+    def _http2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            warnings.warn("LLM_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            return False
+
+    @property
+    def async_http(self) -> httpx.AsyncClient:
+        if self._async_http is None or self._async_http.is_closed:
+            self._async_http = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self._async_http
+
+    @property
+    def sync_http(self) -> httpx.Client:
+        if self._sync_http is None or self._sync_http.is_closed:
+            self._sync_http = httpx.Client(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self._sync_http
+
+    def get_llm(self, model: str = DEFAULT_MODEL, temperature: float = 0.3) -> Union[ChatGroq, FakeChatModel]:
+        key = (model, temperature)
+        llm = self._clients.get(key)
+        if llm is None and self.backend == "fake":
+            llm = self._clients[key] = FakeChatModel(model, temperature, self.fake_settings)
+        elif llm is None:
+            llm = ChatGroq(
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                model_name=model,
+                temperature=temperature,
+                http_client=self.sync_http,
+                http_async_client=self.async_http
+            )
+            self._clients[key] = llm
+        return llm
+
+    async def warm_up(self, models: Iterable[Tuple[str, float]] = ((DEFAULT_MODEL, 0.3), (VISION_MODEL, 0.2))) -> None:
+        """Build the common clients and open a pooled connection to the API"""
+        for model, temperature in models:
+            self.get_llm(model, temperature)
+        if self.backend == "fake":
+            return
+        try:
+            await self.async_http.get(
+                f"{os.getenv('GROQ_API_BASE', GROQ_API_BASE)}/models",
+                headers={"Authorization": f"Bearer {os.getenv('GROQ_API_KEY', '')}"}
+            )
+        except httpx.HTTPError as e:
+            warnings.warn(f"LLM connection warm-up failed: {e}")
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on server shutdown)"""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+        if self._sync_http is not None:
+            self._sync_http.close()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "backend": self.backend,
+            "clients": [f"{model}@{temperature}" for model, temperature in self._clients],
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+        if self.fake_settings is not None:
+            stats["fake"] = self.fake_settings.stats()
+        return stats
+
+client_manager = LLMClientManager.from_env()
+
+def get_groq_llm(model: str = DEFAULT_MODEL, temperature: float = 0.3):
     """Get Groq LLM instance"""
-    return ChatGroq(
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        model_name=model,
-        temperature=temperature
-    )
+    return client_manager.get_llm(model, temperature)
 
 def get_vision_llm():
     """Get Groq vision model"""
-    return ChatGroq(
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        model_name="openai/gpt-oss-20b",
-        temperature=0.2
-    )
\ No newline at end of file
+    return client_manager.get_llm(VISION_MODEL, 0.2)
+
+def estimate_tokens(*texts: Any) -> int:
+    """Cheap prompt+completion token estimate (~4 characters per token)"""
+    return sum(len(str(text)) for text in texts) // 4 + OUTPUT_TOKEN_ALLOWANCE
+
+def _account(result: Any, agent: str, stage: str, latency: float, system_prompt_chars: int,
+             estimated_tokens: int) -> Any:
+    """Record the call's token usage; unwrap include_raw structured output to the parsed model"""
+    raw_output = isinstance(result, dict) and "raw" in result and "parsed" in result
+    message = result["raw"] if raw_output else result
+    input_tokens, output_tokens = extract_usage(message)
+    if input_tokens or output_tokens:
+        token_meter.record(agent, stage, input_tokens, output_tokens, latency, system_prompt_chars)
+        llm_limiter.settle(estimated_tokens, input_tokens + output_tokens)
+    if not raw_output:
+        return result
+    if result.get("parsing_error") is not None:
+        raise result["parsing_error"]
+    return result["parsed"]
+
+async def invoke_llm(runnable, inputs: Any, estimated_tokens: int, stage: str = "analysis",
+                     agent: str = "unknown", system_prompt_chars: int = 0):
+    """Invoke an LLM runnable under the circuit breaker, admission control, the request deadline and hedging.
+
+    The breaker sees one outcome per logical call, however many hedged
+    attempts ran. A call that never reached the LLM (shed by the limiter,
+    cancelled) records nothing, and a half-open probe gives its slot back.
+    Once the stage has history, its observed average usage replaces the
+    caller's character-based estimate for the TPM reservation.
+    """
+    estimated_tokens = token_meter.expected_tokens(agent, stage) or estimated_tokens
+    llm_latency = None
+
+    async def attempt():
+        nonlocal llm_latency
+        async with llm_limiter.slot(estimated_tokens):
+            started = time.monotonic()
+            try:
+                return _account(await runnable.ainvoke(inputs), agent, stage,
+                                time.monotonic() - started, system_prompt_chars, estimated_tokens)
+            finally:
+                llm_latency = time.monotonic() - started
+
+    deadline = current_deadline.get()
+    timeout = None
+    if deadline is not None:
+        timeout = deadline.stage_timeout(stage)
+        if timeout <= 0:
+            raise DeadlineExceeded(stage)
+    probe = llm_breaker.before_call()
+    recorded = False
+    try:
+        result = await llm_hedger.call(stage, attempt, timeout)
+        llm_breaker.record(llm_latency)
+        recorded = True
+        return result
+    except DeadlineExceeded as e:
+        # The attempts were cancelled, so count the timeout as a failed call here
+        llm_breaker.record(timeout, e)
+        recorded = True
+        raise
+    except Exception as e:
+        # Only an attempt that reached the provider is a backend outcome; LLMOverloadedError means
+        # every attempt was shed by the limiter
+        if llm_latency is not None:
+            llm_breaker.record(llm_latency, e)
+            recorded = True
+        raise
+    finally:
+        # Speculation or hedge loser, the client went away, or the call was shed: no outcome,
+        # so a probe must not keep its slot
+        if probe and not recorded:
+            llm_breaker.release_probe()
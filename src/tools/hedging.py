@@ -0,0 +1,109 @@
+# src/tools/hedging.py
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from utils.deadline import DeadlineExceeded
+
+class Hedger:
+    """Hedged LLM calls driven by observed per-stage latency.
+
+    When a call is still running after the stage's ``percentile`` latency, a
+    duplicate is started and whichever finishes first wins; the other is
+    cancelled. Hedges are capped at ``max_fraction`` of calls so tail
+    latency drops without raising average spend much.
+    """
+
+    def __init__(self, percentile: float = 0.95, max_fraction: float = 0.1, min_samples: int = 20,
+                 window: int = 200, enabled: bool = True):
+        self.percentile = percentile
+        self.max_fraction = max_fraction
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._window = window
+        self.counters = Counter()
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        return cls(
+            percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+            max_fraction=float(os.getenv("HEDGE_MAX_FRACTION", "0.1")),
+            enabled=os.getenv("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+        )
+
+    def observe(self, stage: str, latency: float) -> None:
+        self._latencies.setdefault(stage, deque(maxlen=self._window)).append(latency)
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Latency after which a call in this stage should be hedged (None = don't hedge)"""
+        samples = self._latencies.get(stage)
+        if not self.enabled or samples is None or len(samples) < self.min_samples:
+            return None
+        if self.counters["hedged"] >= self.max_fraction * max(self.counters["calls"], 1):
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    async def call(self, stage: str, factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Run ``factory()``, hedging once if it is slow, within ``timeout`` seconds"""
+        self.counters["calls"] += 1
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        hedge_delay = self.hedge_delay(stage)
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+
+        primary = asyncio.ensure_future(factory())
+        tasks = {primary}
+        try:
+            while True:
+                now = time.monotonic()
+                wait = None if deadline is None else max(0.0, deadline - now)
+                if hedge_at is not None:
+                    until_hedge = max(0.0, hedge_at - now)
+                    wait = until_hedge if wait is None else min(wait, until_hedge)
+
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                error = None
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        self.observe(stage, time.monotonic() - started)
+                        if task is not primary:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+                if error is not None and not tasks:
+                    raise error
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    self.counters["deadline_exceeded"] += 1
+                    raise DeadlineExceeded(stage)
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    self.counters["hedged"] += 1
+                    tasks.add(asyncio.ensure_future(factory()))
+        finally:
+            for task in tasks:
+                task.cancel()
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def stats(self) -> Dict[str, Any]:
+        stages = {}
+        for stage, samples in self._latencies.items():
+            ordered = sorted(samples)
+            stages[stage] = {
+                "samples": len(ordered),
+                "p50_ms": round(1000 * ordered[len(ordered) // 2], 1),
+                "p95_ms": round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1),
+            }
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            **dict(self.counters),
+            "stages": stages,
+        }
+
+llm_hedger = Hedger.from_env()
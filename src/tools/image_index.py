@@ -0,0 +1,213 @@
+# src/tools/image_index.py
+import asyncio
+import io
+import os
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageOps
+from tools.image_preprocessor import MAX_IMAGE_PIXELS, ImageProcessingError, image_preprocessor
+
+HASH_BITS = 64
+# Report kinds and the kind each one is matched against
+OPPOSITE_KIND = {"lost": "found", "found": "lost"}
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+@lru_cache(maxsize=None)
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+def phash(gray: Image.Image) -> int:
+    """64-bit DCT perceptual hash: low frequencies of a 32x32 thumbnail against their median"""
+    pixels = np.asarray(gray.resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+    dct = _dct_matrix(32) @ pixels @ _dct_matrix(32).T
+    low = dct[:8, :8].ravel()
+    # The DC term only encodes overall brightness
+    return _bits_to_int(low > np.median(low[1:]))
+
+def dhash(gray: Image.Image) -> int:
+    """64-bit difference hash: is each pixel of a 9x8 thumbnail brighter than its left neighbour"""
+    pixels = np.asarray(gray.resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def image_hashes(image: bytes) -> Tuple[int, int]:
+    """(pHash, dHash) of encoded image bytes; oversized or corrupt images raise ImageProcessingError"""
+    try:
+        with Image.open(io.BytesIO(image)) as img:
+            # Checked from the header, before anything is decoded
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise Image.DecompressionBombError(f"{img.width}x{img.height} exceeds {MAX_IMAGE_PIXELS} pixels")
+            img.draft("L", (64, 64))
+            gray = ImageOps.exif_transpose(img).convert("L")
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(f"Unsupported or corrupt image: {e}") from e
+    return phash(gray), dhash(gray)
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits: int, max_flips: int) -> Tuple[int, ...]:
+    """Every mask of ``bits`` bits with at most ``max_flips`` bits set"""
+    return tuple(
+        sum(1 << bit for bit in chosen)
+        for flips in range(max_flips + 1)
+        for chosen in combinations(range(bits), flips)
+    )
+
+class ImageMatch(NamedTuple):
+    report_id: str
+    distance: int
+    similarity: float
+    metadata: Dict[str, Any]
+
+class MultiIndexHash:
+    """Sub-linear Hamming-radius search over 64-bit hashes.
+
+    Each hash is split into ``chunks`` substrings, each indexed in its own
+    table. Two hashes within distance r must agree to within r // chunks bits
+    on at least one substring (pigeonhole), so a query only probes the
+    buckets near its own substrings instead of scanning every entry.
+    """
+
+    def __init__(self, chunks: int = 4):
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.tables: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(chunks)]
+        self.keys: List[int] = []
+        self.values: List[Any] = []
+        self.removed = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.removed
+
+    def _parts(self, key: int):
+        for chunk in range(self.chunks):
+            yield chunk, (key >> (chunk * self.chunk_bits)) & self.chunk_mask
+
+    def add(self, key: int, value: Any) -> int:
+        """Index ``value`` under ``key``; returns its slot (for ``remove``)"""
+        slot = len(self.keys)
+        self.keys.append(key)
+        self.values.append(value)
+        for chunk, part in self._parts(key):
+            self.tables[chunk][part].append(slot)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        for chunk, part in self._parts(self.keys[slot]):
+            bucket = self.tables[chunk][part]
+            bucket.remove(slot)
+            if not bucket:
+                del self.tables[chunk][part]
+        self.values[slot] = None
+        self.removed += 1
+
+    def search(self, key: int, radius: int) -> Tuple[List[Tuple[int, Any]], int]:
+        """(distance, value) pairs within ``radius``, and the number of candidates checked"""
+        seen = set()
+        found = []
+        for chunk, part in self._parts(key):
+            table = self.tables[chunk]
+            for flip in _flip_masks(self.chunk_bits, radius // self.chunks):
+                for slot in table.get(part ^ flip, ()):
+                    if slot in seen:
+                        continue
+                    seen.add(slot)
+                    distance = hamming(key, self.keys[slot])
+                    if distance <= radius:
+                        found.append((distance, self.values[slot]))
+        return found, len(seen)
+
+class ImageIndex:
+    """Perceptual-hash index of lost and found item photos.
+
+    Photos are searched by pHash within ``max_distance`` bits and ranked by
+    the combined pHash + dHash distance, so a found item's photo turns up the
+    lost reports showing the same object even after recompression, resizing
+    or small crops. Hashing runs on the image worker pool.
+    """
+
+    def __init__(self, max_distance: int = 10, max_results: int = 3):
+        self.max_distance = max_distance
+        self.max_results = max_results
+        self.indexes = {kind: MultiIndexHash() for kind in OPPOSITE_KIND}
+        self.dhashes: Dict[str, int] = {}
+        self.slots: Dict[str, Tuple[str, int]] = {}
+        self.counters = Counter()
+        self.search_seconds = 0.0
+        self.candidates_checked = 0
+
+    @classmethod
+    def from_env(cls) -> "ImageIndex":
+        return cls(
+            max_distance=int(os.getenv("IMAGE_MATCH_MAX_DISTANCE", "10")),
+            max_results=int(os.getenv("IMAGE_MATCH_MAX_RESULTS", "3"))
+        )
+
+    async def hash(self, image: bytes) -> Tuple[int, int]:
+        """Hashes of a report's photo, computed off the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(image_preprocessor.executor, image_hashes, image)
+        except ImageProcessingError:
+            self.counters["rejected"] += 1
+            raise
+
+    def add(self, kind: str, report_id: str, hashes: Tuple[int, int], metadata: Optional[Dict[str, Any]] = None) -> None:
+        phash_value, dhash_value = hashes
+        self.slots[report_id] = (kind, self.indexes[kind].add(phash_value, (report_id, metadata or {})))
+        self.dhashes[report_id] = dhash_value
+        self.counters[f"{kind}_indexed"] += 1
+
+    def remove(self, report_id: str) -> bool:
+        """Stop matching a closed report's photo; False if it had none indexed"""
+        located = self.slots.pop(report_id, None)
+        if located is None:
+            return False
+        kind, slot = located
+        self.indexes[kind].remove(slot)
+        del self.dhashes[report_id]
+        self.counters[f"{kind}_removed"] += 1
+        return True
+
+    def search(self, kind: str, hashes: Tuple[int, int], limit: Optional[int] = None) -> List[ImageMatch]:
+        """Closest ``kind`` reports to a photo, best first"""
+        started = time.perf_counter()
+        phash_value, dhash_value = hashes
+        found, checked = self.indexes[kind].search(phash_value, self.max_distance)
+        ranked = sorted(
+            (distance + hamming(dhash_value, self.dhashes[report_id]), distance, report_id, metadata)
+            for distance, (report_id, metadata) in found
+        )
+        matches = [
+            ImageMatch(report_id, distance, round(1 - combined / (2 * HASH_BITS), 3), metadata)
+            for combined, distance, report_id, metadata in ranked[:limit or self.max_results]
+        ]
+        self.counters["searches"] += 1
+        self.counters["matches"] += len(matches)
+        self.candidates_checked += checked
+        self.search_seconds += time.perf_counter() - started
+        return matches
+
+    def stats(self) -> Dict[str, Any]:
+        searches = self.counters["searches"]
+        return {
+            **dict(self.counters),
+            "entries": {kind: len(index) for kind, index in self.indexes.items()},
+            "max_distance": self.max_distance,
+            "avg_search_ms": round(1000 * self.search_seconds / searches, 3) if searches else 0.0,
+            "avg_candidates_checked": round(self.candidates_checked / searches, 1) if searches else 0.0,
+        }
+
+image_index = ImageIndex.from_env()
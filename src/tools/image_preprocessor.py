@@ -0,0 +1,143 @@
+# src/tools/image_preprocessor.py
+import asyncio
+import base64
+import binascii
+import io
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple, Union
+from PIL import Image, ImageOps
+
+# Refuse images that would decode to more pixels than this (decompression bombs)
+MAX_IMAGE_PIXELS = 50_000_000
+
+class ImageProcessingError(ValueError):
+    """The payload is not an image we can decode"""
+
+class PreparedImage:
+    """Re-encoded image ready to send to the vision model"""
+
+    def __init__(self, data: bytes, mime_type: str, size: Tuple[int, int], original_format: str,
+                 original_size: Tuple[int, int], original_bytes: int):
+        self.data = data
+        self.mime_type = mime_type
+        self.size = size
+        self.original_format = original_format
+        self.original_size = original_size
+        self.original_bytes = original_bytes
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.to_base64()}"
+
+class ImagePreprocessor:
+    """Decode, downscale, strip metadata and re-encode images before vision calls.
+
+    The real format is sniffed from the bytes (not assumed to be JPEG), EXIF
+    orientation is applied, the longest side is capped at ``max_dimension``
+    and the result is re-encoded without metadata: JPEG at ``quality`` for
+    opaque images, optimized PNG for images with transparency. All Pillow
+    work runs on a thread pool so the event loop is never blocked.
+    """
+
+    def __init__(self, max_dimension: int = 1024, quality: int = 80, workers: int = 2):
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+        self.counters = Counter()
+        self.formats = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ImagePreprocessor":
+        return cls(
+            max_dimension=int(os.getenv("IMAGE_MAX_DIMENSION", "1024")),
+            quality=int(os.getenv("IMAGE_JPEG_QUALITY", "80")),
+            workers=int(os.getenv("IMAGE_WORKERS", "2"))
+        )
+
+    async def decode(self, image: Union[str, bytes]) -> bytes:
+        """Raw image bytes from base64 text, decoded off the event loop"""
+        if isinstance(image, bytes):
+            return image
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._decode, image)
+
+    def _decode(self, image: str) -> bytes:
+        try:
+            return base64.b64decode(image, validate=True)
+        except (binascii.Error, ValueError) as e:
+            self.counters["rejected"] += 1
+            raise ImageProcessingError(f"Invalid base64 image data: {e}") from e
+
+    async def prepare(self, image: Union[str, bytes]) -> PreparedImage:
+        """Prepare base64 text or raw bytes off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.prepare_sync, image)
+
+    def prepare_sync(self, image: Union[str, bytes]) -> PreparedImage:
+        started = time.process_time()
+        if isinstance(image, str):
+            image = self._decode(image)
+
+        try:
+            prepared = self._transcode(image)
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+            self.counters["rejected"] += 1
+            raise ImageProcessingError(f"Unsupported or corrupt image: {e}") from e
+
+        self.counters["processed"] += 1
+        if prepared.size != prepared.original_size:
+            self.counters["downscaled"] += 1
+        self.formats[prepared.original_format] += 1
+        self.bytes_in += prepared.original_bytes
+        self.bytes_out += len(prepared.data)
+        self.cpu_seconds += time.process_time() - started
+        return prepared
+
+    def _transcode(self, raw: bytes) -> PreparedImage:
+        with Image.open(io.BytesIO(raw)) as img:
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise Image.DecompressionBombError(f"{img.width}x{img.height} exceeds {MAX_IMAGE_PIXELS} pixels")
+            original_format = (img.format or "unknown").lower()
+            original_size = img.size
+            # Let JPEG decode straight at a reduced scale instead of full resolution
+            img.draft("RGB", (self.max_dimension, self.max_dimension))
+            img = ImageOps.exif_transpose(img)
+            if max(img.size) > self.max_dimension:
+                img.thumbnail((self.max_dimension, self.max_dimension), Image.Resampling.LANCZOS)
+
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            out = io.BytesIO()
+            if has_alpha:
+                img = img.convert("RGBA")
+                img.info = {}
+                img.save(out, format="PNG", optimize=True)
+                mime_type = "image/png"
+            else:
+                img = img.convert("RGB")
+                img.info = {}
+                img.save(out, format="JPEG", quality=self.quality, optimize=True)
+                mime_type = "image/jpeg"
+            return PreparedImage(out.getvalue(), mime_type, img.size, original_format, original_size, len(raw))
+
+    def stats(self) -> Dict[str, Any]:
+        processed = self.counters["processed"]
+        return {
+            **dict(self.counters),
+            "max_dimension": self.max_dimension,
+            "formats": dict(self.formats),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "compression_ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "avg_cpu_ms": round(1000 * self.cpu_seconds / processed, 1) if processed else 0.0,
+        }
+
+image_preprocessor = ImagePreprocessor.from_env()
@@ -0,0 +1,152 @@
+# src/tools/incident_tracker.py
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+from tools.complaint_store import ComplaintStore, Ticket, complaint_store
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.lost_found_store import extract_locations
+
+# Added to the text similarity for each place both complaints mention
+LOCATION_BONUS = 0.1
+ROOM_NUMBER_PATTERN = re.compile(r"\broom\s*(?:no\.?|number|#)?\s*(\d+[a-z]?)\b")
+# Issue type the keyword analyzer falls back to; it says nothing about the incident
+UNKNOWN_ISSUE_TYPE = "general"
+# Problems in a student's own room are theirs alone unless the room numbers agree
+PERSONAL_LOCATION = "room"
+HOUR = 3600
+
+def room_numbers(text: str) -> Set[str]:
+    return set(ROOM_NUMBER_PATTERN.findall(text.lower()))
+
+class IncidentTracker:
+    """Online clustering of duplicate complaints into incidents.
+
+    Every complaint text is indexed in a FuzzyMatcher under its incident
+    (the first ticket filed for it) and tagged with the incident's issue
+    type. A new complaint joins the best open incident whose complaints
+    were filed within the last ``window_hours`` and that is similar enough
+    (``min_score`` TF-IDF cosine, plus LOCATION_BONUS per shared place).
+    Complaints only join when they name the same places; complaints about a
+    student's own room also need the same room number. A block-wide outage
+    groups while one student's broken fan stays their own.
+    Joining complaints keep the window sliding for as long as reports come in.
+    """
+
+    def __init__(self, store: ComplaintStore = complaint_store, window_hours: float = 6, min_score: float = 0.45):
+        self.store = store
+        self.window_hours = window_hours
+        self.min_score = min_score
+        self.matcher = FuzzyMatcher.from_env(min_rebuild=256)
+        self._loaded = False
+        self.counters = Counter()
+
+    @classmethod
+    def from_env(cls) -> "IncidentTracker":
+        return cls(
+            window_hours=float(os.getenv("INCIDENT_WINDOW_HOURS", "6")),
+            min_score=float(os.getenv("INCIDENT_MIN_SCORE", "0.45"))
+        )
+
+    def load(self) -> None:
+        """Index complaints of still-open incidents from the ticket store once, blocking (scripts and tests)"""
+        if not self._loaded:
+            self.store.load()
+            self._index_recent()
+
+    async def warm_up(self) -> None:
+        """Load the ticket store off the event loop, then index its open incidents (server start, first request)"""
+        if not self._loaded:
+            await self.store.warm_up()
+            self._index_recent()
+
+    def _index_recent(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        since = time.time() - self.window_hours * HOUR
+        recent = [
+            ticket for ticket in self.store.tickets.values()
+            if ticket.incident_id is not None and ticket.created_at >= since
+        ]
+        recent.sort(key=lambda ticket: ticket.ticket_id)
+        self.matcher.add_many(
+            [t.incident_id for t in recent], [t.query for t in recent],
+            [self.store.tickets[t.incident_id].issue_type for t in recent], [t.created_at for t in recent]
+        )
+
+    def match(self, query: str, issue_type: Optional[str] = None) -> Optional[Ticket]:
+        """First ticket of the open incident this complaint duplicates, or None"""
+        self.counters["checked"] += 1
+        categories = None if issue_type in (None, UNKNOWN_ISSUE_TYPE) else [issue_type.lower()]
+        since = time.time() - self.window_hours * HOUR
+        hits = self.matcher.search(query, categories, since, limit=50, min_score=self.min_score / 2)
+
+        locations, rooms = set(extract_locations(query)), room_numbers(query)
+        best, best_score, seen = None, self.min_score, set()
+        for incident_id, score in hits:
+            if incident_id in seen:
+                continue
+            seen.add(incident_id)
+            incident = self.store.tickets[incident_id]
+            if incident.status == "resolved":
+                continue
+            places = set(incident.locations)
+            if (locations or places) and not locations & places:
+                continue
+            if PERSONAL_LOCATION in locations | places and (not rooms or rooms != room_numbers(incident.query)):
+                continue
+            score += LOCATION_BONUS * len(locations & places)
+            if score >= best_score:
+                best, best_score = incident, score
+        if best is not None:
+            self.counters["duplicates"] += 1
+        return best
+
+    def add(self, ticket: Ticket) -> None:
+        """Index a filed complaint under its incident"""
+        # Before loading, the load itself indexes every recent ticket, this one included
+        if self._loaded:
+            incident = self.store.tickets[ticket.incident_id]
+            self.matcher.add(ticket.incident_id, ticket.query, incident.issue_type, ticket.created_at)
+        if ticket.incident_id == ticket.ticket_id:
+            self.counters["incidents_opened"] += 1
+
+    def size(self, incident_id: int) -> int:
+        """Students who reported this incident"""
+        return len(self.store.by_incident.get(incident_id, ()))
+
+    def open_incidents(self, min_size: int = 2, limit: int = 20) -> List[Dict[str, Any]]:
+        """Unresolved incidents with at least ``min_size`` reports, largest first"""
+        incidents = []
+        for incident_id, members in self.store.by_incident.items():
+            incident = self.store.tickets[incident_id]
+            if len(members) < min_size or incident.status == "resolved":
+                continue
+            incidents.append({
+                "incident_id": incident_id,
+                "students_affected": len(members),
+                "issue_type": incident.issue_type,
+                "severity": incident.severity,
+                "status": incident.status,
+                "locations": incident.locations,
+                "summary": incident.query[:120],
+                "first_reported": incident.created_at,
+                "last_reported": max(self.store.tickets[ticket_id].created_at for ticket_id in members),
+            })
+        incidents.sort(key=lambda item: (-item["students_affected"], -item["last_reported"]))
+        return incidents[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        checked = self.counters["checked"]
+        largest = self.open_incidents(limit=5)
+        return {
+            **dict(self.counters),
+            "window_hours": self.window_hours,
+            "duplicate_rate": round(self.counters["duplicates"] / checked, 3) if checked else 0.0,
+            "largest_open_incidents": {item["incident_id"]: item["students_affected"] for item in largest},
+            "matcher": self.matcher.stats(),
+        }
+
+incident_tracker = IncidentTracker.from_env()
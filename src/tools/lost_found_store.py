@@ -0,0 +1,320 @@
+# src/tools/lost_found_store.py
+import asyncio
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.image_index import OPPOSITE_KIND
+
+# Places in and around the hostel, longest first so "common room" wins over "room"
+HOSTEL_LOCATIONS = sorted([
+    "mess", "dining hall", "canteen", "library", "study room", "reading room", "common room", "tv room",
+    "reception", "hostel office", "main gate", "gate", "gym", "laundry", "drying lines", "bathroom",
+    "washroom", "corridor", "staircase", "lift", "parking", "ground", "court", "classroom", "lab",
+    "terrace", "room",
+], key=len, reverse=True)
+LOCATION_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, HOSTEL_LOCATIONS)) + r")\b")
+BLOCK_PATTERN = re.compile(r"\b(block|wing|floor) ([a-z0-9]+)\b")
+KINDS = tuple(OPPOSITE_KIND)
+# Added to the description similarity for each place both reports mention
+LOCATION_BONUS = 0.1
+DAY = 86400
+# Report lifecycle: open reports are matched; claimed (item back with its owner) and expired ones are not
+REPORT_STATUSES = ("open", "claimed", "expired")
+# Seconds between sweeps for reports past ``expire_days``
+EXPIRY_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    item_category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    locations TEXT NOT NULL,
+    phash TEXT,
+    dhash TEXT,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open'
+);
+CREATE INDEX IF NOT EXISTS reports_by_category ON reports (kind, item_category);
+"""
+
+class LostFoundReport(BaseModel):
+    """One lost or found item report"""
+    report_id: str
+    kind: str
+    item_category: str
+    description: str
+    locations: List[str] = []
+    phash: Optional[int] = None
+    dhash: Optional[int] = None
+    created_at: float = 0.0
+    status: str = "open"
+
+    @property
+    def hashes(self) -> Optional[Tuple[int, int]]:
+        return (self.phash, self.dhash) if self.phash is not None else None
+
+def extract_locations(text: str) -> List[str]:
+    """Hostel places mentioned in a report ("mess", "block c", ...)"""
+    text = text.lower()
+    found = [match.group(1) for match in LOCATION_PATTERN.finditer(text)]
+    found += [" ".join(match.groups()) for match in BLOCK_PATTERN.finditer(text)]
+    return list(dict.fromkeys(found))
+
+class LostFoundStore:
+    """Durable lost & found reports with in-memory matching indexes.
+
+    Reports live in SQLite (WAL mode) keyed by ``item_category``. Every
+    report is indexed in memory as soon as it is recorded, so a found item
+    immediately matches lost reports (and vice versa): descriptions in a
+    per-kind FuzzyMatcher, locations in an inverted index. Rows are written
+    by a background task in batches every ``flush_interval`` seconds on a
+    single writer thread, so recording a report never waits on disk.
+    Claimed reports, and reports older than ``expire_days``, are closed:
+    they leave the matching indexes but stay on file for lookups.
+    """
+
+    def __init__(self, path: str = "lost_found.db", flush_interval: float = 0.5, batch_size: int = 100,
+                 max_candidates: int = 3, min_score: float = 0.25, match_days: float = 30, expire_days: float = 31):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.min_score = min_score
+        self.match_days = match_days
+        self.expire_days = expire_days
+        self._last_expiry = 0.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lost-found-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self._pending: List[LostFoundReport] = []
+        self._writer: Optional[asyncio.Task] = None
+
+        self.reports: Dict[str, LostFoundReport] = {}
+        self.open_reports = Counter()
+        self.matchers = {kind: FuzzyMatcher.from_env() for kind in KINDS}
+        self.postings: Dict[str, Dict[str, Set[str]]] = {kind: defaultdict(set) for kind in KINDS}
+        self.counters = Counter()
+        self.batch_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LostFoundStore":
+        return cls(
+            path=os.getenv("LOST_FOUND_DB", "lost_found.db"),
+            flush_interval=float(os.getenv("LOST_FOUND_FLUSH_SECONDS", "0.5")),
+            batch_size=int(os.getenv("LOST_FOUND_BATCH_SIZE", "100")),
+            max_candidates=int(os.getenv("LOST_FOUND_MAX_CANDIDATES", "3")),
+            min_score=float(os.getenv("LOST_FOUND_MIN_SCORE", "0.25")),
+            match_days=float(os.getenv("LOST_FOUND_MATCH_DAYS", "30")),
+            expire_days=float(os.getenv("LOST_FOUND_EXPIRE_DAYS", "31"))
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+            if "status" not in columns:
+                # Databases created before reports could be closed
+                self._conn.execute("ALTER TABLE reports ADD COLUMN status TEXT NOT NULL DEFAULT 'open'")
+        return self._conn
+
+    def load(self) -> List[LostFoundReport]:
+        """Read stored reports into the index once, blocking (scripts and tests); returns the open reports loaded"""
+        if self._loaded:
+            return []
+        return self._load_rows(self._read_rows())
+
+    async def warm_up(self) -> List[LostFoundReport]:
+        """Read stored reports on the store's thread, off the event loop (at server start).
+
+        Request handlers await it too, so a report filed before the warm-up
+        finishes still matches against the reports on file.
+        """
+        if self._loaded:
+            return []
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().run_in_executor(self.executor, self._read_rows)
+        try:
+            rows = await asyncio.shield(self._loading)
+        except sqlite3.Error:
+            self._loading = None
+            raise
+        return self._load_rows(rows)
+
+    def _read_rows(self) -> List[tuple]:
+        return self._connect().execute(
+            "SELECT report_id, kind, item_category, description, locations, phash, dhash, created_at, status "
+            "FROM reports"
+        ).fetchall()
+
+    def _load_rows(self, rows: List[tuple]) -> List[LostFoundReport]:
+        if self._loaded:
+            return []
+        self._loaded = True
+        loaded = []
+        for report_id, kind, category, description, locations, phash, dhash, created_at, status in rows:
+            report = LostFoundReport(
+                report_id=report_id, kind=kind, item_category=category, description=description,
+                locations=[loc for loc in locations.split(",") if loc],
+                phash=int(phash, 16) if phash else None, dhash=int(dhash, 16) if dhash else None,
+                created_at=created_at, status=status
+            )
+            if status != "open":
+                self.reports[report_id] = report
+                continue
+            self._index(report, match=False)
+            loaded.append(report)
+        # One vectorized pass per kind instead of a matcher update per row
+        for kind in KINDS:
+            reports = [report for report in loaded if report.kind == kind]
+            self.matchers[kind].add_many(
+                [r.report_id for r in reports], [r.description for r in reports],
+                [r.item_category for r in reports], [r.created_at for r in reports]
+            )
+        self.counters["loaded"] += len(loaded)
+        return loaded
+
+    def _index(self, report: LostFoundReport, match: bool = True) -> None:
+        if report.report_id not in self.reports:
+            self.open_reports[report.kind] += 1
+            if match:
+                self.matchers[report.kind].add(report.report_id, report.description, report.item_category, report.created_at)
+        self.reports[report.report_id] = report
+        for location in report.locations:
+            self.postings[report.kind][location].add(report.report_id)
+
+    def record(self, report: LostFoundReport) -> None:
+        """Index a report now and queue it for the next batched write"""
+        self.load()
+        if not report.created_at:
+            report.created_at = time.time()
+        self._index(report)
+        self._queue(report)
+        self.counters[f"{report.kind}_recorded"] += 1
+
+    def close(self, report_id: str, status: str = "claimed") -> Optional[LostFoundReport]:
+        """Take an open report out of matching; None if there is no such open report"""
+        if status not in REPORT_STATUSES[1:]:
+            raise ValueError(f"Unknown closing status: {status} (expected one of {', '.join(REPORT_STATUSES[1:])})")
+        self.load()
+        report = self.reports.get(report_id)
+        if report is None or report.status != "open":
+            return None
+        report.status = status
+        self.open_reports[report.kind] -= 1
+        self.matchers[report.kind].remove(report_id)
+        postings = self.postings[report.kind]
+        for location in report.locations:
+            ids = postings.get(location)
+            if ids is not None:
+                ids.discard(report_id)
+                if not ids:
+                    del postings[location]
+        self._queue(report)
+        self.counters[f"{report.kind}_{status}"] += 1
+        return report
+
+    def expire(self, now: Optional[float] = None) -> List[LostFoundReport]:
+        """Close every open report filed more than ``expire_days`` ago; returns them"""
+        self.load()
+        now = now or time.time()
+        self._last_expiry = now
+        cutoff = now - self.expire_days * DAY
+        stale = [r.report_id for r in self.reports.values() if r.status == "open" and r.created_at < cutoff]
+        return [self.close(report_id, "expired") for report_id in stale]
+
+    def expire_due(self) -> List[LostFoundReport]:
+        """``expire`` at most once every EXPIRY_INTERVAL seconds (called as reports come in)"""
+        if time.time() - self._last_expiry < EXPIRY_INTERVAL:
+            return []
+        return self.expire()
+
+    def _queue(self, report: LostFoundReport) -> None:
+        self._pending.append(report)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write_loop())
+
+    def candidates(self, report: LostFoundReport, since: Optional[float] = None,
+                   limit: Optional[int] = None) -> List[Tuple[float, LostFoundReport]]:
+        """Opposite-kind reports with similar descriptions, filed after ``since``, best first.
+
+        ``since`` defaults to ``match_days`` ago. Reports of another category
+        are skipped; "other" is the analyzer's catch-all, so it may hide (and
+        match) any category. Shared places add LOCATION_BONUS each.
+        """
+        self.load()
+        self.counters["searches"] += 1
+        kind = OPPOSITE_KIND[report.kind]
+        limit = limit or self.max_candidates
+        categories = None if report.item_category == "other" else [report.item_category, "other"]
+        if since is None:
+            since = time.time() - self.match_days * DAY
+        hits = self.matchers[kind].search(report.description, categories, since, limit=4 * limit,
+                                          min_score=self.min_score)
+
+        postings = self.postings[kind]
+        scored = []
+        for report_id, score in hits:
+            shared = sum(report_id in postings.get(location, ()) for location in report.locations)
+            scored.append((round(score + LOCATION_BONUS * shared, 3), self.reports[report_id]))
+        scored.sort(key=lambda item: (-item[0], -item[1].created_at))
+        return scored[:limit]
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                await loop.run_in_executor(self.executor, self._write_batch, batch)
+            except sqlite3.Error:
+                self.counters["write_errors"] += 1
+                # Keep the reports for the next attempt
+                self._pending = batch + self._pending
+
+    def _write_batch(self, batch: List[LostFoundReport]) -> None:
+        started = time.perf_counter()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    report.report_id, report.kind, report.item_category, report.description,
+                    ",".join(report.locations),
+                    f"{report.phash:016x}" if report.phash is not None else None,
+                    f"{report.dhash:016x}" if report.dhash is not None else None,
+                    report.created_at, report.status
+                ) for report in batch]
+            )
+        self.counters["batches_written"] += 1
+        self.counters["reports_written"] += len(batch)
+        self.batch_seconds += time.perf_counter() - started
+
+    async def flush(self) -> None:
+        """Wait until every recorded report is on disk"""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches_written"]
+        return {
+            **dict(self.counters),
+            "path": self.path,
+            "open_reports": dict(self.open_reports),
+            "closed_reports": dict(Counter(r.status for r in self.reports.values() if r.status != "open")),
+            "matchers": {kind: matcher.stats() for kind, matcher in self.matchers.items()},
+            "pending_writes": len(self._pending),
+            "avg_batch_ms": round(1000 * self.batch_seconds / batches, 2) if batches else 0.0,
+        }
+
+lost_found_store = LostFoundStore.from_env()
@@ -0,0 +1,207 @@
+# src/tools/rate_limiter.py
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+class LLMOverloadedError(Exception):
+    """Raised when an LLM call is shed instead of queued"""
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for provider 429s (groq.RateLimitError or any error carrying status 429)"""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+class TokenBucket:
+    """Reservation-style token bucket refilled continuously at ``per_minute``"""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now (possibly into debt); return seconds to wait before using it"""
+        self._refill()
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class AdaptiveLimiter:
+    """Admission control for every LLM call.
+
+    * RPM and TPM token buckets keep us under the provider's quotas.
+    * An AIMD concurrency window grows by ~1 per window of fast successes
+      and halves on a 429 or a call slower than ``latency_target``.
+    * Callers beyond the window wait in a bounded queue; when the queue is
+      full, or a caller would wait longer than ``max_queue_wait``, the call
+      is shed with LLMOverloadedError instead of piling onto the provider.
+    * Token reservations are estimates; ``settle`` corrects the TPM bucket
+      to the provider-counted usage once a call returns.
+    """
+
+    def __init__(self, rpm: float = 300, tpm: float = 100000, initial_concurrency: float = 8,
+                 min_concurrency: float = 1, max_concurrency: float = 64, max_queue: int = 200,
+                 max_queue_wait: float = 10.0, latency_target: float = 5.0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.window = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.latency_target = latency_target
+
+        # Created on first use inside the running loop (the shared limiter is built at import)
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._last_decrease = 0.0
+
+        self.admitted = 0
+        self.shed = 0
+        self.rate_limited = 0
+        self.decreases = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.tokens_settled = 0
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveLimiter":
+        return cls(
+            rpm=float(os.getenv("LLM_RPM", "300")),
+            tpm=float(os.getenv("LLM_TPM", "100000")),
+            initial_concurrency=float(os.getenv("LLM_CONCURRENCY", "8")),
+            max_concurrency=float(os.getenv("LLM_MAX_CONCURRENCY", "64")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "200")),
+            max_queue_wait=float(os.getenv("LLM_MAX_QUEUE_WAIT", "10")),
+            latency_target=float(os.getenv("LLM_LATENCY_TARGET", "5"))
+        )
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Wait for a concurrency slot and quota; returns the time spent queued"""
+        if self._waiting >= self.max_queue:
+            self.shed += 1
+            raise LLMOverloadedError("LLM queue is full")
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            condition = self.condition
+            async with condition:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self._in_flight < int(self.window)),
+                    timeout=self.max_queue_wait
+                )
+                self._in_flight += 1
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise LLMOverloadedError("Timed out waiting for an LLM slot")
+        finally:
+            self._waiting -= 1
+
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > self.max_queue_wait - (time.monotonic() - started):
+            await self._cancel_reservation(estimated_tokens)
+            self.shed += 1
+            raise LLMOverloadedError("LLM rate quota exhausted")
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled while waiting for quota: the call never ran, so nothing may stay reserved
+                await self._cancel_reservation(estimated_tokens)
+                raise
+
+        queued = time.monotonic() - started
+        self.admitted += 1
+        self.queue_time_total += queued
+        self.queue_time_max = max(self.queue_time_max, queued)
+        return queued
+
+    async def release(self, latency: float, error: BaseException = None) -> None:
+        """Return the slot and adapt the window to the observed outcome"""
+        rate_limited = error is not None and is_rate_limit_error(error)
+        if rate_limited:
+            self.rate_limited += 1
+        if rate_limited or latency > self.latency_target:
+            self._decrease()
+        elif error is None:
+            self.window = min(self.max_concurrency, self.window + 1.0 / max(self.window, 1.0))
+        await self._release_slot()
+
+    def settle(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Replace a call's reserved token estimate with what it actually used"""
+        if used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+        elif used_tokens > estimated_tokens:
+            # Already spent: go into debt now rather than delay a call that has finished
+            self.tokens.reserve(used_tokens - estimated_tokens)
+        self.tokens_settled += estimated_tokens - used_tokens
+
+    def _decrease(self) -> None:
+        # At most one multiplicative decrease per latency target interval
+        now = time.monotonic()
+        if now - self._last_decrease >= self.latency_target:
+            self.window = max(self.min_concurrency, self.window / 2)
+            self._last_decrease = now
+            self.decreases += 1
+
+    async def _cancel_reservation(self, estimated_tokens: int) -> None:
+        self.requests.refund(1)
+        self.tokens.refund(estimated_tokens)
+        await self._release_slot()
+
+    async def _release_slot(self) -> None:
+        # Counted before awaiting the lock, so an interrupted release still frees the slot
+        self._in_flight -= 1
+        condition = self.condition
+        async with condition:
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[float]:
+        queued = await self.acquire(estimated_tokens)
+        started = time.monotonic()
+        try:
+            yield queued
+        except BaseException as e:
+            await self.release(time.monotonic() - started, e)
+            raise
+        await self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_window": round(self.window, 2),
+            "in_flight": self._in_flight,
+            "queued": self._waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "rate_limited": self.rate_limited,
+            "window_decreases": self.decreases,
+            "avg_queue_ms": round(1000 * self.queue_time_total / self.admitted, 1) if self.admitted else 0.0,
+            "max_queue_ms": round(1000 * self.queue_time_max, 1),
+            "tokens_settled": self.tokens_settled,
+            "rpm_tokens_left": round(self.requests.tokens, 1),
+            "tpm_tokens_left": round(self.tokens.tokens, 1),
+        }
+
+llm_limiter = AdaptiveLimiter.from_env()
@@ -0,0 +1,186 @@
+# src/tools/token_accounting.py
+import json
+import os
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (tokens) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS = [128, 256, 512, 1024, 2048, 4096, 8192]
+
+def extract_usage(message: Any) -> Tuple[int, int]:
+    """(input_tokens, output_tokens) reported on an LLM response message"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+
+class Histogram:
+    """Fixed-bucket token histogram"""
+
+    def __init__(self, buckets: List[int] = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+
+    def add(self, value: int) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, int]:
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return dict(zip(labels, self.counts))
+
+class RequestUsage:
+    """Token usage of every LLM call made for one hostel_assistant request"""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+
+    @property
+    def shared_calls(self) -> int:
+        return sum(1 for call in self.calls if call.get("shared"))
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call["input_tokens"] for call in self.calls)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call["output_tokens"] for call in self.calls)
+
+    def summary(self) -> Dict[str, Any]:
+        by_stage = Counter()
+        for call in self.calls:
+            by_stage[f"{call['agent']}/{call['stage']}"] += call["input_tokens"] + call["output_tokens"]
+        return {
+            "llm_calls": len(self.calls),
+            "shared_calls": self.shared_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "by_stage": dict(by_stage),
+        }
+
+current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("current_usage", default=None)
+
+def add_shared_usage(shared: RequestUsage, members: int = 1) -> None:
+    """Count calls made once for several coalesced requests toward the current request, marked shared.
+
+    With ``members`` > 1 (a micro-batch) the request is charged its share of
+    the tokens rather than the whole call.
+    """
+    usage = current_usage.get()
+    if usage is not None:
+        usage.calls.extend({
+            **call, "shared": True,
+            "input_tokens": round(call["input_tokens"] / members),
+            "output_tokens": round(call["output_tokens"] / members),
+        } for call in shared.calls)
+
+class TokenMeter:
+    """Rolling token counters and histograms per (agent, stage).
+
+    Every LLM call reports its provider-counted input/output tokens here.
+    Totals and histograms cover the process lifetime; ``recent`` keeps the
+    last ``window`` calls for rates, and finished requests keep their own
+    totals. With ``log_path`` set, each call is also appended as a JSON line
+    for the offline prompt report (tools/token_report.py).
+    """
+
+    def __init__(self, window: int = 1000, log_path: Optional[str] = None):
+        self.totals: Dict[Tuple[str, str], Counter] = {}
+        self.input_histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.output_histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self.recent_requests: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self.request_histogram = Histogram()
+        self.log_path = log_path
+        self._log = None
+
+    @classmethod
+    def from_env(cls) -> "TokenMeter":
+        return cls(
+            window=int(os.getenv("TOKEN_METER_WINDOW", "1000")),
+            log_path=os.getenv("TOKEN_LOG_PATH") or None
+        )
+
+    def record(self, agent: str, stage: str, input_tokens: int, output_tokens: int,
+               latency: float, system_prompt_chars: int = 0) -> None:
+        key = (agent, stage)
+        totals = self.totals.setdefault(key, Counter())
+        totals["calls"] += 1
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["latency_ms"] += int(1000 * latency)
+        self.input_histograms.setdefault(key, Histogram()).add(input_tokens)
+        self.output_histograms.setdefault(key, Histogram()).add(output_tokens)
+
+        call = {
+            "at": time.time(),
+            "agent": agent,
+            "stage": stage,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "latency_ms": round(1000 * latency, 1),
+            "system_prompt_chars": system_prompt_chars,
+        }
+        self.recent.append(call)
+        usage = current_usage.get()
+        if usage is not None:
+            usage.calls.append(call)
+        if self.log_path:
+            if self._log is None:
+                self._log = open(self.log_path, "a", buffering=1)
+            self._log.write(json.dumps(call) + "\n")
+
+    def expected_tokens(self, agent: str, stage: str, min_calls: int = 5) -> Optional[int]:
+        """Observed average tokens (input + output) per call of this stage, once it has ``min_calls`` calls"""
+        totals = self.totals.get((agent, stage))
+        if totals is None or totals["calls"] < min_calls:
+            return None
+        return -(-(totals["input_tokens"] + totals["output_tokens"]) // totals["calls"])
+
+    @contextmanager
+    def request_scope(self) -> Iterator[RequestUsage]:
+        """Collect the token usage of everything awaited inside the block as one request"""
+        usage = RequestUsage()
+        token = current_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            current_usage.reset(token)
+            if usage.calls:
+                self.request_histogram.add(usage.input_tokens + usage.output_tokens)
+                self.recent_requests.append({"at": time.time(), **usage.summary()})
+
+    def stats(self) -> Dict[str, Any]:
+        stages = {}
+        for (agent, stage), totals in self.totals.items():
+            calls = totals["calls"]
+            stages[f"{agent}/{stage}"] = {
+                "calls": calls,
+                "input_tokens": totals["input_tokens"],
+                "output_tokens": totals["output_tokens"],
+                "avg_input_tokens": round(totals["input_tokens"] / calls, 1),
+                "avg_output_tokens": round(totals["output_tokens"] / calls, 1),
+                "avg_latency_ms": round(totals["latency_ms"] / calls, 1),
+                "input_histogram": self.input_histograms[(agent, stage)].to_dict(),
+                "output_histogram": self.output_histograms[(agent, stage)].to_dict(),
+            }
+
+        window_seconds = (self.recent[-1]["at"] - self.recent[0]["at"]) if len(self.recent) > 1 else 0
+        recent_tokens = sum(call["input_tokens"] + call["output_tokens"] for call in self.recent)
+        return {
+            "stages": stages,
+            "recent_calls": len(self.recent),
+            "recent_tokens_per_minute": round(60 * recent_tokens / window_seconds, 1) if window_seconds else None,
+            "request_histogram": self.request_histogram.to_dict(),
+            "recent_requests": list(self.recent_requests)[-10:],
+        }
+
+token_meter = TokenMeter.from_env()
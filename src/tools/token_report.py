@@ -0,0 +1,90 @@
+# src/tools/token_report.py
+"""Offline prompt-budget report over the token log written by TokenMeter.
+
+Fits latency ~ base + input_tokens * a + output_tokens * b across all logged
+calls, then flags agent/stage prompts whose input (prompt) tokens account for
+most of their latency, or whose system prompt is most of what they send.
+
+    TOKEN_LOG_PATH=tokens.jsonl python src/mcp_server.py   # collect
+    python src/tools/token_report.py tokens.jsonl          # report
+"""
+import argparse
+import json
+from collections import defaultdict
+from typing import Any, Dict, List
+import numpy as np
+
+def load_calls(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def fit_latency(calls: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Least-squares per-token latency costs (ms) shared by every stage"""
+    X = np.array([[1.0, call["input_tokens"], call["output_tokens"]] for call in calls])
+    y = np.array([call["latency_ms"] for call in calls])
+    (base, per_input, per_output), *_ = np.linalg.lstsq(X, y, rcond=None)
+    return {"base_ms": base, "ms_per_input_token": per_input, "ms_per_output_token": per_output}
+
+def build_report(calls: List[Dict[str, Any]], latency_share: float = 0.5,
+                 system_share: float = 0.7) -> Dict[str, Any]:
+    model = fit_latency(calls)
+    groups = defaultdict(list)
+    for call in calls:
+        groups[f"{call['agent']}/{call['stage']}"].append(call)
+
+    rows = []
+    for name, group in sorted(groups.items()):
+        mean_input = float(np.mean([call["input_tokens"] for call in group]))
+        mean_output = float(np.mean([call["output_tokens"] for call in group]))
+        mean_latency = float(np.mean([call["latency_ms"] for call in group]))
+        system_tokens = float(np.mean([call.get("system_prompt_chars", 0) for call in group])) / 4
+        prompt_share = max(0.0, model["ms_per_input_token"] * mean_input) / mean_latency if mean_latency else 0.0
+        system_fraction = system_tokens / mean_input if mean_input else 0.0
+
+        flags = []
+        if prompt_share >= latency_share:
+            flags.append(f"prompt tokens drive {prompt_share:.0%} of latency")
+        if system_fraction >= system_share:
+            flags.append(f"system prompt is ~{system_fraction:.0%} of input")
+        rows.append({
+            "stage": name,
+            "calls": len(group),
+            "avg_input_tokens": round(mean_input, 1),
+            "avg_output_tokens": round(mean_output, 1),
+            "avg_latency_ms": round(mean_latency, 1),
+            "est_system_prompt_tokens": round(system_tokens, 1),
+            "prompt_latency_share": round(prompt_share, 3),
+            "flags": flags,
+        })
+    return {"model": {k: round(float(v), 4) for k, v in model.items()}, "stages": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag prompts whose size dominates LLM latency")
+    parser.add_argument("log", help="JSONL token log (TOKEN_LOG_PATH)")
+    parser.add_argument("--latency-share", type=float, default=0.5,
+                        help="Flag stages whose prompt tokens explain at least this share of latency")
+    parser.add_argument("--system-share", type=float, default=0.7,
+                        help="Flag stages whose system prompt is at least this share of input tokens")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    calls = load_calls(args.log)
+    if len(calls) < 3:
+        raise SystemExit("Need at least 3 logged calls to fit the latency model")
+    report = build_report(calls, args.latency_share, args.system_share)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    model = report["model"]
+    print(f"latency ≈ {model['base_ms']:.0f} ms + {model['ms_per_input_token']:.3f} ms/input token "
+          f"+ {model['ms_per_output_token']:.3f} ms/output token\n")
+    print(f"{'stage':<40} {'calls':>6} {'in':>8} {'out':>6} {'sys':>7} {'ms':>8} {'prompt%':>8}")
+    for row in report["stages"]:
+        print(f"{row['stage']:<40} {row['calls']:>6} {row['avg_input_tokens']:>8.0f} {row['avg_output_tokens']:>6.0f} "
+              f"{row['est_system_prompt_tokens']:>7.0f} {row['avg_latency_ms']:>8.0f} {row['prompt_latency_share']:>8.0%}")
+        for flag in row["flags"]:
+            print(f"    ⚠️  {flag}")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,62 @@
 # src/tools/vision_analyzer.py
-from src.tools.groq_client import get_vision_llm
+import asyncio
+from typing import Union
+from tools.circuit_breaker import CircuitOpenError
+from tools.groq_client import estimate_tokens, get_vision_llm, invoke_llm
+from tools.image_preprocessor import image_preprocessor
+from tools.rate_limiter import LLMOverloadedError
+from utils.cache import vision_cache
+from utils.deadline import DeadlineExceeded
+from utils.singleflight import SingleFlight
 from langchain_core.messages import HumanMessage
 
-async def analyze_image(image_base64: str, prompt: str) -> str:
+# Approximate prompt tokens charged for one image against the TPM budget
+IMAGE_TOKEN_ESTIMATE = 1000
+
+# Specialists analyzing the same photo with the same prompt at once share one call
+vision_flight = SingleFlight()
+# Start of the text returned when a photo could not be analyzed; such answers are never cached
+VISION_ERROR_PREFIX = "Error analyzing image"
+
+async def analyze_image(image: Union[str, bytes], prompt: str) -> str:
     """Analyze image using Groq vision model"""
     try:
-        llm = get_vision_llm()
-        
-        message = HumanMessage(
-            content=[
-                {"type": "text", "text": prompt},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}
-                }
-            ]
+        raw = await image_preprocessor.decode(image)
+        # Hashing a multi-megabyte image releases the GIL, so keep it off the loop
+        key = await asyncio.get_running_loop().run_in_executor(
+            image_preprocessor.executor, vision_cache.make_key, raw, prompt
         )
+        cached = await vision_cache.get(key)
+        if cached is not None:
+            return cached
+        return await vision_flight.do(key, lambda: _call_vision(raw, prompt, key))
         
-        response = await llm.ainvoke([message])
-        return response.content
-        
+    except (DeadlineExceeded, CircuitOpenError, LLMOverloadedError):
+        # The coordinator turns these into partial, degraded or overloaded answers
+        raise
     except Exception as e:
-        return f"Error analyzing image: {str(e)}"
\ No newline at end of file
+        return f"{VISION_ERROR_PREFIX}: {str(e)}"
+
+async def _call_vision(raw: bytes, prompt: str, key: str) -> str:
+    llm = get_vision_llm()
+    # Downscaled, metadata-free re-encode with its real mime type
+    image = await image_preprocessor.prepare(raw)
+    
+    message = HumanMessage(
+        content=[
+            {"type": "text", "text": prompt},
+            {
+                "type": "image_url",
+                "image_url": {"url": image.data_url}
+            }
+        ]
+    )
+    
+    response = await invoke_llm(
+        llm, [message], estimate_tokens(prompt) + IMAGE_TOKEN_ESTIMATE,
+        stage="vision", agent="Vision Analyzer", system_prompt_chars=len(prompt)
+    )
+    if isinstance(response.content, str) and response.content.strip():
+        # Only real analyses are cached; an empty reply is asked again next time
+        vision_cache.set(key, response.content, len(image.data))
+    return response.content
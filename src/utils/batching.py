@@ -0,0 +1,104 @@
+# src/utils/batching.py
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from tools.token_accounting import RequestUsage, add_shared_usage, current_usage
+from utils.deadline import Deadline, DeadlineExceeded, current_deadline
+
+class MicroBatcher:
+    """Group items submitted within ``window`` seconds into one ``process`` call.
+
+    A batch is flushed when the window started by its first item expires or
+    when it reaches ``max_batch`` items. ``process`` receives the items in
+    submission order and must return one result per item; a result that is
+    an exception is raised to that item's caller only. The batch runs under
+    the loosest of its members' deadlines and its own token usage, which is
+    split evenly across the members; each member waits only as long as its
+    own deadline allows for ``stage``.
+    """
+
+    def __init__(self, process: Callable[[List[Any]], Awaitable[List[Any]]], window: float = 0.02,
+                 max_batch: int = 16, stage: str = "analysis"):
+        self.process = process
+        self.window = window
+        self.max_batch = max_batch
+        self.stage = stage
+        self._pending: List[Tuple[Any, asyncio.Future, float, Optional[Deadline]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.counters = Counter()
+        self.fill = Counter()
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = current_deadline.get()
+        self._pending.append((item, future, time.monotonic(), deadline))
+        self.counters["items"] += 1
+        if len(self._pending) >= self.max_batch:
+            self.counters["full_flushes"] += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        try:
+            result, usage, members = await asyncio.wait_for(
+                future, deadline.stage_timeout(self.stage) if deadline is not None else None
+            )
+        except asyncio.TimeoutError:
+            self.counters["deadline_exceeded"] += 1
+            raise DeadlineExceeded(self.stage)
+        add_shared_usage(usage, members)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float, Optional[Deadline]]]) -> None:
+        now = time.monotonic()
+        for _, _, submitted, _ in batch:
+            delay = now - submitted
+            self.queue_delay_total += delay
+            self.queue_delay_max = max(self.queue_delay_max, delay)
+        self.counters["batches"] += 1
+        self.fill[len(batch)] += 1
+
+        # Set inside this task, so no member's deadline or usage scope applies to the shared call
+        deadlines = [deadline for _, _, _, deadline in batch]
+        current_deadline.set(
+            None if None in deadlines else max(deadlines, key=lambda deadline: deadline.expires_at)
+        )
+        usage = RequestUsage()
+        current_usage.set(usage)
+
+        try:
+            results = await self.process([item for item, _, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future, _, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result((result, usage, len(batch)))
+
+    def stats(self) -> dict:
+        batches = self.counters["batches"]
+        items = sum(size * count for size, count in self.fill.items())
+        return {
+            **dict(self.counters),
+            "window_ms": round(1000 * self.window, 1),
+            "max_batch": self.max_batch,
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "avg_fill": round(items / (batches * self.max_batch), 3) if batches else 0.0,
+            "batch_sizes": dict(sorted(self.fill.items())),
+            "avg_queue_delay_ms": round(1000 * self.queue_delay_total / items, 1) if items else 0.0,
+            "max_queue_delay_ms": round(1000 * self.queue_delay_max, 1),
+        }
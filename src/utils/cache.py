@@ -0,0 +1,310 @@
+# src/utils/cache.py
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel
+from utils.validators import QueryValidator
+
+# Default time-to-live (seconds) per cached entry type. Facility status goes
+# stale quickly; policy answers are stable for hours.
+DEFAULT_TTLS = {
+    "QueryClassification": 3600,
+    "ComplaintAnalysis": 1800,
+    "LostFoundAnalysis": 600,
+    "MessQueryAnalysis": 1800,
+    "RulesQueryAnalysis": 6 * 3600,
+    "StatusQueryAnalysis": 60,
+}
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_VISION_TTL = 24 * 3600
+
+class TTLCache:
+    """LRU cache whose entries expire after ``ttl`` seconds.
+
+    Entries are charged an approximate size; once ``max_bytes`` is exceeded
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes or self.ttl <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+class ResultCache:
+    """Per-entry-type TTL caches for classification and analysis results"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = True):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._caches: Dict[str, TTLCache] = {}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build from RESULT_CACHE_* settings, e.g. RESULT_CACHE_TTLS="StatusQueryAnalysis=30" """
+        ttls = {}
+        for item in os.getenv("RESULT_CACHE_TTLS", "").split(","):
+            name, _, seconds = item.partition("=")
+            if name.strip() and seconds.strip():
+                ttls[name.strip()] = float(seconds)
+        return cls(
+            ttls=ttls,
+            max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            enabled=os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    @staticmethod
+    def make_key(query: str, image_data: Optional[Union[str, bytes]] = None) -> str:
+        """Normalized query text plus an image content hash when present"""
+        key = QueryValidator.normalize_query(query)
+        if image_data:
+            key += "|img:" + QueryValidator.image_fingerprint(image_data)
+        return key
+
+    def namespace(self, entry_type: str) -> TTLCache:
+        cache = self._caches.get(entry_type)
+        if cache is None:
+            cache = TTLCache(self.ttls.get(entry_type, 300), self.max_bytes)
+            self._caches[entry_type] = cache
+        return cache
+
+    def get(self, entry_type: str, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self.namespace(entry_type).get(key)
+
+    def set(self, entry_type: str, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        payload = value.model_dump_json() if isinstance(value, BaseModel) else repr(value)
+        self.namespace(entry_type).set(key, value, len(key) + len(payload))
+
+    def clear(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            **{entry_type: cache.stats() for entry_type, cache in self._caches.items()},
+        }
+
+result_cache = ResultCache.from_env()
+
+class VisionCache:
+    """Content-addressed cache of vision model answers.
+
+    Keys are a hash of the decoded image bytes plus the prompt, so the same
+    photo resent as differently wrapped base64, or analyzed by several
+    specialists with the same prompt, is only sent to the model once. A
+    size-bounded in-memory LRU sits in front of an optional directory of
+    JSON files (``disk_dir``) that survives restarts. Disk reads and writes
+    run on one background thread; a running byte count (seeded by a single
+    directory scan) triggers pruning, oldest first, down to
+    ``PRUNE_TO`` of ``disk_max_bytes`` once the directory outgrows it.
+    """
+
+    # Pruning stops below this share of the disk budget, so it doesn't rerun on every write
+    PRUNE_TO = 0.8
+
+    def __init__(self, ttl: float = DEFAULT_VISION_TTL, max_bytes: int = DEFAULT_MAX_BYTES,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 64 * DEFAULT_MAX_BYTES,
+                 enabled: bool = True):
+        self.memory = TTLCache(ttl, max_bytes)
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.enabled = enabled
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vision-cache")
+        # Bytes of cache files on disk; None until the first write scans the directory
+        self._disk_bytes: Optional[int] = None
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.disk_prunes = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def from_env(cls) -> "VisionCache":
+        return cls(
+            ttl=float(os.getenv("VISION_CACHE_TTL", str(DEFAULT_VISION_TTL))),
+            max_bytes=int(os.getenv("VISION_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            disk_dir=os.getenv("VISION_CACHE_DIR") or None,
+            disk_max_bytes=int(os.getenv("VISION_CACHE_DISK_MAX_BYTES", str(64 * DEFAULT_MAX_BYTES))),
+            enabled=os.getenv("VISION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    @staticmethod
+    def make_key(image: bytes, prompt: str) -> str:
+        digest = hashlib.sha256(image)
+        digest.update(b"\0" + prompt.encode())
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached answer, counting the image bytes that did not have to be sent"""
+        if not self.enabled:
+            return None
+        entry = self.memory.get(key)
+        if entry is None and self.disk_dir:
+            entry = await asyncio.get_running_loop().run_in_executor(self.executor, self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.set(key, entry, len(key) + len(entry[0]))
+        if entry is None:
+            return None
+        text, image_bytes = entry
+        self.bytes_saved += image_bytes
+        return text
+
+    def set(self, key: str, text: str, image_bytes: int) -> None:
+        """Store an answer; ``image_bytes`` is what the model call uploaded. The disk write happens in the background"""
+        if not self.enabled:
+            return
+        self.memory.set(key, (text, image_bytes), len(key) + len(text))
+        if self.disk_dir:
+            self.executor.submit(self._write_disk, key, text, image_bytes)
+
+    async def flush(self) -> None:
+        """Wait until every queued disk write has finished"""
+        await asyncio.get_running_loop().run_in_executor(self.executor, lambda: None)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, int]]:
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime + self.ttl < time.time():
+                os.remove(path)
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= stat.st_size
+                return None
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry["text"], entry["image_bytes"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, text: str, image_bytes: int) -> None:
+        path = self._path(key)
+        try:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            with open(path + ".tmp", "w") as f:
+                json.dump({"text": text, "image_bytes": image_bytes}, f)
+            size = os.path.getsize(path + ".tmp")
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(path + ".tmp", path)
+            self._disk_bytes += size - replaced
+            self.disk_writes += 1
+            if self._disk_bytes > self.disk_max_bytes:
+                self._prune_disk()
+        except OSError:
+            pass
+
+    def _scan_disk(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _prune_disk(self) -> None:
+        entries = self._scan_disk()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.PRUNE_TO * self.disk_max_bytes:
+                break
+            os.remove(path)
+            total -= size
+        self._disk_bytes = total
+        self.disk_prunes += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory.hits + self.memory.misses
+        return {
+            "enabled": self.enabled,
+            **self.memory.stats(),
+            "hit_rate": round((self.memory.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "disk_dir": self.disk_dir,
+            "disk_bytes": self._disk_bytes,
+            "disk_hits": self.disk_hits,
+            "disk_writes": self.disk_writes,
+            "disk_prunes": self.disk_prunes,
+            "image_bytes_saved": self.bytes_saved,
+        }
+
+vision_cache = VisionCache.from_env()
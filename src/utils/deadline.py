@@ -0,0 +1,48 @@
+# src/utils/deadline.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Largest share of the request budget each stage may use on its own
+STAGE_SHARES = {
+    "classification": 0.35,
+    "vision": 0.45,
+    "analysis": 0.6,
+}
+
+class DeadlineExceeded(Exception):
+    """The request (or one of its stages) ran out of time budget"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Time budget exhausted during {stage}")
+        self.stage = stage
+
+class Deadline:
+    """Time budget for one hostel_assistant request"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def stage_timeout(self, stage: str) -> float:
+        """Seconds the given stage may take: its share of the budget, capped by what is left"""
+        return min(self.remaining(), self.budget * STAGE_SHARES.get(stage, 1.0))
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+@contextmanager
+def deadline_scope(budget: float) -> Iterator[Deadline]:
+    """Attach a deadline to everything awaited (and every task spawned) inside the block"""
+    deadline = Deadline(budget)
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
@@ -191,6 +191,20 @@ Communication Style:
 
 Students rely on this information for planning their day, so accuracy and clarity are essential."""
 
+    @staticmethod
+    def get_fused_routing_addendum() -> str:
+        return """Fused Routing Mode:
+In a single response, choose the specialist in the `route.agent_type` field and also fill in every
+analysis field for that specialist, exactly as the specialist itself would. Use the field descriptions
+for the allowed values. For GENERAL queries only the routing fields are needed."""
+
+    @staticmethod
+    def get_batch_classification_addendum() -> str:
+        return """Batch Mode:
+You will receive several numbered student queries from different students. Classify each one
+independently, exactly as you would on its own, and return one entry per query in `classifications`
+with `index` set to the query's number."""
+
     @staticmethod
     def get_vision_analysis_prompt() -> str:
         return """You are analyzing an image related to a hostel issue. Provide detailed, helpful analysis that assists in problem resolution.
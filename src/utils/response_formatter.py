@@ -1,40 +1,83 @@
 # src/utils/response_formatter.py
-from typing import List, Optional
+import time
+from typing import Iterator, List, Optional
 from agents.base_agent import AgentResponse
+from tools.complaint_store import Ticket
 
 class ResponseFormatter:
+    URGENCY_INDICATORS = {
+        "urgent": "🚨 **URGENT**",
+        "high": "⚠️ **HIGH PRIORITY**", 
+        "medium": "📝 **MEDIUM PRIORITY**",
+        "low": "ℹ️ **INFO**"
+    }
+    SAFETY_ADVICE = "🛑 **Safety first:** stay away from the hazard, keep others away, and contact the hostel office or security right away."
+    EMERGENCY_CONTACT = "🆘 **For immediate assistance, contact hostel office directly: +91-XXXXXXXXXX**"
+    
     @staticmethod
     def format_agent_response(response: AgentResponse) -> str:
         """Format agent response for MCP output"""
-        result = response.content
+        return "".join(ResponseFormatter.iter_agent_response(response))
+    
+    @staticmethod
+    def iter_agent_response(response: AgentResponse, include_banner: bool = True) -> Iterator[str]:
+        """Sections of the formatted response in display order, for streaming"""
+        # Add urgency indicator
+        if include_banner and response.urgency in ResponseFormatter.URGENCY_INDICATORS:
+            yield f"{ResponseFormatter.URGENCY_INDICATORS[response.urgency]}\n\n"
+        
+        paragraphs = response.content.split("\n\n")
+        for i, paragraph in enumerate(paragraphs):
+            yield paragraph if i == 0 else f"\n\n{paragraph}"
         
         # Add form link if provided
         if response.form_link:
-            result += f"\n\n📝 **Complete this form to proceed:**\n{response.form_link}"
+            yield f"\n\n📝 **Complete this form to proceed:**\n{response.form_link}"
         
         # Add next steps if provided
         if response.next_steps:
-            result += f"\n\n📋 **Next Steps:**"
+            steps = f"\n\n📋 **Next Steps:**"
             for i, step in enumerate(response.next_steps, 1):
-                result += f"\n{i}. {step}"
-        
-        # Add urgency indicator
-        urgency_indicators = {
-            "urgent": "🚨 **URGENT**",
-            "high": "⚠️ **HIGH PRIORITY**", 
-            "medium": "📝 **MEDIUM PRIORITY**",
-            "low": "ℹ️ **INFO**"
-        }
-        
-        if response.urgency in urgency_indicators:
-            indicator = urgency_indicators[response.urgency]
-            result = f"{indicator}\n\n{result}"
+                steps += f"\n{i}. {step}"
+            yield steps
         
         # Add emergency contact for urgent issues
         if response.urgency == "urgent":
-            result += f"\n\n🆘 **For immediate assistance, contact hostel office directly: +91-XXXXXXXXXX**"
-        
-        return result
+            yield f"\n\n{ResponseFormatter.EMERGENCY_CONTACT}"
+    
+    @staticmethod
+    def format_early_notice(urgency: str, safety_concern: bool) -> str:
+        """Urgency banner (and safety advice) sent as soon as the query is classified"""
+        notice = ResponseFormatter.URGENCY_INDICATORS.get(urgency, "")
+        if safety_concern:
+            notice += f"\n\n{ResponseFormatter.SAFETY_ADVICE}"
+        if urgency == "urgent":
+            notice += f"\n\n{ResponseFormatter.EMERGENCY_CONTACT}"
+        return notice.strip()
+    
+    @staticmethod
+    def format_ticket_status(ticket: Optional[Ticket], ticket_id: Optional[int], affected: int = 1) -> str:
+        """Status card for a complaint ticket lookup"""
+        if ticket is None:
+            if ticket_id is None:
+                return "🎫 Please give the complaint ticket number you received (for example: ticket 1042)."
+            return f"🎫 No complaint ticket #{ticket_id} was found. Please check the number from your complaint confirmation."
+        status = ticket.status.replace("_", " ").title()
+        filed = time.strftime("%d %b %Y, %H:%M", time.localtime(ticket.created_at))
+        lines = [
+            f"🎫 **Complaint ticket #{ticket.ticket_id}: {status}**",
+            "",
+            f"- Issue: {ticket.issue_type} ({ticket.severity})",
+            f"- Filed: {filed}",
+            f"- Expected resolution: {ticket.estimated_resolution}",
+        ]
+        if ticket.locations:
+            lines.append(f"- Location: {', '.join(ticket.locations)}")
+        if affected > 1:
+            lines.append(f"- Part of incident #{ticket.incident_id}: {affected} students affected")
+        if ticket.status != "resolved" and ticket.temporary_solution:
+            lines.append(f"- Meanwhile: {ticket.temporary_solution}")
+        return "\n".join(lines)
     
     @staticmethod
     def format_error_response(error_message: str) -> str:
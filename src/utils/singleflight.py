@@ -0,0 +1,59 @@
+# src/utils/singleflight.py
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar('T')
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive the same result (or
+    exception). A waiter being cancelled does not cancel the shared work.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.counters = Counter()
+        self.max_waiters = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self.counters["executions"] += 1
+        else:
+            self._waiters[key] += 1
+            self.counters["coalesced"] += 1
+        self.counters["requests"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            waiters = self._waiters.pop(key)
+            self.max_waiters = max(self.max_waiters, waiters)
+            if waiters > 1:
+                self.counters["shared_executions"] += 1
+        # Mark the outcome as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.counters["requests"]
+        return {
+            **dict(self.counters),
+            "in_flight": self.in_flight,
+            "waiters_in_flight": sum(self._waiters.values()),
+            "max_waiters": self.max_waiters,
+            "coalescing_ratio": round(self.counters["coalesced"] / requests, 3) if requests else 0.0,
+        }
@@ -1,6 +1,24 @@
 # src/utils/validators.py
+import asyncio
+import base64
+import binascii
+import hashlib
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+
+# Largest decoded image accepted
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Base64 characters decoded per step (a multiple of 4, so chunks decode independently)
+BASE64_CHUNK_CHARS = 64 * 1024
+# Payloads longer than this are validated in a worker thread instead of on the event loop
+IMAGE_VALIDATION_OFFLOAD_CHARS = 256 * 1024
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+]
 
 class QueryValidator:
     """Validate and sanitize user inputs"""
@@ -41,8 +59,13 @@ class QueryValidator:
         return result
     
     @staticmethod
-    def validate_image_data(image_data: Optional[str]) -> Dict[str, Any]:
-        """Validate base64 image data"""
+    def validate_image_data(image_data: Optional[str], max_bytes: int = MAX_IMAGE_BYTES) -> Dict[str, Any]:
+        """Validate base64 image data, decoding it chunk by chunk.
+
+        Rejects as early as possible: oversize payloads before any decoding,
+        non-image content after the first chunk, and invalid base64 at the
+        first bad chunk. On success ``image_bytes`` holds the decoded image.
+        """
         if not image_data:
             return {"is_valid": True, "warnings": []}
         
@@ -54,18 +77,43 @@ class QueryValidator:
         
         try:
             # Estimate size (base64 is ~33% larger than original)
-            estimated_size = len(image_data) * 0.75 / (1024 * 1024)
-            result["estimated_size_mb"] = round(estimated_size, 2)
+            estimated_size = len(image_data) * 0.75
+            result["estimated_size_mb"] = round(estimated_size / (1024 * 1024), 2)
             
             # Check size limits
-            if estimated_size > 10:  # 10MB limit
+            if estimated_size > max_bytes:
                 result["is_valid"] = False
-                result["warnings"].append("Image too large - please use image under 10MB")
+                result["warnings"].append(f"Image too large - please use image under {max_bytes // (1024 * 1024)}MB")
+                return result
             
-            # Basic base64 validation
-            if not re.match(r'^[A-Za-z0-9+/]*={0,2}$', image_data):
+            if len(image_data) % 4:
                 result["is_valid"] = False
                 result["warnings"].append("Invalid image format")
+                return result
+            
+            chunks = []
+            for start in range(0, len(image_data), BASE64_CHUNK_CHARS):
+                chunk = image_data[start:start + BASE64_CHUNK_CHARS]
+                # Padding may only end the last chunk (b64decode's validate does not check where it sits)
+                last = start + BASE64_CHUNK_CHARS >= len(image_data)
+                unpadded = chunk.rstrip("=") if last else chunk
+                try:
+                    if "=" in unpadded or len(chunk) - len(unpadded) > 2:
+                        raise binascii.Error("misplaced padding")
+                    chunks.append(base64.b64decode(chunk, validate=True))
+                except (binascii.Error, ValueError):
+                    result["is_valid"] = False
+                    result["warnings"].append("Invalid image format")
+                    return result
+                
+                if start == 0:
+                    result["format"] = QueryValidator.sniff_image_format(chunks[0])
+                    if result["format"] is None:
+                        result["is_valid"] = False
+                        result["warnings"].append("Unsupported image type - please send a JPEG, PNG, GIF, WEBP or BMP photo")
+                        return result
+            
+            result["image_bytes"] = b"".join(chunks)
                 
         except Exception as e:
             result["is_valid"] = False
@@ -73,6 +121,35 @@ class QueryValidator:
         
         return result
     
+    @staticmethod
+    async def validate_image_data_async(image_data: Optional[str], max_bytes: int = MAX_IMAGE_BYTES) -> Dict[str, Any]:
+        """validate_image_data, moved to a worker thread for large payloads"""
+        if image_data and len(image_data) > IMAGE_VALIDATION_OFFLOAD_CHARS:
+            return await asyncio.to_thread(QueryValidator.validate_image_data, image_data, max_bytes)
+        return QueryValidator.validate_image_data(image_data, max_bytes)
+    
+    @staticmethod
+    def sniff_image_format(header: bytes) -> Optional[str]:
+        """Image format from its magic bytes, or None if not a supported image"""
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return "webp"
+        for signature, image_format in IMAGE_SIGNATURES:
+            if header.startswith(signature):
+                return image_format
+        return None
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Canonical form used to detect identical queries ("WiFi not working!!" == "wifi not working")"""
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", query.lower()).split())
+    
+    @staticmethod
+    def image_fingerprint(image_data: Union[str, bytes]) -> str:
+        """Content hash of decoded (or base64) image data"""
+        if isinstance(image_data, str):
+            image_data = image_data.encode()
+        return hashlib.sha256(image_data).hexdigest()
+    
     @staticmethod
     def extract_urgency_keywords(query: str) -> str:
         """Extract urgency level from query text"""
@@ -0,0 +1,533 @@
+# test/test_routing.py
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, Field
+
+from agents.base_agent import AgentResponse, BaseAgent
+from agents.coordinator import DEGRADED_HEADER, PARTIAL_HEADER, CoordinatorAgent, QueryClassification
+from agents import base_agent
+from agents.registry import DEFAULT_AGENTS, AgentRegistry, build_default_registry
+from tools import groq_client
+from tools.circuit_breaker import CircuitBreaker
+from tools.complaint_store import complaint_store
+from tools.fake_llm import FakeLLMSettings
+from tools.lost_found_store import lost_found_store
+from utils.deadline import current_deadline, deadline_scope
+from utils.response_formatter import ResponseFormatter
+
+
+class EchoAgent:
+    """Minimal specialist used to observe routing"""
+
+    instances = 0
+
+    def __init__(self):
+        EchoAgent.instances += 1
+        self.calls = []
+
+    async def process_query(self, query, context):
+        self.calls.append((query, context))
+        return AgentResponse(content=f"echo: {query}", urgency=context.get("urgency", "low"))
+
+
+def make_coordinator(agent_type="COMPLAINT"):
+    registry = AgentRegistry()
+    registry.register("COMPLAINT", EchoAgent)
+    coordinator = CoordinatorAgent(registry=registry)
+
+    async def classify(query):
+        return QueryClassification(
+            agent_type=agent_type,
+            urgency="high",
+            has_safety_concern="No",
+            brief_summary=query,
+        )
+
+    coordinator._classify_query = classify
+    return coordinator, registry
+
+
+def test_registry_builds_each_agent_once():
+    EchoAgent.instances = 0
+    coordinator, registry = make_coordinator()
+
+    async def run():
+        for _ in range(3):
+            await coordinator.process_query("fan not working", {})
+
+    asyncio.run(run())
+    assert EchoAgent.instances == 1
+    assert len(registry.get("COMPLAINT").calls) == 3
+
+
+def test_registry_accepts_new_agent_types():
+    registry = AgentRegistry()
+    registry.register("laundry", EchoAgent)
+    assert "LAUNDRY" in registry
+    assert registry.get("LAUNDRY") is registry.warm_up()["LAUNDRY"]
+
+
+
+def test_default_registry_builds_the_real_specialists(monkeypatch, tmp_path):
+    monkeypatch.setattr(complaint_store, "path", str(tmp_path / "complaints.db"))
+    monkeypatch.setattr(lost_found_store, "path", str(tmp_path / "lost_found.db"))
+    registry = build_default_registry()
+    agents = registry.warm_up()
+    assert registry.failed == {}
+    assert set(agents) == set(DEFAULT_AGENTS)
+    assert all(isinstance(agent, BaseAgent) for agent in agents.values())
+
+
+def test_warm_up_skips_agents_that_fail_to_build():
+    def broken():
+        raise ImportError("No module named 'laundry'")
+
+    registry = AgentRegistry()
+    registry.register("COMPLAINT", EchoAgent)
+    registry.register("LAUNDRY", broken)
+    assert list(registry.warm_up()) == ["COMPLAINT"]
+    assert registry.failed == {"LAUNDRY": "ImportError: No module named 'laundry'"}
+
+def test_unregistered_route_gets_greeting():
+    coordinator, _ = make_coordinator(agent_type="GENERAL")
+    response = asyncio.run(coordinator.process_query("hi there", {}))
+    assert "HostelBuddy" in response.content
+
+
+def test_fast_router_handles_plain_queries_locally():
+    coordinator, _ = make_coordinator()
+    llm_calls = []
+    classify = coordinator._classify_query
+
+    async def counting_classify(query):
+        llm_calls.append(query)
+        return await classify(query)
+
+    coordinator._classify_query = counting_classify
+    classification = asyncio.run(coordinator._route_query("fan not working"))[0]
+
+    assert classification.agent_type == "COMPLAINT"
+    assert llm_calls == []
+    assert coordinator.get_metrics()["routing"]["local"] == 1
+
+
+def test_fast_router_defers_to_llm_below_threshold():
+    coordinator, _ = make_coordinator()
+    coordinator.fast_router.threshold = 1.1
+    classification = asyncio.run(coordinator._route_query("whats for lunch"))[0]
+
+    stats = coordinator.get_metrics()["routing"]
+    assert classification.agent_type == "COMPLAINT"  # stubbed LLM answer
+    assert stats["llm"] == 1
+    assert stats["recent"][-1]["local_guess"] == "MESS"
+
+
+def test_identical_queries_share_classification_but_not_the_specialist():
+    coordinator, registry = make_coordinator()
+    coordinator.fast_router.threshold = 1.1
+    classify = coordinator._classify_query
+    llm_calls, deadlines = [], []
+
+    async def slow_classify(query):
+        llm_calls.append(query)
+        await asyncio.sleep(0.05)
+        return await classify(query)
+
+    coordinator._classify_query = slow_classify
+
+    async def ask(budget):
+        with deadline_scope(budget):
+            response = await coordinator.process_query("water leaking from the ceiling", {})
+            deadlines.append(current_deadline.get().budget)
+            return response
+
+    async def run():
+        first = asyncio.create_task(ask(30))
+        await asyncio.sleep(0.01)
+        # Joins the first caller's classification with a budget of its own
+        return await asyncio.gather(first, ask(0.02), *(ask(30) for _ in range(3)))
+
+    responses = asyncio.run(run())
+
+    assert len(llm_calls) == 1
+    assert [r.content for r in responses[2:]] == ["echo: water leaking from the ceiling"] * 3
+    assert responses[1].content.startswith(PARTIAL_HEADER)
+    # One specialist call per caller that got a full answer
+    assert len(registry.get("COMPLAINT").calls) == 4
+    assert sorted(deadlines) == [0.02, 30, 30, 30, 30]
+    assert coordinator.get_metrics()["coalescing"]["coalesced"] >= 4
+
+
+def test_concurrent_identical_complaints_each_get_a_ticket_in_one_incident(monkeypatch, tmp_path):
+    from agents.complaint_handler import ComplaintAgent, ComplaintAnalysis
+    from tools.complaint_store import ComplaintStore
+    from tools.incident_tracker import IncidentTracker
+
+    analyses = []
+
+    async def analyze(self, query, context):
+        analyses.append(query)
+        await asyncio.sleep(0.05)
+        return ComplaintAnalysis(issue_type="plumbing", severity="major", immediate_action_needed="Yes",
+                                 temporary_solution="Use the Block A washrooms", estimated_resolution="hours")
+
+    monkeypatch.setattr(ComplaintAgent, "analyze", analyze)
+    store = ComplaintStore(str(tmp_path / "complaints.db"))
+    tracker = IncidentTracker(store)
+    coordinator, registry = make_coordinator()
+    registry.register("COMPLAINT", lambda: ComplaintAgent(store, tracker))
+    query = "No water in the Block B washrooms since morning"
+
+    async def run():
+        return await asyncio.gather(*(coordinator.process_query(query, {}) for _ in range(5)))
+
+    responses = asyncio.run(run())
+
+    tickets = sorted(store.tickets)
+    assert len(tickets) == 5
+    assert {store.tickets[t].incident_id for t in tickets} == {tickets[0]}
+    assert tracker.size(tickets[0]) == 5
+    assert len(analyses) == 1
+    assert sum(f"#{t}**" in r.content for t in tickets for r in responses) == 5
+
+
+class TicketAnalysis(BaseModel):
+    issue_type: str = Field(description="Type of issue")
+    severity: str = Field(description="Severity")
+
+
+class AnalyzingAgent(EchoAgent):
+    analysis_model = TicketAnalysis
+
+    async def process_query(self, query, context):
+        analysis = context.get("analysis")
+        if not isinstance(analysis, TicketAnalysis):
+            raise AssertionError("expected pre-computed analysis")
+        return AgentResponse(content=f"{analysis.issue_type}/{analysis.severity}")
+
+
+def test_agents_without_an_analysis_model_get_no_analysis():
+    class GreetingAgent(BaseAgent):
+        def get_system_prompt(self):
+            return "You greet students."
+
+        async def process_query(self, query, context):
+            analysis = await self.get_analysis(query, context)
+            return AgentResponse(content=f"hello ({analysis})")
+
+    agent = GreetingAgent("Greeter")
+    assert asyncio.run(agent.process_query("hi", {"analysis": TicketAnalysis(issue_type="x", severity="y")})).content == "hello (None)"
+
+
+def test_fused_mode_routes_and_analyzes_in_one_call(monkeypatch):
+    calls = []
+
+    def fake_llm(prompt_value):
+        calls.append(prompt_value)
+        return coordinator.get_fused_schema().model_validate({"route": {
+            "agent_type": "COMPLAINT", "urgency": "high", "has_safety_concern": "No",
+            "brief_summary": "fan", "issue_type": "electrical", "severity": "major",
+        }})
+
+    monkeypatch.setattr(CoordinatorAgent, "get_structured_llm", lambda self, model: RunnableLambda(fake_llm))
+    registry = AgentRegistry()
+    registry.register("COMPLAINT", AnalyzingAgent)
+    coordinator = CoordinatorAgent(registry=registry, fused=True)
+    coordinator.fast_router.threshold = 1.1
+    schema = coordinator.get_fused_schema()
+
+    response = asyncio.run(coordinator.process_query("the fan is making noise", {}))
+
+    assert response.content == "electrical/major"
+    assert len(calls) == 1
+    assert "COMPLAINT" in str(schema.model_json_schema())
+
+
+class SpeculativeAgent(BaseAgent):
+    analysis_model = TicketAnalysis
+
+    def __init__(self):
+        super().__init__("Speculative")
+
+    def get_system_prompt(self):
+        return ""
+
+    async def analyze(self, query, context):
+        await asyncio.sleep(0)
+        return TicketAnalysis(issue_type="electrical", severity="minor")
+
+    async def process_query(self, query, context):
+        if not isinstance(context.get("analysis"), TicketAnalysis):
+            raise AssertionError("expected speculative analysis")
+        analysis = await self.get_analysis(query, context)
+        return AgentResponse(content=f"{analysis.issue_type}/{analysis.severity}")
+
+
+def test_speculation_reuses_analysis_for_confirmed_route():
+    coordinator, registry = make_coordinator()
+    registry.register("COMPLAINT", SpeculativeAgent)
+    registry.register("MESS", SpeculativeAgent)
+    coordinator.fast_router.threshold = 1.1
+    coordinator.speculative = True
+    coordinator.speculator.max_agents = 2
+    coordinator.speculator.min_score = 0.0
+
+    response = asyncio.run(coordinator.process_query("the fan is making noise", {}))
+    stats = coordinator.get_metrics()["speculation"]
+
+    assert response.content == "electrical/minor"
+    assert stats["launched"] == 2
+    assert stats["wins"] == 1
+    assert stats["cancelled"] == 1
+
+
+class MealAnalysis(BaseModel):
+    query_type: str
+    meal_type: str
+    concern_level: str
+    requires_immediate_attention: str
+
+
+class TimetableAgent(SpeculativeAgent):
+    analysis_model = MealAnalysis
+    renders = 0
+
+    async def _handle_menu_inquiry(self, analysis):
+        TimetableAgent.renders += 1
+        return AgentResponse(content=f"menu for {analysis.meal_type}", urgency="low")
+
+
+def test_static_intents_answer_without_llm():
+    coordinator, registry = make_coordinator()
+    registry.register("MESS", TimetableAgent)
+
+    async def no_llm(query):
+        raise AssertionError("static intents must not call the LLM")
+
+    coordinator._classify_query = no_llm
+
+    async def run():
+        first = await coordinator.process_query("What is for lunch today?", {})
+        second = await coordinator.process_query("whats for lunch", {})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.content == second.content == "menu for lunch"
+    assert TimetableAgent.renders == 1
+    assert coordinator.intent_index.match("lunch was cold and stale") is None
+
+
+def test_safety_queries_skip_static_intents_and_reach_the_classifier():
+    coordinator, registry = make_coordinator()
+    coordinator.fast_router.threshold = 1.1
+    classified = []
+    classify = coordinator._classify_query
+
+    async def counting_classify(query):
+        classified.append(query)
+        return await classify(query)
+
+    coordinator._classify_query = counting_classify
+    queries = [
+        "There is a fire emergency in my block right now, what should I do?",
+        "What are the rules if someone is threatening me in the hostel?",
+        "water leaking from the tank during maintenance",
+        "smoke coming out of the mess, what is the timing to report",
+    ]
+    responses = [asyncio.run(coordinator.process_query(query, {})) for query in queries]
+
+    assert classified == queries
+    assert all(response.urgency == "high" for response in responses)
+    assert all(coordinator.intent_index.match(query) is None for query in queries)
+    assert coordinator.intent_index.stats()["safety_skips"] >= len(queries)
+    # Plain policy questions are still answered statically; words inside longer words don't count
+    assert coordinator.intent_index.match("what are the evacuation rules") == ("rules_information", "emergency")
+    assert coordinator.intent_index.match("what are the rules for guesthouse bookings") is None
+
+
+def test_exhausted_deadline_returns_partial_answer(monkeypatch):
+    async def slow_llm(prompt_value):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(CoordinatorAgent, "get_structured_llm", lambda self, model: RunnableLambda(slow_llm))
+    coordinator = CoordinatorAgent(registry=AgentRegistry())
+    coordinator.fast_router.threshold = 1.1
+
+    async def run():
+        with deadline_scope(0.1):
+            return await coordinator.process_query("there are sparks coming from the socket", {})
+
+    response = asyncio.run(run())
+    assert "couldn't finish" in response.content
+    assert "safety" in response.content
+    assert response.confidence < 0.5
+
+
+def test_open_breaker_serves_degraded_answers(monkeypatch):
+    breaker = CircuitBreaker(open_seconds=60)
+    breaker._transition("open")
+    monkeypatch.setattr(groq_client, "llm_breaker", breaker)
+
+    coordinator = CoordinatorAgent(registry=AgentRegistry())
+    coordinator.registry.register("COMPLAINT", SpeculativeAgent)
+
+    response = asyncio.run(coordinator.process_query("the tap in my bathroom is leaking", {}))
+    metrics = coordinator.get_metrics()["circuit_breaker"]
+
+    assert "limited mode" in response.content
+    assert response.content.endswith("plumbing/major")
+    assert response.confidence <= 0.6
+    assert metrics["degraded_responses"] == 1
+
+
+def test_open_breaker_serves_every_degraded_status_scope(monkeypatch):
+    from agents.status_updates import StatusAgent
+
+    breaker = CircuitBreaker(open_seconds=60)
+    breaker._transition("open")
+    monkeypatch.setattr(groq_client, "llm_breaker", breaker)
+    coordinator = CoordinatorAgent(registry=AgentRegistry())
+    coordinator.registry.register("STATUS", StatusAgent)
+
+    queries = {
+        "tell me about the water supply in the hostel": "Normal Operations",
+        "what is the current wifi status": "Internet",
+        "is there a power outage in block B": "Reporting",
+    }
+    for query, expected in queries.items():
+        response = asyncio.run(coordinator.process_query(query, {}))
+        assert response.content.startswith(DEGRADED_HEADER), query
+        assert expected in response.content, query
+    assert coordinator.get_metrics()["circuit_breaker"]["degraded_responses"] == len(queries)
+
+
+def test_agent_chains_are_compiled_once(monkeypatch):
+    built = []
+    monkeypatch.setattr(CoordinatorAgent, "get_structured_llm", lambda self, model: built.append(model) or RunnableLambda(lambda x: x))
+    coordinator = CoordinatorAgent(registry=AgentRegistry())
+
+    first = coordinator.get_chain(QueryClassification, "Student query: {query}")
+    second = coordinator.get_chain(QueryClassification, "Student query: {query}")
+
+    assert first is second is coordinator.classification_chain
+    assert built.count(QueryClassification) == 1
+
+
+def test_classification_is_announced_before_the_specialist_answers():
+    coordinator, registry = make_coordinator()
+    coordinator.fast_router.threshold = 1.1
+    events = []
+
+    async def on_classified(classification):
+        events.append(("classified", classification.urgency, len(registry.get("COMPLAINT").calls)))
+
+    response = asyncio.run(coordinator.process_query("my fan is broken", {"on_classified": on_classified}))
+
+    assert events == [("classified", "high", 0)]
+    assert response.content == "echo: my fan is broken"
+
+
+def test_streamed_sections_match_the_formatted_response():
+    response = AgentResponse(
+        content="Switch off the mains.\n\nAn electrician is on the way.",
+        form_link="https://forms.example/electrical",
+        next_steps=["Fill the form", "Wait for the call"],
+        urgency="urgent",
+    )
+    chunks = list(ResponseFormatter.iter_agent_response(response))
+
+    assert "".join(chunks) == ResponseFormatter.format_agent_response(response)
+    assert chunks[0].startswith("🚨") and len(chunks) == 6
+    assert "Safety first" in ResponseFormatter.format_early_notice("high", True)
+
+
+def test_concurrent_classifications_share_one_batched_call(monkeypatch):
+    settings = FakeLLMSettings("fixed:5")
+    manager = groq_client.LLMClientManager(backend="fake", fake_settings=settings)
+    monkeypatch.setattr(base_agent, "get_groq_llm", manager.get_llm)
+    coordinator = CoordinatorAgent(registry=AgentRegistry())
+    coordinator.batch_classification = True
+    coordinator.classification_batcher.window = 0.05
+    queries = ["my fan is broken", "i lost my wallet", "what is for dinner", "is there a power cut in block b"]
+
+    async def run():
+        return await asyncio.gather(*(coordinator._classify_with_llm(query) for query in queries))
+
+    results = asyncio.run(run())
+    stats = coordinator.get_metrics()["classification_batching"]
+
+    assert [result.agent_type for result in results] == ["COMPLAINT", "LOST_FOUND", "MESS", "STATUS"]
+    assert settings.calls == 1
+    assert stats["batches"] == 1 and stats["avg_batch_size"] == 4
+    assert stats["max_queue_delay_ms"] >= 40
+
+
+class PhotoAgent(SpeculativeAgent):
+    async def process_query(self, query, context):
+        return AgentResponse(content=await self.describe_image(context))
+
+
+class DescribingAgent(SpeculativeAgent):
+    async def analyze(self, query, context):
+        return TicketAnalysis(issue_type=await self.describe_image(context), severity="minor")
+
+    async def process_query(self, query, context):
+        return AgentResponse(content=(await self.get_analysis(query, context)).issue_type)
+
+
+def test_analyses_of_unreadable_photos_are_not_cached(monkeypatch):
+    from utils.cache import result_cache
+
+    replies = iter(["Error analyzing image: timed out", "a broken fan blade"])
+
+    async def flaky_vision(self, image, prompt):
+        return next(replies)
+
+    monkeypatch.setattr(BaseAgent, "analyze_image", flaky_vision)
+    agent = DescribingAgent()
+    context = {"image_data": b"\xff\xd8\xff flaky photo"}
+    first = asyncio.run(agent.process_query("my fan broke", dict(context)))
+    second = asyncio.run(agent.process_query("my fan broke", dict(context)))
+    assert first.content.startswith("Error analyzing image")
+    assert second.content == "a broken fan blade"
+    key = result_cache.make_key("my fan broke", context["image_data"])
+    assert result_cache.get("TicketAnalysis", key).issue_type == "a broken fan blade"
+
+
+def test_vision_runs_while_the_query_is_classified(monkeypatch):
+    vision_calls = []
+
+    async def slow_vision(self, image, prompt):
+        vision_calls.append(image)
+        await asyncio.sleep(0.2)
+        return "a broken fan blade"
+
+    async def slow_classify(query):
+        await asyncio.sleep(0.2)
+        return QueryClassification(agent_type="COMPLAINT", urgency="high", has_safety_concern="No", brief_summary=query)
+
+    monkeypatch.setattr(BaseAgent, "analyze_image", slow_vision)
+    registry = AgentRegistry()
+    registry.register("COMPLAINT", PhotoAgent)
+    coordinator = CoordinatorAgent(registry=registry)
+    coordinator.fast_router.threshold = 1.1
+    coordinator._classify_query = slow_classify
+
+    async def timed():
+        started = asyncio.get_running_loop().time()
+        response = await coordinator.process_query("my fan broke", {"image_data": b"\xff\xd8\xff photo"})
+        return response, asyncio.get_running_loop().time() - started
+
+    response, elapsed = asyncio.run(timed())
+    assert response.content == "a broken fan blade"
+    assert vision_calls == [b"\xff\xd8\xff photo"]
+    assert elapsed < 0.35
+    assert coordinator.get_metrics()["vision_prefetch"] == {"started": 1, "completed": 1}
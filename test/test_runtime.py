@@ -0,0 +1,870 @@
+# test/test_runtime.py
+import asyncio
+import base64
+import io
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from tools.complaint_store import ComplaintStore
+from tools.circuit_breaker import CircuitBreaker, CircuitOpenError
+from tools.fake_llm import FakeLLMError, FakeLLMSettings, LatencyDistribution
+from tools import groq_client
+from tools.groq_client import LLMClientManager, invoke_llm
+from tools.hedging import Hedger
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.incident_tracker import IncidentTracker
+from tools.image_index import ImageIndex, MultiIndexHash, hamming
+from tools.image_preprocessor import ImagePreprocessor, ImageProcessingError
+from tools.lost_found_store import LostFoundReport, LostFoundStore, extract_locations
+from tools.rate_limiter import AdaptiveLimiter, LLMOverloadedError, is_rate_limit_error
+from tools.token_accounting import TokenMeter
+from tools.token_report import build_report
+from utils.cache import ResultCache, TTLCache, VisionCache
+from utils.deadline import DeadlineExceeded
+from utils.response_formatter import ResponseFormatter
+from utils.singleflight import SingleFlight
+from utils.validators import QueryValidator
+
+
+def test_cache_key_normalizes_query_text():
+    assert ResultCache.make_key("WiFi not working!!") == ResultCache.make_key("  wifi   NOT working")
+    assert ResultCache.make_key("fan", "aGVsbG8=") != ResultCache.make_key("fan", "d29ybGQ=")
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    cache = TTLCache(ttl=60, max_bytes=20)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+    cache.ttl = 0.01
+    cache.set("d", 4, 5)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_result_cache_uses_per_type_ttls():
+    cache = ResultCache(ttls={"StatusQueryAnalysis": 30})
+    cache.set("StatusQueryAnalysis", "power cut", {"facility_type": "power"})
+    stats = cache.stats()
+
+    assert cache.get("StatusQueryAnalysis", "power cut") == {"facility_type": "power"}
+    assert stats["StatusQueryAnalysis"]["ttl_seconds"] == 30
+    assert cache.namespace("RulesQueryAnalysis").ttl == 6 * 3600
+
+
+def test_singleflight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "power cut in Block B"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("power cut block b", work) for _ in range(5)))
+
+    results = asyncio.run(run())
+    stats = flight.stats()
+
+    assert results == ["power cut in Block B"] * 5
+    assert len(executions) == 1
+    assert stats["coalesced"] == 4
+    assert stats["max_waiters"] == 5
+    assert stats["in_flight"] == 0
+
+
+def test_micro_batches_run_under_the_loosest_deadline_and_split_their_tokens():
+    from tools.token_accounting import current_usage
+    from utils.batching import MicroBatcher
+    from utils.deadline import current_deadline, deadline_scope
+
+    meter = TokenMeter()
+    seen = {}
+
+    async def classify(queries):
+        seen["budget"] = current_deadline.get().budget
+        seen["usage"] = current_usage.get()
+        meter.record("Coordinator", "classification", 300, 30, 0.01)
+        await asyncio.sleep(0.05)
+        return [query.upper() for query in queries]
+
+    batcher = MicroBatcher(classify, window=0.01, stage="classification")
+
+    async def member(query, budget):
+        with deadline_scope(budget), meter.request_scope() as usage:
+            try:
+                return await batcher.submit(query), usage
+            except DeadlineExceeded:
+                return None, usage
+
+    async def run():
+        return await asyncio.gather(member("fan", 5), member("wallet", 30), member("dinner", 0.05))
+
+    (fan, fan_usage), (wallet, wallet_usage), (dinner, dinner_usage) = asyncio.run(run())
+    assert (fan, wallet, dinner) == ("FAN", "WALLET", None)
+    # The shared call belongs to no member's request and is bounded by the loosest deadline
+    assert seen["budget"] == 30 and seen["usage"] not in (fan_usage, wallet_usage, dinner_usage)
+    assert fan_usage.summary()["input_tokens"] == 100 and wallet_usage.summary()["output_tokens"] == 10
+    assert fan_usage.shared_calls == 1 and dinner_usage.calls == []
+    assert batcher.stats()["deadline_exceeded"] == 1
+
+
+def test_llm_clients_are_shared_per_model_and_temperature():
+    os.environ.setdefault("GROQ_API_KEY", "test-key")
+    manager = LLMClientManager()
+
+    first = manager.get_llm("openai/gpt-oss-20b", 0.3)
+    assert manager.get_llm("openai/gpt-oss-20b", 0.3) is first
+    assert manager.get_llm("openai/gpt-oss-20b", 0.2) is not first
+    assert manager.get_llm("openai/gpt-oss-20b", 0.2).http_async_client is first.http_async_client
+    asyncio.run(manager.aclose())
+
+
+def test_limiter_queues_then_sheds_excess_load():
+    async def run():
+        limiter = AdaptiveLimiter(initial_concurrency=1, max_queue=1, max_queue_wait=0.05)
+        release = asyncio.Event()
+
+        async def call():
+            async with limiter.slot(estimated_tokens=100):
+                await release.wait()
+
+        first = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        try:
+            await call()
+        except LLMOverloadedError:
+            shed_immediately = True
+        else:
+            shed_immediately = False
+        try:
+            await queued
+        except LLMOverloadedError:
+            pass
+        release.set()
+        await first
+        return limiter.stats(), shed_immediately
+
+    stats, shed_immediately = asyncio.run(run())
+    assert shed_immediately
+    assert stats["shed"] == 2
+    assert stats["admitted"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_limiter_admits_typical_load_once_estimates_are_calibrated(monkeypatch):
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    # Default quotas; each call is reserved at 1500 tokens but the provider counts ~500
+    limiter = AdaptiveLimiter()
+    meter = TokenMeter()
+    monkeypatch.setattr(groq_client, "llm_limiter", limiter)
+    monkeypatch.setattr(groq_client, "token_meter", meter)
+    monkeypatch.setattr(groq_client, "llm_breaker", CircuitBreaker())
+    monkeypatch.setattr(groq_client, "llm_hedger", Hedger(enabled=False))
+
+    async def call(inputs):
+        await asyncio.sleep(0.005)
+        return AIMessage(content="ok", usage_metadata={"input_tokens": 420, "output_tokens": 80, "total_tokens": 500})
+
+    async def arrive(delay):
+        await asyncio.sleep(delay)
+        return await invoke_llm(RunnableLambda(call), {}, 1500, stage="classification", agent="Coordinator")
+
+    async def load():
+        return await asyncio.gather(*(arrive(i * 0.003) for i in range(180)))
+
+    # 180 x 1500 would be 270k tokens against the 100k TPM bucket and shed a third of the calls
+    assert len(asyncio.run(load())) == 180
+    stats = limiter.stats()
+    assert stats["shed"] == 0 and stats["admitted"] == 180
+    assert stats["max_queue_ms"] < 1000
+    assert meter.expected_tokens("Coordinator", "classification") == 500
+    assert stats["tokens_settled"] > 0
+
+
+def test_limiter_window_halves_on_rate_limit():
+    class RateLimitError(Exception):
+        status_code = 429
+
+    async def run():
+        limiter = AdaptiveLimiter(initial_concurrency=8)
+        await limiter.acquire(10)
+        await limiter.release(0.1, RateLimitError())
+        await limiter.acquire(10)
+        await limiter.release(0.1)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert 4 < limiter.window < 5
+    assert limiter.rate_limited == 1
+
+
+
+def test_limiter_refunds_a_call_cancelled_while_waiting_for_quota():
+    limiter = AdaptiveLimiter(tpm=600, max_queue_wait=30)
+
+    async def scenario():
+        async with limiter.slot(600):
+            pass
+        waiting = asyncio.ensure_future(limiter.acquire(100))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["in_flight"] == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(scenario())
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0 and stats["admitted"] == 1
+    assert stats["tpm_tokens_left"] >= 0
+    # The condition follows the running loop, so the limiter works under a fresh one too
+    assert asyncio.run(limiter.acquire(1)) >= 0 and limiter.stats()["in_flight"] == 1
+
+def test_hedger_duplicates_slow_calls_and_keeps_the_fastest():
+    hedger = Hedger(min_samples=3, max_fraction=1.0)
+    for _ in range(3):
+        hedger.observe("analysis", 0.01)
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "answer"
+
+    started = time.monotonic()
+    result = asyncio.run(hedger.call("analysis", call))
+
+    assert result == "answer"
+    assert time.monotonic() - started < 0.5
+    assert hedger.counters["hedged"] == 1
+    assert hedger.counters["hedge_wins"] == 1
+
+
+def test_hedger_enforces_stage_timeout():
+    hedger = Hedger()
+
+    async def never_finishes():
+        await asyncio.sleep(10)
+
+    try:
+        asyncio.run(hedger.call("classification", never_finishes, timeout=0.01))
+    except DeadlineExceeded as e:
+        assert e.stage == "classification"
+    else:
+        raise AssertionError("expected DeadlineExceeded")
+
+
+def test_breaker_opens_on_errors_and_recovers_through_probes():
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=4, open_seconds=0.05, half_open_probes=2)
+    for error in (None, RuntimeError("boom"), RuntimeError("boom"), None):
+        breaker.before_call()
+        breaker.record(0.01, error)
+    assert breaker.state == "open"
+
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("open breaker must reject calls")
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("only the configured probes may pass")
+    breaker.record(0.01)
+    breaker.record(0.01)
+
+    stats = breaker.stats()
+    assert stats["state"] == "closed"
+    assert stats["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+    assert stats["rejected"] == 2
+
+
+
+def test_cancelled_probe_does_not_wedge_the_breaker(monkeypatch):
+    from langchain_core.runnables import RunnableLambda
+
+    breaker = CircuitBreaker(half_open_probes=1, open_seconds=0)
+    breaker._transition("open")
+    monkeypatch.setattr(groq_client, "llm_breaker", breaker)
+
+    async def hang(inputs):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        probe = asyncio.ensure_future(invoke_llm(RunnableLambda(hang), {}, 10, stage="classification"))
+        await asyncio.sleep(0.01)
+        assert breaker.state == "half_open"
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        # The slot is free again, so the next call probes instead of being rejected
+        return await invoke_llm(RunnableLambda(lambda inputs: "ok"), {}, 10, stage="classification")
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed" and breaker.stats()["probes_released"] == 1
+
+def test_shed_probe_releases_its_slot_and_hedges_record_once(monkeypatch):
+    from langchain_core.runnables import RunnableLambda
+
+    breaker = CircuitBreaker(half_open_probes=1, open_seconds=0)
+    breaker._transition("open")
+    monkeypatch.setattr(groq_client, "llm_breaker", breaker)
+    monkeypatch.setattr(groq_client, "llm_limiter", AdaptiveLimiter(max_queue=0))
+    try:
+        asyncio.run(invoke_llm(RunnableLambda(lambda inputs: "ok"), {}, 10, stage="classification"))
+    except LLMOverloadedError:
+        pass
+    else:
+        raise AssertionError("a full queue must shed the call")
+    assert breaker.state == "half_open" and breaker.stats()["probes_released"] == 1
+
+    # The released slot probes again; the hedged duplicate adds no second outcome
+    hedger = Hedger(min_samples=3, max_fraction=1.0)
+    for _ in range(3):
+        hedger.observe("classification", 0.01)
+    monkeypatch.setattr(groq_client, "llm_hedger", hedger)
+    monkeypatch.setattr(groq_client, "llm_limiter", AdaptiveLimiter())
+    recorded = []
+    monkeypatch.setattr(breaker, "record", lambda latency, error=None: recorded.append(error))
+
+    async def slow(inputs):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(invoke_llm(RunnableLambda(slow), {}, 10, stage="classification")) == "ok"
+    assert hedger.counters["hedged"] == 1 and recorded == [None]
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(slow_call_seconds=1.0, slow_rate=0.5, min_calls=2)
+    breaker.record(2.0)
+    breaker.record(3.0)
+    assert breaker.state == "open"
+
+
+def test_token_usage_is_recorded_per_stage_and_request(monkeypatch):
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    meter = TokenMeter()
+    monkeypatch.setattr(groq_client, "token_meter", meter)
+    raw = AIMessage(content="", usage_metadata={"input_tokens": 900, "output_tokens": 40, "total_tokens": 940})
+    chain = RunnableLambda(lambda inputs: {"raw": raw, "parsed": "parsed-model", "parsing_error": None})
+
+    async def run():
+        with meter.request_scope() as usage:
+            first = await invoke_llm(chain, {}, 100, stage="classification", agent="Coordinator", system_prompt_chars=3000)
+            await invoke_llm(chain, {}, 100, stage="analysis", agent="Mess Manager")
+        return first, usage
+
+    result, usage = asyncio.run(run())
+    stats = meter.stats()
+
+    assert result == "parsed-model"
+    assert usage.input_tokens == 1800
+    assert stats["stages"]["Coordinator/classification"]["input_histogram"]["<=1024"] == 1
+    assert stats["recent_requests"][-1]["by_stage"] == {"Coordinator/classification": 940, "Mess Manager/analysis": 940}
+
+
+def test_token_report_flags_prompt_dominated_stages():
+    calls = []
+    for i in range(20):
+        calls.append({"agent": "Coordinator", "stage": "classification", "input_tokens": 2000 + i,
+                      "output_tokens": 30, "latency_ms": 100 + 0.5 * (2000 + i) + 30, "system_prompt_chars": 7600})
+        calls.append({"agent": "Mess Manager", "stage": "analysis", "input_tokens": 200 + i,
+                      "output_tokens": 400, "latency_ms": 100 + 0.5 * (200 + i) + 400, "system_prompt_chars": 100})
+
+    stages = {row["stage"]: row for row in build_report(calls)["stages"]}
+
+    assert stages["Coordinator/classification"]["flags"]
+    assert not stages["Mess Manager/analysis"]["flags"]
+
+
+def test_fake_backend_returns_deterministic_structured_output():
+    from langchain_core.prompts import ChatPromptTemplate
+    from pydantic import BaseModel, Field
+
+    class LeakAnalysis(BaseModel):
+        issue_type: str = Field(description="Type: electrical, plumbing, furniture, room, internet, or general")
+        severity: str = Field(description="Severity: minor, moderate, major, critical")
+        immediate_action_needed: str = Field(description="Immediate action required? Yes or No")
+
+    manager = LLMClientManager(backend="fake", fake_settings=FakeLLMSettings("fixed:0"))
+    prompt = ChatPromptTemplate.from_messages([("system", "You are helpful"), ("human", "Complaint: {query}")])
+    chain = prompt | manager.get_llm().with_structured_output(LeakAnalysis, include_raw=True)
+
+    first = asyncio.run(chain.ainvoke({"query": "water leaking from the bathroom tap"}))
+    second = asyncio.run(chain.ainvoke({"query": "water leaking from the bathroom tap"}))
+
+    assert first["parsed"] == second["parsed"]
+    assert first["parsed"].issue_type == "plumbing"
+    assert first["raw"].usage_metadata["input_tokens"] > 0
+    assert manager.stats()["backend"] == "fake"
+
+
+def test_fake_backend_injects_latency_and_errors():
+    settings = FakeLLMSettings("uniform:10,20", error_rate=0.5, rate_limit_rate=0.5, seed=7)
+    manager = LLMClientManager(backend="fake", fake_settings=settings)
+    errors = []
+    for _ in range(10):
+        try:
+            asyncio.run(manager.get_llm().ainvoke("hi"))
+        except FakeLLMError as e:
+            errors.append(e)
+
+    assert len(errors) == 10
+    assert any(is_rate_limit_error(e) for e in errors)
+    assert any(not is_rate_limit_error(e) for e in errors)
+    samples = [LatencyDistribution("lognormal:400,0.4").sample(settings.rng) for _ in range(200)]
+    assert 0.2 < sorted(samples)[100] < 0.8
+
+
+
+def test_pipeline_benchmark_runs_end_to_end_on_the_fake_backend():
+    bench = Path(__file__).parent.parent / "benchmarks" / "bench_pipeline.py"
+    env = {**os.environ, "FAKE_LLM_LATENCY": "fixed:0", "FAKE_LLM_ERROR_RATE": "0", "FAKE_LLM_RATE_LIMIT_RATE": "0"}
+    result = subprocess.run([sys.executable, str(bench), "26", "4"], env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "outcomes: {'ok': 26}" in result.stdout
+    # Every specialist was reached through the real registry
+    for stage in ("Complaint Handler", "Lost & Found Specialist", "Mess Manager", "Policy Advisor", "Status Monitor"):
+        assert f"llm {stage}/analysis" in result.stdout
+
+def test_images_are_downscaled_stripped_and_reencoded():
+    preprocessor = ImagePreprocessor(max_dimension=512, quality=75, workers=1)
+    photo = Image.linear_gradient("L").resize((2000, 1500)).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    raw = io.BytesIO()
+    photo.save(raw, format="PNG", exif=exif)
+
+    prepared = asyncio.run(preprocessor.prepare(base64.b64encode(raw.getvalue()).decode()))
+    assert prepared.original_format == "png"
+    assert prepared.mime_type == "image/jpeg" and prepared.data_url.startswith("data:image/jpeg;base64,")
+    assert prepared.size == (512, 384)
+    assert len(prepared.data) < len(raw.getvalue())
+    assert not Image.open(io.BytesIO(prepared.data)).getexif()
+
+    transparent = io.BytesIO()
+    Image.new("RGBA", (64, 64), (255, 0, 0, 0)).save(transparent, format="PNG")
+    assert preprocessor.prepare_sync(transparent.getvalue()).mime_type == "image/png"
+
+    with pytest.raises(ImageProcessingError):
+        preprocessor.prepare_sync(b"not an image")
+    stats = preprocessor.stats()
+    assert stats["processed"] == 2 and stats["downscaled"] == 1 and stats["rejected"] == 1
+
+
+def test_vision_answers_are_cached_by_image_content(monkeypatch, tmp_path):
+    from tools import vision_analyzer
+    from langchain_core.messages import AIMessage
+
+    calls = []
+
+    async def fake_invoke_llm(llm, messages, estimated_tokens, **kwargs):
+        calls.append(messages)
+        await asyncio.sleep(0.01)
+        return AIMessage(content=f"answer {len(calls)}")
+
+    cache = VisionCache(disk_dir=str(tmp_path))
+    monkeypatch.setattr(vision_analyzer, "vision_cache", cache)
+    monkeypatch.setattr(vision_analyzer, "get_vision_llm", lambda: None)
+    monkeypatch.setattr(vision_analyzer, "invoke_llm", fake_invoke_llm)
+
+    raw = io.BytesIO()
+    Image.new("RGB", (40, 30), (10, 200, 30)).save(raw, format="PNG")
+    photo = base64.b64encode(raw.getvalue()).decode()
+
+    async def scenario():
+        concurrent = await asyncio.gather(*(vision_analyzer.analyze_image(photo, "Describe") for _ in range(3)))
+        resent = await vision_analyzer.analyze_image(raw.getvalue(), "Describe")
+        other_prompt = await vision_analyzer.analyze_image(photo, "Damage?")
+        await cache.flush()
+        return concurrent, resent, other_prompt
+
+    concurrent, resent, other_prompt = asyncio.run(scenario())
+    assert concurrent == ["answer 1"] * 3 and resent == "answer 1"
+    assert other_prompt == "answer 2" and len(calls) == 2
+    assert cache.stats()["image_bytes_saved"] > 0
+
+    # A fresh process finds the answer on disk
+    restarted = VisionCache(disk_dir=str(tmp_path))
+    assert asyncio.run(restarted.get(VisionCache.make_key(raw.getvalue(), "Describe"))) == "answer 1"
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_vision_passes_deadline_breaker_and_overload_errors_through(monkeypatch, tmp_path):
+    from tools import vision_analyzer
+
+    raw = io.BytesIO()
+    Image.new("RGB", (40, 30), (10, 200, 30)).save(raw, format="PNG")
+    monkeypatch.setattr(vision_analyzer, "vision_cache", VisionCache(disk_dir=str(tmp_path)))
+    monkeypatch.setattr(vision_analyzer, "get_vision_llm", lambda: None)
+
+    for error in (DeadlineExceeded("vision"), CircuitOpenError("down"), LLMOverloadedError("busy")):
+        async def failing_invoke_llm(llm, messages, estimated_tokens, **kwargs):
+            raise error
+
+        monkeypatch.setattr(vision_analyzer, "invoke_llm", failing_invoke_llm)
+        with pytest.raises(type(error)):
+            asyncio.run(vision_analyzer.analyze_image(raw.getvalue(), "Describe"))
+
+    async def broken_invoke_llm(llm, messages, estimated_tokens, **kwargs):
+        raise RuntimeError("bad response")
+
+    monkeypatch.setattr(vision_analyzer, "invoke_llm", broken_invoke_llm)
+    assert asyncio.run(vision_analyzer.analyze_image(raw.getvalue(), "Describe")).startswith("Error analyzing image")
+
+    # Neither failures nor empty replies reach the cache or its disk tier
+    async def empty_invoke_llm(llm, messages, estimated_tokens, **kwargs):
+        return SimpleNamespace(content="")
+
+    monkeypatch.setattr(vision_analyzer, "invoke_llm", empty_invoke_llm)
+    assert asyncio.run(vision_analyzer.analyze_image(raw.getvalue(), "Describe")) == ""
+    asyncio.run(vision_analyzer.vision_cache.flush())
+    assert vision_analyzer.vision_cache.stats()["entries"] == 0 and not list(tmp_path.iterdir())
+
+
+def test_vision_disk_cache_prunes_oldest_files_past_its_byte_budget(tmp_path):
+    cache = VisionCache(disk_dir=str(tmp_path), disk_max_bytes=1000)
+
+    async def fill():
+        for i in range(12):
+            cache.set(f"photo-{i:02d}", "x" * 100, 5000)
+            await asyncio.sleep(0.01)  # distinct modification times
+            await cache.flush()
+
+    asyncio.run(fill())
+    stats = cache.stats()
+    files = sorted(path.name for path in tmp_path.glob("*.json"))
+
+    # Tracked bytes match the directory, kept under budget without a scan per write
+    assert stats["disk_bytes"] == sum(path.stat().st_size for path in tmp_path.glob("*.json")) <= 1000
+    assert 0 < stats["disk_prunes"] < stats["disk_writes"] == 12
+    assert files[-1] == "photo-11.json" and "photo-00.json" not in files
+
+
+def test_image_validation_decodes_in_chunks_and_rejects_early(monkeypatch):
+    from utils import validators
+
+    raw = io.BytesIO()
+    Image.new("RGB", (300, 300), (200, 30, 30)).save(raw, format="JPEG")
+    photo = base64.b64encode(raw.getvalue()).decode()
+    monkeypatch.setattr(validators, "BASE64_CHUNK_CHARS", 64)
+
+    result = QueryValidator.validate_image_data(photo)
+    assert result["is_valid"] and result["format"] == "jpeg"
+    assert result["image_bytes"] == raw.getvalue()
+
+    decoded, b64decode = [], validators.base64.b64decode
+    monkeypatch.setattr(validators.base64, "b64decode",
+                        lambda chunk, validate: decoded.append(chunk) or b64decode(chunk, validate=validate))
+    corrupt = photo[:128] + "!" * 4 + photo[132:]
+    assert not QueryValidator.validate_image_data(corrupt)["is_valid"]
+    assert len(decoded) == 3  # stopped at the first bad chunk
+
+    # Padding is only valid at the very end of the data, not at the end of a chunk
+    decoded.clear()
+    padded = photo[:62] + "==" + photo[64:]
+    assert not QueryValidator.validate_image_data(padded)["is_valid"]
+    assert not decoded
+    assert not QueryValidator.validate_image_data(photo[:-4] + "A===")["is_valid"]
+
+    decoded.clear()
+    text = base64.b64encode(b"just some text, not a photo" * 100).decode()
+    assert "Unsupported image type" in QueryValidator.validate_image_data(text)["warnings"][0]
+    assert len(decoded) == 1
+
+    decoded.clear()
+    oversize = QueryValidator.validate_image_data("A" * 400, max_bytes=100)
+    assert not oversize["is_valid"] and not decoded
+
+
+def _photo(seed, size=(320, 240), fmt="PNG", quality=90):
+    import numpy as np
+    pixels = np.random.default_rng(seed).integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).resize(size, Image.Resampling.BICUBIC).save(out, format=fmt, quality=quality)
+    return out.getvalue()
+
+
+def test_lost_found_reports_match_recompressed_photos_of_the_same_item(monkeypatch, tmp_path):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    from agents.lost_found import LostFoundAgent
+    from tools import image_index as image_index_module
+
+    index = ImageIndex(max_distance=10, max_results=3)
+    agent = LostFoundAgent(image_index=index, store=LostFoundStore(str(tmp_path / "lost_found.db")))
+
+    def analysis(category):
+        return SimpleNamespace(item_category=category, time_reference="unknown")
+
+    async def file(kind, query, photo):
+        return await agent._record_report(kind, query, analysis("electronics"), {"image_data": photo})
+
+    async def scenario():
+        lost = [(await file("lost", f"Lost gadget number {seed}", _photo(seed)))[0] for seed in range(20)]
+        # The finder's photo of item 7: different size, JPEG-recompressed, sent as base64
+        photo = base64.b64encode(_photo(7, size=(640, 480), fmt="JPEG", quality=60)).decode()
+        _, matches = await file("found", "Found a gadget", photo)
+        # A photo past the pixel limit is rejected before decoding; the report still gets its text matches
+        monkeypatch.setattr(image_index_module, "MAX_IMAGE_PIXELS", 1000)
+        oversized_id, text_matches = await file("found", "Found gadget number 3", _photo(3))
+        await agent.store.flush()
+        return lost, matches, oversized_id, text_matches
+
+    lost, matches, oversized_id, text_matches = asyncio.run(scenario())
+    assert matches[0].startswith(f"• Report {lost[7]} - electronics (")
+    assert "photo match" in matches[0]
+    assert agent.store.reports[oversized_id].hashes is None
+    assert any(lost[3] in line and "similar description" in line for line in text_matches)
+    assert index.stats()["entries"] == {"lost": 20, "found": 1}
+    assert index.stats()["rejected"] == 1
+
+    # A restarted agent loads the photos of open reports on its first warm-up, not at construction
+    restarted = LostFoundAgent(image_index=ImageIndex(), store=LostFoundStore(str(tmp_path / "lost_found.db")))
+    assert restarted.image_index.stats()["entries"] == {"lost": 0, "found": 0}
+    asyncio.run(restarted.warm_up())
+    assert restarted.image_index.stats()["entries"] == {"lost": 20, "found": 1}
+
+
+def test_multi_index_hash_agrees_with_a_linear_scan():
+    import random
+    rng = random.Random(3)
+    keys = []
+    for _ in range(300):
+        base = rng.getrandbits(64)
+        keys += [base ^ sum(1 << rng.randrange(64) for _ in range(rng.randint(0, 8))) for _ in range(5)]
+    index = MultiIndexHash()
+    for slot, key in enumerate(keys):
+        index.add(key, slot)
+
+    for query in keys[::37]:
+        found, checked = index.search(query, 10)
+        assert sorted(slot for _, slot in found) == [slot for slot, key in enumerate(keys) if hamming(query, key) <= 10]
+        assert checked < len(keys)
+
+
+def test_lost_found_store_matches_reports_and_persists_in_batches(tmp_path):
+    path = str(tmp_path / "lost_found.db")
+
+    def report(report_id, kind, category, text):
+        return LostFoundReport(report_id=report_id, kind=kind, item_category=category,
+                               description=text, locations=extract_locations(text))
+
+    async def scenario():
+        store = LostFoundStore(path, flush_interval=0.01)
+        store.record(report("L-1", "lost", "electronics", "Lost my black Samsung phone in the mess, Block C"))
+        store.record(report("L-2", "lost", "electronics", "Lost blue earphones in the library"))
+        store.record(report("L-3", "lost", "keys", "Lost room keys with a red keychain in the mess"))
+        # Recording is in memory only; the disk write happens in the background
+        assert store.stats()["pending_writes"] == 3
+        found = report("F-1", "found", "electronics", "Found a black samsung phone near the mess counter")
+        candidates = store.candidates(found)
+        await store.flush()
+        return store, candidates
+
+    store, candidates = asyncio.run(scenario())
+    assert [r.report_id for _, r in candidates] == ["L-1"]
+    assert extract_locations("left it in the common room on block c") == ["common room", "block c"]
+    assert store.stats()["batches_written"] == 1 and store.stats()["pending_writes"] == 0
+
+    # After a restart the reports are read on the store's thread; concurrent warm-ups share the read
+    restarted = LostFoundStore(path)
+
+    async def warm_up():
+        return await asyncio.gather(restarted.warm_up(), restarted.warm_up())
+
+    first, second = asyncio.run(warm_up())
+    assert {r.report_id for r in first + second} == {"L-1", "L-2", "L-3"}
+    assert restarted.stats()["loaded"] == 3 and restarted.load() == []
+    found = report("F-2", "found", "keys", "Found keys with red keychain at the mess")
+    assert [r.report_id for _, r in restarted.candidates(found)] == ["L-3"]
+
+
+def test_closed_lost_found_reports_stop_matching(tmp_path):
+    path = str(tmp_path / "lost_found.db")
+    now = time.time()
+
+    def report(report_id, kind, text, age_days=0):
+        return LostFoundReport(report_id=report_id, kind=kind, item_category="electronics", description=text,
+                               locations=extract_locations(text), created_at=now - age_days * 86400)
+
+    phone = report("F-9", "found", "Found a black samsung phone at the mess counter")
+
+    async def scenario():
+        store = LostFoundStore(path, flush_interval=0.01, expire_days=31)
+        store.record(report("L-1", "lost", "Lost my black Samsung phone in the mess"))
+        store.record(report("L-2", "lost", "Lost black samsung phone near the mess", age_days=40))
+        store.record(report("L-3", "lost", "Lost blue earphones in the library"))
+        assert store.close("L-1").status == "claimed" and store.close("L-1") is None
+        assert [r.report_id for r in store.expire_due()] == ["L-2"] and store.expire_due() == []
+        await store.flush()
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.candidates(phone, since=0) == []
+    assert store.open_reports["lost"] == 1 and "mess" not in store.postings["lost"]
+    assert store.stats()["closed_reports"] == {"claimed": 1, "expired": 1}
+    with pytest.raises(ValueError):
+        store.close("L-3", "lost")
+
+    # Closed reports stay on file but are not matched after a restart either
+    restarted = LostFoundStore(path)
+    assert [r.report_id for r in restarted.load()] == ["L-3"]
+    assert restarted.reports["L-1"].status == "claimed" and restarted.candidates(phone, since=0) == []
+
+    index = ImageIndex()
+    index.add("lost", "L-1", (0xF0F0, 0x0F0F))
+    assert index.remove("L-1") and not index.remove("L-1")
+    assert index.search("lost", (0xF0F0, 0x0F0F)) == [] and index.stats()["entries"] == {"lost": 0, "found": 0}
+
+
+def test_complaint_store_issues_monotonic_ids_and_indexes_tickets(tmp_path):
+    path = str(tmp_path / "complaints.db")
+
+    def analysis(issue_type, severity):
+        return SimpleNamespace(issue_type=issue_type, severity=severity, immediate_action_needed="No",
+                               temporary_solution="Switch off the mains", estimated_resolution="hours")
+
+    async def scenario():
+        store = ComplaintStore(path, flush_interval=0.01)
+        first = store.create("Fan sparking in room 204, Block C", analysis("electrical", "major"))
+        second = store.create("Tap leaking in the Block C bathroom", analysis("Plumbing", "minor"))
+        third = store.create("No power on floor 2 of block c", analysis("electrical", "critical"))
+        # Filing is in memory only; the disk write happens in the background
+        assert store.stats()["pending_writes"] == 3
+        store.update_status(first.ticket_id, "in_progress")
+        await store.flush()
+        return store, [first.ticket_id, second.ticket_id, third.ticket_id]
+
+    store, ids = asyncio.run(scenario())
+    assert ids == [1001, 1002, 1003]
+    assert [t.ticket_id for t in store.find(issue_type="electrical")] == [1003, 1001]
+    assert [t.ticket_id for t in store.find(issue_type="plumbing", location="block c")] == [1002]
+    assert store.find(severity="critical", location="bathroom") == []
+    assert store.stats()["pending_writes"] == 0
+    with pytest.raises(ValueError):
+        store.update_status(1001, "closed")
+
+    restarted = ComplaintStore(path)
+    # Stored tickets are read on the store's thread, before the store serves requests
+    assert asyncio.run(restarted.warm_up()) == 3
+    assert restarted.get(1001).status == "in_progress" and restarted.get(1002).issue_type == "plumbing"
+
+    async def file_another():
+        ticket = restarted.create("Chair broken", analysis("furniture", "minor"))
+        await restarted.flush()
+        return ticket.ticket_id
+
+    assert asyncio.run(file_another()) == 1004
+    assert "In Progress" in ResponseFormatter.format_ticket_status(restarted.get(1001), 1001)
+    assert "No complaint ticket #42" in ResponseFormatter.format_ticket_status(restarted.get(42), 42)
+
+
+def test_incident_tracker_groups_duplicate_complaints(tmp_path):
+    path = str(tmp_path / "complaints.db")
+    analysis = SimpleNamespace(issue_type="electrical", severity="critical", immediate_action_needed="Yes",
+                               temporary_solution="Stay away from exposed wiring", estimated_resolution="hours")
+
+    async def scenario():
+        store = ComplaintStore(path, flush_interval=0.01)
+        tracker = IncidentTracker(store)
+        await tracker.warm_up()
+
+        def file(query, issue_type="electrical"):
+            incident = tracker.match(query, issue_type)
+            ticket = store.create(query, incident or analysis, incident_id=incident.ticket_id if incident else None)
+            tracker.add(ticket)
+            return ticket.incident_id
+
+        outage = file("No power in Block C since morning")
+        assert file("power cut in block c, no electricity") == outage
+        assert file("there is no power in block C!!", "general") == outage
+        # Another block, another issue type, or one student's own room is a separate incident
+        assert file("no power in block D") != outage
+        assert file("wifi not working in block c", "internet") != outage
+        fan = file("The fan in room 204 is not working")
+        assert file("fan in room 310 not working") != fan
+        assert file("fan not working in my room") != fan
+
+        assert tracker.size(outage) == 3
+        assert [item["incident_id"] for item in tracker.open_incidents()] == [outage]
+        # Resolving the incident resolves every duplicate and closes it to new reports
+        store.update_status(outage, "resolved")
+        assert {t.status for t in store.incident(outage)} == {"resolved"}
+        assert file("No power in block C again") != outage
+        await store.flush()
+        return outage
+
+    outage = asyncio.run(scenario())
+    restarted = IncidentTracker(ComplaintStore(path))
+    restarted.load()
+    assert restarted.size(outage) == 3 and restarted.open_incidents() == []
+    assert restarted.match("no power in block c again!!", "electrical") is not None
+
+
+def test_fuzzy_matcher_ranks_differently_worded_descriptions():
+    now = time.time()
+    reports = [
+        ("L-1", "black boAt earphones in a case", "electronics", now - 3600),
+        ("L-2", "blue Milton water bottle", "accessories", now - 3600),
+        ("L-3", "grey hoodie with a zip", "clothing", now - 3600),
+        ("L-4", "black earphones, JBL", "electronics", now - 20 * 86400),
+        ("L-5", "dell laptop charger", "electronics", now - 3600),
+    ]
+    incremental = FuzzyMatcher(min_rebuild=2)
+    for key, text, category, created in reports:
+        incremental.add(key, text, category, created)
+    assert incremental.stats()["rebuilds"] == 1 and incremental.stats()["pending_documents"] > 0
+
+    rebuilt = FuzzyMatcher()
+    # Per-feature arrays wait for documents
+    assert rebuilt.df is None and rebuilt.indptr is None and rebuilt.search("earphones") == []
+    rebuilt.add_many(*zip(*reports))
+    rebuilt.rebuild()
+    assert np.array_equal(rebuilt.df, incremental.df) and rebuilt.df.sum() == len(rebuilt.coo_docs.values)
+
+    query = "found dark earbuds in a case"
+    for matcher in (incremental, rebuilt):
+        ranked = matcher.search(query, limit=3, min_score=0.2)
+        assert [key for key, _ in ranked] == ["L-1", "L-4"]
+        assert matcher.search(query, categories=["clothing"], min_score=0.2) == []
+        assert [key for key, _ in matcher.search(query, since=now - 86400, min_score=0.2)] == ["L-1"]
+    # Documents folded in earlier keep their older IDF weights until the next rebuild: same order, close scores
+    assert [key for key, _ in incremental.search(query, limit=3)] == [key for key, _ in rebuilt.search(query, limit=3)]
+
+    # Removed documents drop out of results at once and out of the matrix at the next rebuild
+    for matcher in (incremental, rebuilt):
+        assert matcher.remove("L-1") == 1 and matcher.remove("L-1") == 0
+        assert [key for key, _ in matcher.search(query, min_score=0.2)] == ["L-4"]
+    rebuilt.rebuild()
+    assert len(rebuilt) == len(rebuilt.keys) == 4 and "L-1" not in rebuilt.keys
+    assert [key for key, _ in rebuilt.search(query, min_score=0.2)] == ["L-4"]
+    assert rebuilt.df.sum() == len(rebuilt.coo_docs.values)